@@ -8,6 +8,9 @@ from blog_autopilot.exceptions import AIResponseParseError
 
 logger = logging.getLogger("blog-autopilot")
 
+# markdown 代码块（```json ... ```）
+_CODE_BLOCK_RE = re.compile(r"```(?:json)?\s*\n?(.*?)\n?```", re.DOTALL)
+
 
 def _escape_newlines_in_json_strings(text: str) -> str:
     """将 JSON 字符串值内的原始换行符转义为 \\n"""
@@ -132,7 +135,7 @@ def _parse_json_response(
         pass
 
     # 尝试 2: 提取 markdown 代码块
-    code_block = re.search(r"```(?:json)?\s*\n?(.*?)\n?```", text, re.DOTALL)
+    code_block = _CODE_BLOCK_RE.search(text)
     if code_block:
         inner = code_block.group(1).strip()
         try:
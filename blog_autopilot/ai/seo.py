@@ -20,6 +20,10 @@ logger = logging.getLogger("blog-autopilot")
 # SEO 提取 JSON 必需字段
 _SEO_REQUIRED_FIELDS = ("meta_description", "slug", "wp_tags")
 
+# slug 规范化：非法字符替换为连字符，再合并连续连字符
+_SLUG_INVALID_RE = re.compile(r"[^a-z0-9-]")
+_SLUG_DASHES_RE = re.compile(r"-{2,}")
+
 
 def _parse_seo_response(response_text: str) -> dict:
     """解析 SEO AI 响应 JSON"""
@@ -59,8 +63,8 @@ def _validate_seo_metadata(data: dict) -> SEOMetadata:
 
     # slug
     slug = str(data.get("slug", "")).strip().lower()
-    slug = re.sub(r"[^a-z0-9-]", "-", slug)
-    slug = re.sub(r"-{2,}", "-", slug)
+    slug = _SLUG_INVALID_RE.sub("-", slug)
+    slug = _SLUG_DASHES_RE.sub("-", slug)
     slug = slug.strip("-")
     if not slug:
         raise SEOExtractionError("slug 规范化后为空")
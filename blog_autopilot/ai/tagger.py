@@ -11,6 +11,9 @@ from blog_autopilot.tag_registry import validate_tags_against_registry  # noqa:
 
 logger = logging.getLogger("blog-autopilot")
 
+# 连续空白（标签规范化时合并为单个空格）
+_WHITESPACE_RE = re.compile(r"\s+")
+
 # 标签提取 JSON 必需字段
 _TAGGER_REQUIRED_FIELDS = (
     "title", "tag_magazine", "tag_science",
@@ -103,7 +106,7 @@ def normalize_tag(tag: str) -> str:
     # 全角空格 → 半角
     tag = tag.replace("\u3000", " ")
     # 合并连续空格
-    tag = re.sub(r"\s+", " ", tag)
+    tag = _WHITESPACE_RE.sub(" ", tag)
     return tag
 
 
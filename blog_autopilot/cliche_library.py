@@ -32,7 +32,7 @@ BASELINE_FILE = Path(__file__).parent.parent / "cliche_baseline.json"
 _PHRASE_RE = re.compile("[「『\u201c\u2018](.*?)[」』\u201d\u2019]")
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ClicheEntry:
     """单条套话记录"""
     phrase: str
@@ -40,7 +40,7 @@ class ClicheEntry:
     severity: str  # 出现最多的严重级别
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ClicheReport:
     """套话库更新报告"""
     review_count: int
@@ -13,6 +13,8 @@ class WordPressSettings(BaseSettings):
     user: str
     app_password: SecretStr
     target_category_id: int = 15
+    # 文章 HTML 上限（UTF-8 字节），超出时不清洗、不发送，直接失败
+    max_html_bytes: int = 2_000_000
 
     @field_validator("url")
     @classmethod
@@ -28,6 +30,13 @@ class WordPressSettings(BaseSettings):
             raise ValueError("user must not be empty")
         return v
 
+    @field_validator("max_html_bytes")
+    @classmethod
+    def max_html_bytes_must_be_positive(cls, v: int) -> int:
+        if v <= 0:
+            raise ValueError("max_html_bytes must be positive")
+        return v
+
 
 class TelegramSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="TG_", extra="ignore")
@@ -116,6 +125,9 @@ class EmbeddingSettings(BaseSettings):
     api_base: str = "https://api.openai.com/v1"
     model: str = "text-embedding-3-large"
     dimensions: int = 3072
+    batch_size: int = 64
+    # 磁盘缓存目录，为空时仅使用进程内缓存
+    cache_dir: str = ""
 
     @field_validator("dimensions")
     @classmethod
@@ -124,6 +136,13 @@ class EmbeddingSettings(BaseSettings):
             raise ValueError("dimensions must be positive")
         return v
 
+    @field_validator("batch_size")
+    @classmethod
+    def batch_size_must_be_positive(cls, v: int) -> int:
+        if v <= 0:
+            raise ValueError("batch_size must be positive")
+        return v
+
     @field_validator("api_base")
     @classmethod
     def api_base_must_be_http(cls, v: str) -> str:
@@ -17,9 +17,38 @@ AI_PROMO_PREVIEW_LIMIT = 3000
 # 提取文本最小有效长度
 MIN_EXTRACTED_TEXT_LENGTH = 50
 
+# 目录入库支持的文件扩展名（小写，供 str.endswith 使用）
+SUPPORTED_INGEST_EXTENSIONS = (".md", ".txt", ".pdf")
+
+# 超过此大小（字节）的 .md/.txt 文件改用 mmap 读取
+MMAP_READ_THRESHOLD = 1 << 20
+
+# PDF 解析结果缓存条数（按文件内容 BLAKE2b 摘要，同一文件重复投递时跳过解析）
+PDF_TEXT_CACHE_SIZE = 32
+
 # 监控间隔（秒）
 POLL_INTERVAL = 60
 
+# 共享 HTTP 会话连接池：缓存的主机连接池数 / 每个主机保持的最大连接数
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 20
+
+# WordPress /batch/v1 单次请求可包含的子请求上限（WP 默认 max_items=25）
+WP_BATCH_MAX_REQUESTS = 25
+
+# batch endpoint 不可用时并发创建标签的线程数（不超过 HTTP_POOL_MAXSIZE，避免连接池排队）
+WP_TAG_WORKERS = 8
+
+# 遵循 Retry-After 头时单次等待的上限（秒），防止异常的大值卡住流水线
+WP_RETRY_AFTER_MAX = 60
+
+# HTML 清洗最多扫描轮数（每轮线性）；超过仍有危险内容视为恶意嵌套，拒绝发布
+WP_SANITIZE_MAX_PASSES = 8
+
+# WordPress 标签 ID / 文章内容内存缓存：有效期（秒）与容量
+WP_CACHE_TTL = 300
+WP_CACHE_MAXSIZE = 512
+
 # ── 文章关联系统常量 ──
 
 # 标签匹配最低阈值（低于此值的候选文章被过滤）
@@ -28,6 +57,23 @@ TAG_MATCH_THRESHOLD = 2
 # 关联查询返回数量
 ASSOCIATION_TOP_K = 5
 
+# HNSW ef_search 按文章规模分档：(文章数上限, ef_search)，超出最后一档使用 HNSW_EF_SEARCH_MAX
+HNSW_EF_SEARCH_TIERS = ((100_000, 40), (1_000_000, 100))
+HNSW_EF_SEARCH_MAX = 200
+
+# 内存 embedding 矩阵（全库去重用）缓存有效期（秒），本进程插入的文章直接追加
+CORPUS_MATRIX_CACHE_TTL = 300
+
+# int8 矩阵相似度分块大小（行），限制反量化时的临时 float32 内存
+CORPUS_MATRIX_BLOCK_ROWS = 4096
+
+# 向量索引构建参数（initialize_schema 中以 SET LOCAL 设置）
+INDEX_BUILD_MAINTENANCE_WORK_MEM = "2GB"
+INDEX_BUILD_PARALLEL_WORKERS = 7
+
+# 文章总数缓存有效期（秒），避免每次检索都执行 COUNT(*)
+ARTICLE_COUNT_CACHE_TTL = 60
+
 # 关联文章时间衰减
 ASSOCIATION_RECENCY_WEIGHT = 0.5        # 时间衰减最大加成
 ASSOCIATION_RECENCY_WINDOW_DAYS = 180   # 衰减窗口（天）
@@ -43,9 +89,21 @@ TAG_CONTENT_MAX_LENGTH = 100
 # 标签注册表模糊匹配阈值
 TAG_REGISTRY_FUZZY_THRESHOLD = 0.6
 
+# 批量入库并发度（标签提取 LLM 调用 / 批量 embedding 请求的在途上限）
+INGEST_CONCURRENCY = 5
+
+# 流水线单文件内并发执行的独立网络步骤（SEO / 封面图 / embedding）线程数
+PIPELINE_IO_WORKERS = 4
+
+# 流水线预取文本的提取线程数（窗口内后续文件的 PDF/DOCX 解析与当前文件的 AI 调用重叠）
+PIPELINE_EXTRACT_WORKERS = 2
+
 # Embedding 缓存容量
 EMBEDDING_CACHE_SIZE = 1000
 
+# 单次批量 Embedding 请求的估算 token 上限
+EMBEDDING_BATCH_TOKEN_BUDGET = 8000
+
 # 关联强度分类
 RELATION_STRONG = "强关联"
 RELATION_MEDIUM = "中关联"
@@ -12,6 +12,7 @@ from tenacity import retry, retry_if_result, stop_after_attempt, wait_exponentia
 from blog_autopilot.config import AISettings, WordPressSettings
 from blog_autopilot.constants import CATEGORY_COVER_STYLE, DEFAULT_COVER_STYLE
 from blog_autopilot.exceptions import CoverImageError
+from blog_autopilot.http_client import basic_auth, session
 
 logger = logging.getLogger("blog-autopilot")
 
@@ -23,6 +24,12 @@ _COVER_IMAGE_PROMPT_TEMPLATE = (
     "Do NOT include any text, letters, words, or characters in the image."
 )
 
+# Chat API 响应中的 data URI 图片：![image](data:image/...;base64,...)
+_DATA_URI_IMAGE_RE = re.compile(r"data:image/[^;]+;base64,([A-Za-z0-9+/=\s]+)")
+
+# 非 ASCII 字符（上传文件名需 ASCII 安全）
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7F]")
+
 
 def _get_media_url(posts_url: str) -> str:
     """从 posts URL 推导 /wp/v2/media endpoint"""
@@ -106,7 +113,7 @@ class CoverImageGenerator:
         if not content:
             raise CoverImageError("Chat API 响应中未包含内容")
         # 从 markdown 格式 ![image](data:image/...;base64,...) 提取 base64
-        match = re.search(r"data:image/[^;]+;base64,([A-Za-z0-9+/=\s]+)", content)
+        match = _DATA_URI_IMAGE_RE.search(content)
         if not match:
             raise CoverImageError("Chat API 响应中未包含图片数据")
         b64_data = match.group(1).replace("\n", "").replace(" ", "")
@@ -175,18 +182,18 @@ def upload_media_to_wordpress(
     返回 media_id，失败返回 None。
     """
     media_url = _get_media_url(settings.url)
-    credentials = f"{settings.user}:{settings.app_password.get_secret_value()}"
-    token = base64.b64encode(credentials.encode()).decode("utf-8")
     # 文件名 ASCII 安全处理：非 ASCII 字符替换为下划线，避免 Content-Disposition header 编码失败
-    safe_filename = re.sub(r"[^\x00-\x7F]", "_", filename)
+    safe_filename = _NON_ASCII_RE.sub("_", filename)
     headers = {
-        "Authorization": f"Basic {token}",
+        "Authorization": basic_auth(
+            settings.user, settings.app_password.get_secret_value(),
+        ),
         "Content-Disposition": f'attachment; filename="{safe_filename}"',
         "Content-Type": "image/png",
     }
 
     try:
-        resp = requests.post(
+        resp = session.post(
             media_url,
             headers=headers,
             data=image_data,
@@ -1,10 +1,16 @@
 """数据库连接管理模块 — PostgreSQL + pgvector"""
 
+import io
 import logging
+import os
+import struct
+import time
 import uuid
 from contextlib import contextmanager
+from dataclasses import replace
 from datetime import datetime
 
+import numpy as np
 import psycopg2
 import psycopg2.extras
 from psycopg2 import pool
@@ -12,9 +18,16 @@ from pgvector.psycopg2 import register_vector
 
 from blog_autopilot.config import DatabaseSettings
 from blog_autopilot.constants import (
+    ARTICLE_COUNT_CACHE_TTL,
     ASSOCIATION_RECENCY_WEIGHT,
     ASSOCIATION_RECENCY_WINDOW_DAYS,
     ASSOCIATION_TOP_K,
+    CORPUS_MATRIX_BLOCK_ROWS,
+    CORPUS_MATRIX_CACHE_TTL,
+    HNSW_EF_SEARCH_MAX,
+    HNSW_EF_SEARCH_TIERS,
+    INDEX_BUILD_MAINTENANCE_WORK_MEM,
+    INDEX_BUILD_PARALLEL_WORKERS,
     RELATION_MEDIUM,
     RELATION_STRONG,
     RELATION_WEAK,
@@ -23,11 +36,55 @@ from blog_autopilot.constants import (
     SURVEY_MIN_ARTICLES,
     TAG_MATCH_THRESHOLD,
 )
+from blog_autopilot.embedding import quantize_int8
 from blog_autopilot.exceptions import DatabaseError
 from blog_autopilot.models import ArticleRecord, AssociationResult, SeriesRecord, TagSet
 
 logger = logging.getLogger("blog-autopilot")
 
+# HNSW 向量索引建在 halfvec 表达式上（vector 类型索引最多 2000 维，halfvec 4000 维），
+# 查询的 ORDER BY 必须使用完全相同的表达式才能命中索引
+_EMBEDDING_INDEX_TYPE = "halfvec(3072)"
+_EMBEDDING_INDEX_EXPR = f"(embedding::{_EMBEDDING_INDEX_TYPE})"
+
+# COPY ... WITH (FORMAT binary) 输出的文件头签名
+_COPY_BINARY_SIGNATURE = b"PGCOPY\n\xff\r\n\0"
+
+
+def _parse_copy_binary(data: bytes) -> list[list[memoryview | None]]:
+    """
+    解析 PostgreSQL 二进制 COPY 输出，返回按行的字段列表。
+
+    字段为原始字节的 memoryview（不复制），NULL 为 None。
+
+    抛出:
+        ValueError: 数据格式不符
+    """
+    if not data.startswith(_COPY_BINARY_SIGNATURE):
+        raise ValueError("二进制 COPY 文件头不符")
+    view = memoryview(data)
+    # 签名之后：flags (int32) + 扩展头长度 (int32) + 扩展头
+    offset = len(_COPY_BINARY_SIGNATURE) + 4
+    (ext_len,) = struct.unpack_from("!i", view, offset)
+    offset += 4 + ext_len
+
+    rows = []
+    while True:
+        (field_count,) = struct.unpack_from("!h", view, offset)
+        offset += 2
+        if field_count == -1:
+            return rows
+        fields = []
+        for _ in range(field_count):
+            (length,) = struct.unpack_from("!i", view, offset)
+            offset += 4
+            if length == -1:
+                fields.append(None)
+            else:
+                fields.append(view[offset:offset + length])
+                offset += length
+        rows.append(fields)
+
 
 class Database:
     """PostgreSQL 数据库管理，封装连接池和所有数据库操作"""
@@ -35,6 +92,19 @@ class Database:
     def __init__(self, settings: DatabaseSettings) -> None:
         self._settings = settings
         self._pool: pool.SimpleConnectionPool | None = None
+        # (缓存时间戳, 文章总数)，供 ef_search 自动调参使用
+        self._count_cache: tuple[float, int] | None = None
+        # (缓存时间戳, [{id, title, url}], L2 归一化后 int8 量化的 (容量, D) 连续矩阵,
+        #  每行缩放系数)；矩阵前 len(meta) 行有效，其余为追加预留
+        self._corpus_cache: tuple[float, list[dict], np.ndarray, np.ndarray] | None = None
+        # 本进程已知存在的原文指纹 {source_hash: {id, title, url}}（写入或查询命中时记录）
+        self._known_hashes: dict[str, dict] = {}
+        # 数据库是否支持 halfvec（pgvector >= 0.7）；版本探测不足或首次加载 embedding 矩阵失败后置 False
+        self._halfvec_supported = True
+        # 是否已查询过 pgvector 扩展版本（_check_halfvec 仅探测一次）
+        self._halfvec_probed = False
+        # 全库 embedding 是否以二进制 COPY 拉取；COPY 或解析失败后置 False，改走文本查询
+        self._binary_copy_supported = True
 
     def _ensure_pool(self) -> pool.SimpleConnectionPool:
         """延迟创建连接池"""
@@ -99,13 +169,19 @@ class Database:
         except Exception as e:
             raise DatabaseError(f"SQL 执行失败: {e}") from e
 
-    def fetch_one(self, sql: str, params: tuple = ()) -> dict | None:
-        """查询单条记录，返回 dict 或 None"""
+    def fetch_one(
+        self, sql: str, params: tuple = (), local_settings: dict | None = None,
+    ) -> dict | None:
+        """查询单条记录，返回 dict 或 None
+
+        local_settings: 在同一事务内先执行 SET LOCAL 的参数（如 hnsw.ef_search）
+        """
         try:
             with self.get_connection() as conn:
                 with conn.cursor(
                     cursor_factory=psycopg2.extras.RealDictCursor
                 ) as cur:
+                    self._apply_local_settings(cur, local_settings)
                     cur.execute(sql, params)
                     row = cur.fetchone()
                     return dict(row) if row else None
@@ -114,13 +190,19 @@ class Database:
         except Exception as e:
             raise DatabaseError(f"查询失败: {e}") from e
 
-    def fetch_all(self, sql: str, params: tuple = ()) -> list[dict]:
-        """查询多条记录，返回 list[dict]"""
+    def fetch_all(
+        self, sql: str, params: tuple = (), local_settings: dict | None = None,
+    ) -> list[dict]:
+        """查询多条记录，返回 list[dict]
+
+        local_settings: 在同一事务内先执行 SET LOCAL 的参数（如 hnsw.ef_search）
+        """
         try:
             with self.get_connection() as conn:
                 with conn.cursor(
                     cursor_factory=psycopg2.extras.RealDictCursor
                 ) as cur:
+                    self._apply_local_settings(cur, local_settings)
                     cur.execute(sql, params)
                     return [dict(row) for row in cur.fetchall()]
         except DatabaseError:
@@ -128,6 +210,38 @@ class Database:
         except Exception as e:
             raise DatabaseError(f"查询失败: {e}") from e
 
+    def fetch_all_named(
+        self, sql: str, params: tuple = (), local_settings: dict | None = None,
+    ) -> list[tuple]:
+        """查询多条记录，返回 namedtuple 列表（热点查询用，比 RealDictCursor 轻量）"""
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor(
+                    cursor_factory=psycopg2.extras.NamedTupleCursor
+                ) as cur:
+                    self._apply_local_settings(cur, local_settings)
+                    cur.execute(sql, params)
+                    return cur.fetchall()
+        except DatabaseError:
+            raise
+        except Exception as e:
+            raise DatabaseError(f"查询失败: {e}") from e
+
+    def copy_binary(self, sql: str) -> bytes:
+        """以 COPY (sql) TO STDOUT WITH (FORMAT binary) 导出查询结果的原始字节"""
+        buf = io.BytesIO()
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.copy_expert(
+                        f"COPY ({sql}) TO STDOUT WITH (FORMAT binary)", buf,
+                    )
+        except DatabaseError:
+            raise
+        except Exception as e:
+            raise DatabaseError(f"COPY 导出失败: {e}") from e
+        return buf.getvalue()
+
     # ── DDL：数据库初始化 ──
 
     def initialize_schema(self) -> None:
@@ -271,6 +385,14 @@ class Database:
             WHERE series_id IS NULL
             """,
 
+            # 覆盖索引：按时间倒序列举文章时走 index-only scan，无需回表读取 embedding
+            """
+            CREATE INDEX IF NOT EXISTS idx_articles_recent
+            ON articles (created_at DESC)
+            INCLUDE (id, title, tag_magazine, tag_science, tag_topic, tag_content,
+                     tg_promo, url)
+            """,
+
             # 综述文章记录表（防止重复生成）
             """
             CREATE TABLE IF NOT EXISTS article_surveys (
@@ -294,6 +416,22 @@ class Database:
                     for stmt in ddl_statements:
                         cur.execute(stmt)
 
+                    # 历史 embedding 统一 L2 归一化（新文章入库时已归一化），
+                    # 使库中所有向量的余弦相似度等于内积；已归一化的行不会被改写
+                    try:
+                        # l2_normalize 需要 pgvector >= 0.7，失败时回滚到 SAVEPOINT 继续初始化
+                        cur.execute("SAVEPOINT before_embedding_normalize")
+                        cur.execute("""
+                            UPDATE articles SET embedding = l2_normalize(embedding)
+                            WHERE abs(vector_norm(embedding) - 1) > 1e-4
+                        """)
+                        cur.execute("RELEASE SAVEPOINT before_embedding_normalize")
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT before_embedding_normalize")
+                        logger.warning(
+                            f"历史 embedding 归一化跳过（需要 pgvector >= 0.7）: {e}"
+                        )
+
                     # 向量索引需要表中有数据后才能高效创建，
                     # 先检查是否已存在，不存在则创建
                     cur.execute("""
@@ -304,25 +442,29 @@ class Database:
                         try:
                             # 使用 SAVEPOINT 防止索引创建失败导致整个事务回滚
                             cur.execute("SAVEPOINT before_vector_index")
-                            # 动态计算 IVFFlat lists 参数
-                            cur.execute("SELECT COUNT(*) FROM articles")
-                            n = cur.fetchone()[0]
-                            lists = max(10, min(1000, int(n ** 0.5))) if n > 0 else 100
+                            # 并行建索引：SET LOCAL 仅作用于当前事务，不影响连接池中的后续查询
+                            cur.execute(
+                                "SET LOCAL maintenance_work_mem = %s",
+                                (INDEX_BUILD_MAINTENANCE_WORK_MEM,),
+                            )
+                            cur.execute(
+                                "SET LOCAL max_parallel_maintenance_workers = %s",
+                                (INDEX_BUILD_PARALLEL_WORKERS,),
+                            )
+                            # HNSW 无需训练数据，空表也可创建并随插入增量维护；
+                            # vector 类型索引上限 2000 维，3072 维需建在 halfvec 表达式上
                             cur.execute(f"""
                                 CREATE INDEX idx_articles_embedding
                                 ON articles
-                                USING ivfflat (embedding vector_cosine_ops)
-                                WITH (lists = {lists})
+                                USING hnsw ({_EMBEDDING_INDEX_EXPR} halfvec_cosine_ops)
                             """)
                             cur.execute("RELEASE SAVEPOINT before_vector_index")
-                        except Exception:
+                        except Exception as e:
                             # 回滚到 SAVEPOINT，恢复事务状态
                             cur.execute("ROLLBACK TO SAVEPOINT before_vector_index")
-                            # IVFFlat 索引要求表中已有足够数据，
-                            # 数据不足时跳过，后续可手动创建
+                            # halfvec HNSW 需要 pgvector >= 0.7，版本过低时跳过，查询退化为顺序扫描
                             logger.warning(
-                                "向量索引创建跳过（表中数据不足，"
-                                "可在数据导入后手动创建）"
+                                f"向量索引创建跳过（需要 pgvector >= 0.7）: {e}"
                             )
 
             logger.info("数据库 schema 初始化完成")
@@ -333,30 +475,46 @@ class Database:
 
     # ── CRUD 操作 ──
 
+    @staticmethod
+    def _generate_ids(n: int) -> list[str]:
+        """批量生成唯一文章 ID，只读取一次随机源（格式与 uuid4 前 12 位一致）"""
+        raw = os.urandom(16 * n)
+        return [
+            str(uuid.UUID(bytes=raw[i * 16:(i + 1) * 16], version=4))[:12]
+            for i in range(n)
+        ]
+
     @staticmethod
     def _generate_id() -> str:
         """生成唯一文章 ID"""
-        return str(uuid.uuid4())[:12]
-
-    def insert_article(
-        self,
+        return Database._generate_ids(1)[0]
+
+    _ARTICLE_INSERT_COLUMNS = (
+        "id, title, tag_magazine, tag_science, tag_topic, tag_content, "
+        "tg_promo, embedding, url, series_id, series_order, wp_post_id, "
+        "source_hash, summary, content_excerpt"
+    )
+    # INSERT 语句在类定义时拼接一次，调用时直接复用
+    _INSERT_ARTICLE_SQL = (
+        f"INSERT INTO articles ({_ARTICLE_INSERT_COLUMNS}) "
+        f"VALUES ({', '.join(['%s'] * 15)})"
+    )
+    _INSERT_ARTICLES_BULK_SQL = (
+        f"INSERT INTO articles ({_ARTICLE_INSERT_COLUMNS}) VALUES %s"
+    )
+
+    @classmethod
+    def _article_row(
+        cls,
+        article_id: str,
         record: ArticleRecord,
         series_id: str | None = None,
         series_order: int | None = None,
         wp_post_id: int | None = None,
         source_hash: str | None = None,
-    ) -> str:
-        """插入新文章记录，返回 article ID"""
-        article_id = record.id or self._generate_id()
-
-        sql = """
-            INSERT INTO articles
-                (id, title, tag_magazine, tag_science, tag_topic, tag_content,
-                 tg_promo, embedding, url, series_id, series_order, wp_post_id,
-                 source_hash, summary, content_excerpt)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        params = (
+    ) -> tuple:
+        """按 _ARTICLE_INSERT_COLUMNS 顺序构造插入参数"""
+        return (
             article_id,
             record.title,
             record.tags.tag_magazine,
@@ -364,7 +522,7 @@ class Database:
             record.tags.tag_topic,
             record.tags.tag_content,
             record.tg_promo,
-            record.embedding,
+            cls._vector_literal(record.embedding),
             record.url,
             series_id,
             series_order,
@@ -374,10 +532,27 @@ class Database:
             record.content_excerpt,
         )
 
+    def insert_article(
+        self,
+        record: ArticleRecord,
+        series_id: str | None = None,
+        series_order: int | None = None,
+        wp_post_id: int | None = None,
+        source_hash: str | None = None,
+    ) -> str:
+        """插入新文章记录，返回 article ID"""
+        article_id = record.id or self._generate_id()
+        record = self._with_unit_embedding(record)
+
+        params = self._article_row(
+            article_id, record, series_id, series_order, wp_post_id, source_hash,
+        )
+
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(sql, params)
+                    cur.execute(self._INSERT_ARTICLE_SQL, params)
+            self._on_articles_inserted([article_id], [record], [source_hash])
             logger.info(f"文章入库成功: {article_id} - {record.title}")
             return article_id
         except DatabaseError:
@@ -389,6 +564,48 @@ class Database:
                 ) from e
             raise DatabaseError(f"文章插入失败: {e}") from e
 
+    def insert_articles_bulk(
+        self,
+        records: list[ArticleRecord],
+        source_hashes: list[str | None] | None = None,
+    ) -> list[str]:
+        """
+        单事务批量插入文章，返回 article ID 列表（顺序与输入一致）。
+
+        source_hashes 与 records 一一对应（可选），写入 source_hash 列。
+
+        使用 execute_values 合并为多行 INSERT，任一条失败时整体回滚。
+
+        Raises:
+            DatabaseError: 插入失败（调用方可退化为逐条 insert_article）
+        """
+        if not records:
+            return []
+
+        new_ids = iter(self._generate_ids(sum(1 for r in records if not r.id)))
+        article_ids = [r.id or next(new_ids) for r in records]
+        records = [self._with_unit_embedding(r) for r in records]
+        source_hashes = source_hashes or [None] * len(records)
+        rows = [
+            self._article_row(article_id, record, source_hash=source_hash)
+            for article_id, record, source_hash
+            in zip(article_ids, records, source_hashes)
+        ]
+
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    psycopg2.extras.execute_values(
+                        cur, self._INSERT_ARTICLES_BULK_SQL, rows,
+                    )
+            self._on_articles_inserted(article_ids, records, source_hashes)
+            logger.info(f"批量入库成功: {len(article_ids)} 篇")
+            return article_ids
+        except DatabaseError:
+            raise
+        except Exception as e:
+            raise DatabaseError(f"批量插入失败: {e}") from e
+
     def get_article(self, article_id: str) -> ArticleRecord | None:
         """查询单篇文章"""
         row = self.fetch_one(
@@ -403,17 +620,81 @@ class Database:
         )
         return self._row_to_record(row) if row else None
 
+    def get_articles_by_urls(self, urls: list[str]) -> dict[str, ArticleRecord]:
+        """按 URL 批量查重，一次查询返回 {url: ArticleRecord}（不含 embedding）"""
+        if not urls:
+            return {}
+        rows = self.fetch_all(
+            """
+            SELECT id, title, tag_magazine, tag_science, tag_topic, tag_content,
+                   tg_promo, url, created_at, summary, content_excerpt
+            FROM articles WHERE url = ANY(%s)
+            """,
+            (list(urls),),
+        )
+        return {row["url"]: self._row_to_record(row) for row in rows}
+
     def count_articles(self) -> int:
-        """统计文章总数"""
+        """统计文章总数（内存缓存 ARTICLE_COUNT_CACHE_TTL 秒，插入文章时失效）"""
+        now = time.monotonic()
+        if self._count_cache is not None:
+            cached_at, count = self._count_cache
+            if now - cached_at < ARTICLE_COUNT_CACHE_TTL:
+                return count
         row = self.fetch_one("SELECT COUNT(*) as cnt FROM articles")
-        return row["cnt"] if row else 0
+        count = row["cnt"] if row else 0
+        self._count_cache = (now, count)
+        return count
+
+    @staticmethod
+    def _ef_search_for(n: int) -> int:
+        """按文章规模返回 HNSW ef_search：<10 万 40，<100 万 100，其余 200"""
+        for upper, ef in HNSW_EF_SEARCH_TIERS:
+            if n < upper:
+                return ef
+        return HNSW_EF_SEARCH_MAX
+
+    def _vector_search_settings(self) -> dict:
+        """向量检索的 SET LOCAL 参数；统计失败时使用最小档位"""
+        try:
+            n = self.count_articles()
+        except Exception as e:
+            logger.warning(f"文章计数失败，ef_search 使用默认档位: {e}")
+            n = 0
+        return {"hnsw.ef_search": self._ef_search_for(n)}
+
+    def _check_halfvec(self) -> bool:
+        """
+        数据库是否支持 halfvec：首次调用时查询 pgvector 扩展版本（>= 0.7），之后沿用结果。
+
+        查询失败时不缓存探测结果，沿用当前判断，下次调用再探测。
+        """
+        if not self._halfvec_probed:
+            try:
+                row = self.fetch_one(
+                    "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+                )
+            except DatabaseError as e:
+                logger.warning(f"pgvector 版本查询失败: {e}")
+                return self._halfvec_supported
+            self._halfvec_probed = True
+            version = row["extversion"] if row else ""
+            major_minor = tuple(
+                int(part) for part in version.split(".")[:2] if part.isdigit()
+            )
+            if major_minor < (0, 7):
+                logger.warning(
+                    f"pgvector 版本 {version or '未知'} 不支持 halfvec，向量检索退化为顺序扫描"
+                )
+                self._halfvec_supported = False
+        return self._halfvec_supported
 
     # ── 两阶段关联查询 ──
 
     def find_related_articles(
         self,
         tags: TagSet,
-        embedding: list[float],
+        embedding: np.ndarray | list[float],
         exclude_id: str | None = None,
         top_k: int = ASSOCIATION_TOP_K,
     ) -> list[AssociationResult]:
@@ -424,6 +705,7 @@ class Database:
         第二阶段：对候选池按 embedding 余弦相似度排序，返回 Top K
         """
         exclude_id = exclude_id or ""
+        vec = self._vector_literal(embedding)
 
         sql = """
             WITH candidates AS (
@@ -472,44 +754,47 @@ class Database:
             RELATION_STRONG,
             RELATION_MEDIUM,
             RELATION_WEAK,
-            str(embedding),
+            vec,
             ASSOCIATION_RECENCY_WINDOW_DAYS,
             ASSOCIATION_RECENCY_WEIGHT,
             TAG_MATCH_THRESHOLD,
-            str(embedding),
+            vec,
             ASSOCIATION_RECENCY_WINDOW_DAYS,
             ASSOCIATION_RECENCY_WEIGHT,
             top_k,
         )
 
         try:
-            rows = self.fetch_all(sql, params)
+            rows = self.fetch_all_named(
+                sql, params, local_settings=self._vector_search_settings(),
+            )
         except Exception as e:
             logger.error(f"关联查询失败: {e}")
             return []
 
+        # 结果行不含 embedding 列，直接按属性读取，避免逐行构建 dict
         results = []
         for row in rows:
             article = ArticleRecord(
-                id=row["id"],
-                title=row["title"],
+                id=row.id,
+                title=row.title,
                 tags=TagSet(
-                    tag_magazine=row["tag_magazine"],
-                    tag_science=row["tag_science"],
-                    tag_topic=row["tag_topic"],
-                    tag_content=row["tag_content"],
+                    tag_magazine=row.tag_magazine,
+                    tag_science=row.tag_science,
+                    tag_topic=row.tag_topic,
+                    tag_content=row.tag_content,
                 ),
-                tg_promo=row["tg_promo"],
-                url=row.get("url"),
-                created_at=row.get("created_at"),
-                summary=row.get("summary"),
-                content_excerpt=row.get("content_excerpt"),
+                tg_promo=row.tg_promo,
+                url=row.url,
+                created_at=row.created_at,
+                summary=row.summary,
+                content_excerpt=row.content_excerpt,
             )
             results.append(AssociationResult(
                 article=article,
-                tag_match_count=row["tag_match_count"],
-                relation_level=row["relation_level"],
-                similarity=float(row["similarity"]),
+                tag_match_count=row.tag_match_count,
+                relation_level=row.relation_level,
+                similarity=float(row.similarity),
             ))
 
         logger.info(f"关联查询完成: 找到 {len(results)} 篇相关文章")
@@ -517,45 +802,203 @@ class Database:
 
     def find_duplicate(
         self,
-        embedding: list[float],
+        embedding: np.ndarray | list[float],
         threshold: float = 0.95,
     ) -> dict | None:
         """
         检查是否存在高度相似的文章（内容去重）。
 
-        返回最相似文章的 {id, title, similarity}，不存在则返回 None。
+        在内存中的全库归一化矩阵上做矩阵-向量乘法求余弦相似度。
+        返回最相似文章的 {id, title, url, similarity}，不存在则返回 None。
         """
-        sql = """
-            SELECT id, title, url,
-                   1 - (embedding <=> %s::vector) AS similarity
-            FROM articles
-            ORDER BY embedding <=> %s::vector
-            LIMIT 1
+        return self.find_duplicates([embedding], threshold)[0]
+
+    def find_duplicates(
+        self,
+        embeddings: list[np.ndarray | list[float]],
+        threshold: float = 0.95,
+    ) -> list[dict | None]:
         """
+        批量去重：一次遍历全库矩阵，同时计算多条 embedding 的最相似文章。
+
+        全库矩阵每块只反量化一次，与 K 条查询做一次矩阵乘法，
+        代替 K 次 find_duplicate 各自遍历全库。结果与输入一一对应。
+        """
+        if not embeddings:
+            return []
         try:
-            row = self.fetch_one(sql, (str(embedding), str(embedding)))
+            meta, sims = self._corpus_similarities(embeddings)
         except Exception as e:
             logger.error(f"去重查询失败: {e}")
-            return None
+            return [None] * len(embeddings)
+        if not meta:
+            return [None] * len(embeddings)
 
-        if row and float(row["similarity"]) >= threshold:
-            return row
-        return None
+        best_rows = np.argmax(sims, axis=0)
+        results = []
+        for column, best in enumerate(best_rows):
+            similarity = float(sims[best, column])
+            results.append(
+                {**meta[best], "similarity": similarity}
+                if similarity >= threshold else None
+            )
+        return results
+
+    def _corpus_similarities(
+        self, embeddings: list[np.ndarray | list[float]],
+    ) -> tuple[list[dict], np.ndarray]:
+        """
+        计算查询向量与全库文章的余弦相似度，返回 ([{id, title, url}], sims)。
+
+        sims 形状为 (全库文章数, 查询条数)。库内向量以 int8 存储（内存为
+        float32 的 1/4），查询向量保持 float32；按 CORPUS_MATRIX_BLOCK_ROWS
+        分块反量化后走 BLAS 矩阵乘法。
+
+        反量化缓冲区整次调用只分配一块并逐块复用，矩阵乘法结果直接写入 sims，
+        避免每块重新申请（并缺页清零）数十 MB 的临时数组。
+        """
+        meta, quantized, scales = self._load_corpus_matrix()
+        if not meta:
+            return meta, np.empty((0, len(embeddings)), dtype=np.float32)
+
+        queries = np.column_stack([
+            self._normalize(np.asarray(embedding, dtype=np.float32))
+            for embedding in embeddings
+        ])
+        sims = np.empty((len(meta), queries.shape[1]), dtype=np.float32)
+        block = np.empty(
+            (min(len(meta), CORPUS_MATRIX_BLOCK_ROWS), quantized.shape[1]),
+            dtype=np.float32,
+        )
+        for start in range(0, len(meta), CORPUS_MATRIX_BLOCK_ROWS):
+            end = min(start + CORPUS_MATRIX_BLOCK_ROWS, len(meta))
+            rows = block[:end - start]
+            np.copyto(rows, quantized[start:end], casting="unsafe")
+            np.matmul(rows, queries, out=sims[start:end])
+        sims *= scales[:, None]
+        return meta, sims
+
+    def _load_corpus_matrix(self) -> tuple[list[dict], np.ndarray, np.ndarray]:
+        """
+        加载全库 embedding：L2 归一化后按行 int8 量化。
+
+        返回 ([{id, title, url}], int8 矩阵 (N, D), 缩放系数 (N,))，行序一致。
+        缓存 CORPUS_MATRIX_CACHE_TTL 秒；本进程插入的文章直接追加到缓存矩阵，
+        其他进程写入的文章在 TTL 过期重载后可见。
+        """
+        now = time.monotonic()
+        if self._corpus_cache is not None:
+            cached_at, meta, quantized, scales = self._corpus_cache
+            if now - cached_at < CORPUS_MATRIX_CACHE_TTL:
+                # 缓冲区可能预留了追加容量，只返回有效行（切片为视图，不复制）
+                n = len(meta)
+                return meta, quantized[:n], scales[:n]
+
+        rows = self._fetch_corpus_rows()
+        meta = [{"id": r["id"], "title": r["title"], "url": r["url"]} for r in rows]
+        if rows:
+            matrix = np.vstack([self._to_array(r["embedding"]) for r in rows])
+            # 新写入的向量已归一化，这里兼容早期未归一化的存量数据
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1, norms)
+            quantized, scales = quantize_int8(matrix)
+        else:
+            quantized = np.empty((0, 0), dtype=np.int8)
+            scales = np.empty(0, dtype=np.float32)
+
+        self._corpus_cache = (now, meta, quantized, scales)
+        logger.debug(f"embedding 矩阵已加载: {quantized.shape} int8")
+        return meta, quantized, scales
+
+    def _fetch_corpus_rows(self) -> list[dict]:
+        """
+        拉取全库 embedding。矩阵随后会量化为 int8，因此以 halfvec 传输即可，
+        传输量约为 float32 的一半；数据库不支持 halfvec 时回退为原始列。
+
+        优先用二进制 COPY，向量直接从网络字节 np.frombuffer 还原，
+        省去每行数千个浮点数的文本格式化与解析；失败时退回文本查询。
+        """
+        if self._binary_copy_supported:
+            try:
+                return self._copy_corpus_rows()
+            except (DatabaseError, ValueError, struct.error) as e:
+                logger.warning(f"二进制 COPY 拉取 embedding 失败，改用文本查询: {e}")
+                # 连接本身失败时文本查询同样会失败，不据此降级
+                if self._pool is not None:
+                    self._binary_copy_supported = False
+        if self._halfvec_supported:
+            try:
+                return self.fetch_all(
+                    f"SELECT id, title, url, embedding::{_EMBEDDING_INDEX_TYPE} "
+                    "AS embedding FROM articles WHERE embedding IS NOT NULL"
+                )
+            except DatabaseError as e:
+                logger.warning(f"halfvec 不可用，embedding 按 float32 传输: {e}")
+                self._halfvec_supported = False
+        return self.fetch_all(
+            "SELECT id, title, url, embedding FROM articles "
+            "WHERE embedding IS NOT NULL"
+        )
+
+    def _copy_corpus_rows(self) -> list[dict]:
+        """二进制 COPY 拉取全库 embedding，返回与 _fetch_corpus_rows 相同结构的行"""
+        if self._halfvec_supported:
+            column, dtype = f"embedding::{_EMBEDDING_INDEX_TYPE}", ">f2"
+        else:
+            column, dtype = "embedding", ">f4"
+        data = self.copy_binary(
+            f"SELECT id, title, url, {column} FROM articles "
+            "WHERE embedding IS NOT NULL"
+        )
+        rows = []
+        for article_id, title, url, embedding in _parse_copy_binary(data):
+            rows.append({
+                "id": str(article_id, "utf-8"),
+                "title": str(title, "utf-8"),
+                "url": str(url, "utf-8") if url is not None else None,
+                # vector / halfvec 二进制格式：int16 维度 + int16 保留位 + 大端浮点数组
+                "embedding": np.frombuffer(embedding, dtype=dtype, offset=4),
+            })
+        return rows
 
     def find_duplicate_by_hash(self, source_hash: str) -> dict | None:
         """
         Level 1 去重：按原文 SHA256 精确匹配。
 
-        返回 {id, title, url} 或 None。
+        返回 {id, title, url} 或 None。本进程已知的指纹直接命中，不查库；
+        未命中时仍查库（其他进程可能已写入）。
         """
+        known = self._known_hashes.get(source_hash)
+        if known is not None:
+            return known
         try:
-            return self.fetch_one(
+            row = self.fetch_one(
                 "SELECT id, title, url FROM articles WHERE source_hash = %s",
                 (source_hash,),
             )
         except Exception as e:
             logger.error(f"哈希去重查询失败: {e}")
             return None
+        if row:
+            self._known_hashes[source_hash] = row
+        return row
+
+    def find_duplicates_by_hashes(self, hashes: list[str]) -> dict[str, dict]:
+        """批量 Level 1 去重：一次查询返回 {source_hash: {id, title, url}}（已知指纹不再查库）"""
+        found = {h: self._known_hashes[h] for h in hashes if h in self._known_hashes}
+        unknown = [h for h in hashes if h not in found]
+        if not unknown:
+            return found
+        rows = self.fetch_all(
+            "SELECT id, title, url, source_hash FROM articles "
+            "WHERE source_hash = ANY(%s)",
+            (unknown,),
+        )
+        for row in rows:
+            source_hash = row.pop("source_hash")
+            self._known_hashes[source_hash] = row
+            found[source_hash] = row
+        return found
 
     def find_similar_titles(
         self,
@@ -589,19 +1032,27 @@ class Database:
             return None
 
     def find_nearest_by_embedding(
-        self, embedding: list[float], top_k: int = 5,
+        self, embedding: np.ndarray | list[float], top_k: int = 5,
     ) -> list[dict]:
         """按 embedding 相似度查找最近邻文章的标签
 
         Raises:
             DatabaseError: 查询失败时向上抛出，不吞异常
         """
-        sql = """
+        if self._check_halfvec():
+            order_by = f"{_EMBEDDING_INDEX_EXPR} <=> %s::{_EMBEDDING_INDEX_TYPE}"
+        else:
+            # 无 halfvec 即无 HNSW 索引，按原始列顺序扫描
+            order_by = "embedding <=> %s::vector"
+        sql = f"""
             SELECT tag_magazine, tag_science, tag_topic, tag_content
             FROM articles WHERE embedding IS NOT NULL
-            ORDER BY embedding <=> %s::vector LIMIT %s
+            ORDER BY {order_by} LIMIT %s
         """
-        return self.fetch_all(sql, (str(embedding), top_k))
+        return self.fetch_all(
+            sql, (self._vector_literal(embedding), top_k),
+            local_settings=self._vector_search_settings(),
+        )
 
     # ── 主题推荐查询 ──
 
@@ -612,6 +1063,15 @@ class Database:
             FROM articles ORDER BY created_at DESC
         """)
 
+    def fetch_tag_combo_stats(self) -> list[dict]:
+        """按 (magazine, science, topic) 三级标签组合聚合文章数与最近创建时间"""
+        return self.fetch_all("""
+            SELECT tag_magazine, tag_science, tag_topic,
+                   COUNT(*) AS cnt, MAX(created_at) AS latest
+            FROM articles
+            GROUP BY tag_magazine, tag_science, tag_topic
+        """)
+
     def fetch_recent_titles(self, limit: int = 20) -> list[str]:
         """获取最近 N 篇文章标题"""
         rows = self.fetch_all(
@@ -633,7 +1093,14 @@ class Database:
         self, centroid: list[float], top_n: int = 10
     ) -> list[dict]:
         """找到离质心最远的 N 篇文章（含最近邻相似度）"""
-        sql = """
+        if self._check_halfvec():
+            nn_order_by = (
+                f"a.embedding::{_EMBEDDING_INDEX_TYPE} <=> f.embedding::{_EMBEDDING_INDEX_TYPE}"
+            )
+        else:
+            # 无 halfvec 即无 HNSW 索引，按原始列顺序扫描
+            nn_order_by = "a.embedding <=> f.embedding"
+        sql = f"""
             SELECT f.id, f.title,
                    f.tag_magazine, f.tag_science, f.tag_topic, f.tag_content,
                    f.dist_centroid,
@@ -650,12 +1117,14 @@ class Database:
                 SELECT 1 - (a.embedding <=> f.embedding) AS nn_similarity
                 FROM articles a
                 WHERE a.id != f.id
-                ORDER BY a.embedding <=> f.embedding
+                ORDER BY {nn_order_by}
                 LIMIT 1
             ) nn
         """
+        vec = self._vector_literal(centroid)
         return self.fetch_all(
-            sql, (str(centroid), str(centroid), top_n)
+            sql, (vec, vec, top_n),
+            local_settings=self._vector_search_settings(),
         )
 
     # ── 文章系列查询 ──
@@ -703,10 +1172,29 @@ class Database:
         )
         return [self._row_to_record(r) for r in rows]
 
+    def get_series_members_with_wp(
+        self, series_id: str,
+    ) -> list[tuple[ArticleRecord, int | None]]:
+        """获取系列成员及其 WordPress post ID（按 series_order 排序，不含 embedding）
+
+        一次查询同时满足系列检测（成员列表）和回溯导航（上一篇 / 上上篇 / post ID）。
+        """
+        rows = self.fetch_all(
+            """
+            SELECT id, title, tag_magazine, tag_science, tag_topic, tag_content,
+                   tg_promo, url, created_at, wp_post_id
+            FROM articles
+            WHERE series_id = %s
+            ORDER BY series_order ASC
+            """,
+            (series_id,),
+        )
+        return [(self._row_to_record(r), r.get("wp_post_id")) for r in rows]
+
     def get_series_article_embeddings(
         self, series_id: str,
-    ) -> list[list[float]]:
-        """获取系列中所有文章的 embedding"""
+    ) -> list[np.ndarray]:
+        """获取系列中所有文章的 embedding（float32 数组，直接用于矩阵运算）"""
         rows = self.fetch_all(
             """
             SELECT embedding FROM articles
@@ -714,7 +1202,31 @@ class Database:
             """,
             (series_id,),
         )
-        return [list(r["embedding"]) for r in rows if r.get("embedding")]
+        return [
+            self._to_array(r["embedding"]) for r in rows
+            if r.get("embedding") is not None
+        ]
+
+    def get_series_article_embeddings_bulk(
+        self, series_ids: list[str],
+    ) -> dict[str, list[np.ndarray]]:
+        """一次查询获取多个系列的文章 embedding，按 series_id 分组（无 embedding 的系列不在结果中）"""
+        if not series_ids:
+            return {}
+        rows = self.fetch_all(
+            """
+            SELECT series_id, embedding FROM articles
+            WHERE series_id = ANY(%s) AND embedding IS NOT NULL
+            """,
+            (list(series_ids),),
+        )
+        grouped: dict[str, list[np.ndarray]] = {}
+        for r in rows:
+            if r.get("embedding") is not None:
+                grouped.setdefault(r["series_id"], []).append(
+                    self._to_array(r["embedding"]),
+                )
+        return grouped
 
     def create_series(
         self,
@@ -769,7 +1281,7 @@ class Database:
         tag_magazine: str,
         tag_science: str,
         tag_topic: str,
-        embedding: list[float],
+        embedding: np.ndarray | list[float],
         lookback_days: int = 30,
         threshold: float = 0.85,
     ) -> list[dict]:
@@ -787,12 +1299,13 @@ class Database:
             ORDER BY embedding <=> %s::vector
             LIMIT 5
         """
+        vec = self._vector_literal(embedding)
         try:
             rows = self.fetch_all(
                 sql,
                 (
-                    str(embedding), tag_magazine, tag_science, tag_topic,
-                    lookback_days, str(embedding),
+                    vec, tag_magazine, tag_science, tag_topic,
+                    lookback_days, vec,
                 ),
             )
             return [r for r in rows if float(r["similarity"]) >= threshold]
@@ -1144,6 +1657,108 @@ class Database:
 
     # ── 内部辅助 ──
 
+    def _invalidate_caches(self) -> None:
+        """清空计数与 embedding 矩阵缓存"""
+        self._count_cache = None
+        self._corpus_cache = None
+
+    def _on_articles_inserted(
+        self,
+        article_ids: list[str],
+        records: list[ArticleRecord],
+        source_hashes: list[str | None],
+    ) -> None:
+        """
+        文章写入后更新缓存：计数失效，记录原文指纹；embedding 矩阵已加载时追加新行，
+        避免每发布一篇就整库重载（O(新增行) 而非 O(全库)）。
+        """
+        self._count_cache = None
+        for article_id, record, source_hash in zip(
+            article_ids, records, source_hashes,
+        ):
+            if source_hash:
+                self._known_hashes[source_hash] = {
+                    "id": article_id, "title": record.title, "url": record.url,
+                }
+        if self._corpus_cache is None:
+            return
+
+        added = [
+            (article_id, record)
+            for article_id, record in zip(article_ids, records)
+            if record.embedding is not None
+        ]
+        if not added:
+            return
+
+        cached_at, meta, quantized, scales = self._corpus_cache
+        # 写入前已归一化，直接量化
+        matrix = np.vstack([record.embedding for _, record in added])
+        if meta and matrix.shape[1] != quantized.shape[1]:
+            # 维度变化（更换 embedding 模型）时放弃增量，下次整库重载
+            self._corpus_cache = None
+            return
+
+        new_quantized, new_scales = quantize_int8(matrix)
+        n, k = len(meta), len(added)
+        if not meta:
+            quantized, scales = new_quantized, new_scales
+        else:
+            if n + k > len(quantized):
+                # 容量不足时按倍数扩容，摊还后每次追加只复制新增行
+                capacity = max(2 * len(quantized), n + k)
+                grown_q = np.empty((capacity, quantized.shape[1]), dtype=np.int8)
+                grown_s = np.empty(capacity, dtype=np.float32)
+                grown_q[:n] = quantized[:n]
+                grown_s[:n] = scales[:n]
+                quantized, scales = grown_q, grown_s
+            quantized[n:n + k] = new_quantized
+            scales[n:n + k] = new_scales
+        meta.extend(
+            {"id": article_id, "title": record.title, "url": record.url}
+            for article_id, record in added
+        )
+        self._corpus_cache = (cached_at, meta, quantized, scales)
+
+    @staticmethod
+    def _normalize(vec: np.ndarray) -> np.ndarray:
+        """L2 归一化，零向量原样返回"""
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    @classmethod
+    def _with_unit_embedding(cls, record: ArticleRecord) -> ArticleRecord:
+        """返回 embedding 已 L2 归一化（float32）的记录，入库与缓存共用同一份向量"""
+        if record.embedding is None:
+            return record
+        return replace(
+            record,
+            embedding=cls._normalize(np.asarray(record.embedding, dtype=np.float32)),
+        )
+
+    @staticmethod
+    def _apply_local_settings(cur, local_settings: dict | None) -> None:
+        """在当前事务内执行 SET LOCAL（参数名仅来自代码常量）"""
+        for name, value in (local_settings or {}).items():
+            cur.execute(f"SET LOCAL {name} = %s", (value,))
+
+    @staticmethod
+    def _vector_literal(embedding) -> str | None:
+        """将 embedding（ndarray / list）格式化为 pgvector 文本字面量 '[x,y,...]'"""
+        if embedding is None:
+            return None
+        arr = np.asarray(embedding, dtype=np.float32)
+        return "[" + ",".join(map(str, arr)) + "]"
+
+    @staticmethod
+    def _to_array(value) -> np.ndarray | None:
+        """将数据库返回的向量（pgvector Vector / HalfVector / ndarray / list）转为 float32 数组"""
+        if value is None:
+            return None
+        if hasattr(value, "to_numpy"):
+            value = value.to_numpy()
+        return np.asarray(value, dtype=np.float32)
+
     @staticmethod
     def _row_to_record(row: dict) -> ArticleRecord:
         """将数据库行转换为 ArticleRecord"""
@@ -1157,7 +1772,7 @@ class Database:
                 tag_content=row["tag_content"],
             ),
             tg_promo=row["tg_promo"],
-            embedding=row.get("embedding"),
+            embedding=Database._to_array(row.get("embedding")),
             url=row.get("url"),
             created_at=row.get("created_at"),
             summary=row.get("summary"),
@@ -2,25 +2,119 @@
 
 import hashlib
 import logging
+import os
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+import numpy as np
+from openai import APIConnectionError, APIStatusError, OpenAI
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 from blog_autopilot.config import EmbeddingSettings
-from blog_autopilot.constants import EMBEDDING_CACHE_SIZE
+from blog_autopilot.constants import (
+    EMBEDDING_BATCH_TOKEN_BUDGET,
+    EMBEDDING_CACHE_SIZE,
+    INGEST_CONCURRENCY,
+)
+from blog_autopilot.embedding_cache import EmbeddingDiskCache
 from blog_autopilot.exceptions import EmbeddingError
 
 logger = logging.getLogger("blog-autopilot")
 
 
+def pack_embedding(embedding) -> bytes:
+    """将 embedding 打包为定长 float32 字节（3072 维 = 12 KB），用于落盘/跨进程传递"""
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def unpack_embedding(data: bytes) -> np.ndarray:
+    """从 float32 字节还原 embedding（零拷贝，返回只读数组）"""
+    return np.frombuffer(data, dtype=np.float32)
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """按行对称量化为 int8：返回 (int8 矩阵, 每行 float32 缩放系数)，x ≈ q * scale"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.rint(matrix / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：UTF-8 字节数 / 3（中文约 1 字 1 token，英文偏保守）"""
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def _is_transient_api_error(exc: BaseException) -> bool:
+    """
+    tenacity 重试条件：仅限流（429）、服务端错误（5xx）与连接/超时错误重试。
+
+    其余 4xx（如输入非法）重试不会成功，直接交由二分拆分定位出错条目。
+    """
+    cause = exc.__cause__ if isinstance(exc, EmbeddingError) else exc
+    # APITimeoutError 是 APIConnectionError 的子类
+    if isinstance(cause, APIConnectionError):
+        return True
+    if isinstance(cause, APIStatusError):
+        return cause.status_code == 429 or cause.status_code >= 500
+    return False
+
+
+def plan_batches(
+    texts: list[str],
+    max_items: int,
+    token_budget: int = EMBEDDING_BATCH_TOKEN_BUDGET,
+) -> list[list[str]]:
+    """
+    按长度排序后贪心分块：每块不超过 max_items 条且估算 token 不超过 token_budget。
+
+    长度相近的文本落在同一块，短文本可以装满一块，长文本不会超出单次请求上限；
+    单条超出预算的文本独占一块。
+    """
+    batches: list[list[str]] = []
+    current: list[str] = []
+    current_tokens = 0
+    for text in sorted(texts, key=len):
+        tokens = estimate_tokens(text)
+        if current and (
+            len(current) >= max_items or current_tokens + tokens > token_budget
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
 class EmbeddingClient:
-    """OpenAI Embedding API 客户端，延迟初始化 + 内存缓存"""
+    """OpenAI Embedding API 客户端，延迟初始化 + 内存缓存
+
+    向量统一以 float32 的 np.ndarray 返回和缓存（3072 维约 12 KB，
+    list[float] 约 60 KB），缓存中的数组为只读，调用方需修改时请先 copy。
+    """
 
     def __init__(self, settings: EmbeddingSettings) -> None:
         self._settings = settings
         self._client: OpenAI | None = None
-        self._cache: OrderedDict[str, list[float]] = OrderedDict()
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        # 可选的磁盘缓存，按模型和维度分目录
+        self._disk_cache: EmbeddingDiskCache | None = None
+        if settings.cache_dir:
+            self._disk_cache = EmbeddingDiskCache(
+                os.path.join(
+                    settings.cache_dir,
+                    f"{settings.model}-{settings.dimensions}",
+                ),
+                settings.dimensions,
+            )
         self._cache_hits = 0
         self._cache_misses = 0
 
@@ -39,19 +133,31 @@ class EmbeddingClient:
         """计算文本 hash 作为缓存 key"""
         return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-    def _cache_get(self, text: str) -> list[float] | None:
-        """从缓存获取 embedding"""
+    def _cache_get(self, text: str) -> np.ndarray | None:
+        """从缓存获取 embedding（先查内存，再查磁盘并回填内存）"""
         key = self._text_hash(text)
         if key in self._cache:
             self._cache.move_to_end(key)
             self._cache_hits += 1
             return self._cache[key]
+        if self._disk_cache is not None:
+            embedding = self._disk_cache.get(key)
+            if embedding is not None:
+                self._cache_hits += 1
+                self._memory_put(key, embedding)
+                return embedding
         self._cache_misses += 1
         return None
 
-    def _cache_put(self, text: str, embedding: list[float]) -> None:
-        """将 embedding 存入缓存"""
+    def _cache_put(self, text: str, embedding: np.ndarray) -> None:
+        """将 embedding 存入缓存（内存 + 磁盘）"""
         key = self._text_hash(text)
+        self._memory_put(key, embedding)
+        if self._disk_cache is not None:
+            self._disk_cache.put(key, embedding)
+
+    def _memory_put(self, key: str, embedding: np.ndarray) -> None:
+        """写入内存 LRU"""
         self._cache[key] = embedding
         self._cache.move_to_end(key)
         # 超出容量时淘汰最旧的
@@ -63,9 +169,9 @@ class EmbeddingClient:
         wait=wait_exponential(multiplier=1, min=2, max=30),
         reraise=True,
     )
-    def get_embedding(self, text: str) -> list[float]:
+    def get_embedding(self, text: str) -> np.ndarray:
         """
-        获取单条文本的 embedding 向量。
+        获取单条文本的 embedding 向量（float32 一维数组）。
 
         抛出:
             ValueError: 空文本
@@ -86,7 +192,11 @@ class EmbeddingClient:
                 model=self._settings.model,
                 dimensions=self._settings.dimensions,
             )
-            embedding = response.data[0].embedding
+            embedding = np.asarray(
+                response.data[0].embedding, dtype=np.float32,
+            )
+            # 缓存与调用方共享同一数组，置为只读防止被意外修改
+            embedding.flags.writeable = False
             usage = response.usage
             logger.info(
                 f"Embedding 完成 | tokens: {usage.total_tokens} | "
@@ -100,3 +210,103 @@ class EmbeddingClient:
             raise
         except Exception as e:
             raise EmbeddingError(f"Embedding API 调用失败: {e}") from e
+
+    def get_embeddings(
+        self, texts: list[str], return_exceptions: bool = False,
+    ) -> list[np.ndarray]:
+        """
+        批量获取 embedding，按长度排序后分块，每块一次 API 调用，多块并发。
+
+        结果顺序与输入一致；命中缓存的文本不再请求，重复文本只请求一次。
+        某块失败时二分重试，只有真正出错的单条文本失败；
+        return_exceptions=True 时失败项以 EmbeddingError 占位返回，否则抛出。
+
+        抛出:
+            ValueError: 存在空文本
+            EmbeddingError: API 调用失败（return_exceptions=False 时）
+        """
+        if any(not text or not text.strip() for text in texts):
+            raise ValueError("Embedding 输入文本不能为空")
+
+        cached = [self._cache_get(text) for text in texts]
+        missing = list(dict.fromkeys(
+            text for text, emb in zip(texts, cached) if emb is None
+        ))
+
+        chunks = plan_batches(missing, self._settings.batch_size)
+        if len(chunks) > 1:
+            # 多个分块并发请求，缓存写入留在当前线程
+            with ThreadPoolExecutor(
+                max_workers=min(INGEST_CONCURRENCY, len(chunks))
+            ) as executor:
+                chunk_results = list(executor.map(self._embed_split, chunks))
+        else:
+            chunk_results = [self._embed_split(chunk) for chunk in chunks]
+
+        fetched: dict[str, np.ndarray | EmbeddingError] = {}
+        for chunk, embeddings in zip(chunks, chunk_results):
+            for text, embedding in zip(chunk, embeddings):
+                if isinstance(embedding, EmbeddingError):
+                    if not return_exceptions:
+                        raise embedding
+                else:
+                    self._cache_put(text, embedding)
+                fetched[text] = embedding
+
+        return [
+            emb if emb is not None else fetched[text]
+            for text, emb in zip(texts, cached)
+        ]
+
+    def _embed_split(self, texts: list[str]) -> list[np.ndarray | EmbeddingError]:
+        """
+        请求一批 embedding；失败时对半拆分分别重试，单条仍失败则以异常占位。
+
+        只有非瞬时错误（如 400 输入非法、返回条数不符）才拆分定位出错条目；
+        限流/服务端/连接错误在 _embed_chunk 内已重试用尽，拆分只会放大请求量，
+        整批直接以异常占位。
+        """
+        try:
+            return self._embed_chunk(texts)
+        except EmbeddingError as e:
+            if len(texts) == 1 or _is_transient_api_error(e):
+                logger.error(f"Embedding 失败 | 条数: {len(texts)} | {e}")
+                return [e] * len(texts)
+            logger.warning(f"批量 Embedding 失败，拆分为两半重试 | 条数: {len(texts)}")
+        mid = len(texts) // 2
+        return self._embed_split(texts[:mid]) + self._embed_split(texts[mid:])
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=30),
+        retry=retry_if_exception(_is_transient_api_error),
+        reraise=True,
+    )
+    def _embed_chunk(self, texts: list[str]) -> list[np.ndarray]:
+        """单次 API 调用获取一批文本的 embedding，按 index 对齐输入顺序"""
+        try:
+            response = self.client.embeddings.create(
+                input=texts,
+                model=self._settings.model,
+                dimensions=self._settings.dimensions,
+            )
+        except Exception as e:
+            raise EmbeddingError(f"批量 Embedding API 调用失败: {e}") from e
+
+        data = sorted(response.data, key=lambda d: d.index)
+        if len(data) != len(texts):
+            raise EmbeddingError(
+                f"批量 Embedding 返回条数不符: 期望 {len(texts)}，实际 {len(data)}"
+            )
+
+        embeddings = []
+        for item in data:
+            embedding = np.asarray(item.embedding, dtype=np.float32)
+            embedding.flags.writeable = False
+            embeddings.append(embedding)
+
+        logger.info(
+            f"批量 Embedding 完成 | 条数: {len(texts)} | "
+            f"tokens: {response.usage.total_tokens}"
+        )
+        return embeddings
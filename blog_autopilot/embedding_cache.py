@@ -0,0 +1,49 @@
+"""Embedding 磁盘缓存 — 按文本 SHA256 持久化 float32 向量，跨进程/重启复用"""
+
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger("blog-autopilot")
+
+
+class EmbeddingDiskCache:
+    """
+    以 `<目录>/<hash 前两位>/<hash>.emb` 存储原始 float32 字节（与失败入库的 .emb 同格式）。
+
+    目录应按模型和维度区分，更换模型后旧向量不会被误用。
+    读写失败只记录日志，不影响 embedding 主流程。
+    """
+
+    def __init__(self, directory: str, dimensions: int) -> None:
+        self._directory = directory
+        self._dimensions = dimensions
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], f"{key}.emb")
+
+    def get(self, key: str) -> np.ndarray | None:
+        """读取缓存向量（只读数组），不存在或长度不符时返回 None"""
+        try:
+            embedding = np.fromfile(self._path(key), dtype=np.float32)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.debug(f"Embedding 磁盘缓存读取失败: {e}")
+            return None
+        if embedding.shape != (self._dimensions,):
+            return None
+        embedding.flags.writeable = False
+        return embedding
+
+    def put(self, key: str, embedding: np.ndarray) -> None:
+        """写入缓存（先写临时文件再原子替换，避免并发读到半截文件）"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.asarray(embedding, dtype=np.float32).tofile(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Embedding 磁盘缓存写入失败: {e}")
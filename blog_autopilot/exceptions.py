@@ -20,10 +20,18 @@ class AIResponseParseError(BlogAutoPilotError):
 class WordPressError(BlogAutoPilotError):
     """WordPress 发布失败"""
 
-    def __init__(self, message: str, status_code: int | None = None, retryable: bool = False):
+    def __init__(
+        self,
+        message: str,
+        status_code: int | None = None,
+        retryable: bool = False,
+        retry_after: float | None = None,
+    ):
         super().__init__(message)
         self.status_code = status_code
         self.retryable = retryable
+        # 服务器 Retry-After 头给出的等待秒数（429/503 时）
+        self.retry_after = retry_after
 
 
 class TelegramError(BlogAutoPilotError):
@@ -1,14 +1,63 @@
 """文本提取模块 — 支持 PDF / Markdown / TXT"""
 
+import hashlib
 import logging
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
 
 from pypdf import PdfReader
 
-from blog_autopilot.constants import MIN_EXTRACTED_TEXT_LENGTH
+from blog_autopilot.constants import (
+    MIN_EXTRACTED_TEXT_LENGTH,
+    MMAP_READ_THRESHOLD,
+    PDF_TEXT_CACHE_SIZE,
+)
 from blog_autopilot.exceptions import ExtractionError
 
 logger = logging.getLogger("blog-autopilot")
 
+# PDF 文本 LRU 缓存 {文件内容摘要: 文本}；流水线预取与批量入库会在多个线程中提取
+_pdf_text_cache: OrderedDict[bytes, str] = OrderedDict()
+_pdf_text_cache_lock = threading.Lock()
+
+
+def _parse_pdf_text(data: bytes) -> str:
+    """解析 PDF 字节的全部页面文本；相同内容的 PDF 直接返回缓存结果"""
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    with _pdf_text_cache_lock:
+        cached = _pdf_text_cache.get(digest)
+        if cached is not None:
+            _pdf_text_cache.move_to_end(digest)
+            logger.debug("PDF 内容未变化，复用已解析文本")
+            return cached
+
+    # strict=False 跳过冗余的结构校验（输入为可信来源）
+    reader = PdfReader(BytesIO(data), strict=False)
+    pages = []
+    for page in reader.pages:
+        text = page.extract_text()
+        if text:
+            pages.append(text + "\n")
+    content = "".join(pages)
+
+    with _pdf_text_cache_lock:
+        _pdf_text_cache[digest] = content
+        while len(_pdf_text_cache) > PDF_TEXT_CACHE_SIZE:
+            _pdf_text_cache.popitem(last=False)
+    return content
+
+
+def _read_text_mmap(filepath: str) -> str:
+    """通过 mmap 读取大文本文件，语义与 open(..., encoding="utf-8").read() 一致"""
+    with open(filepath, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[:].decode("utf-8")
+    # 文本模式默认开启通用换行符转换，这里保持一致
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
 
 def extract_text_from_file(filepath: str) -> str:
     """
@@ -21,16 +70,19 @@ def extract_text_from_file(filepath: str) -> str:
 
     try:
         if ext in ("md", "txt"):
-            with open(filepath, "r", encoding="utf-8") as f:
-                content = f.read()
+            if os.path.getsize(filepath) > MMAP_READ_THRESHOLD:
+                content = _read_text_mmap(filepath)
+            else:
+                with open(filepath, "r", encoding="utf-8") as f:
+                    content = f.read()
 
         elif ext == "pdf":
-            reader = PdfReader(filepath)
-            content = ""
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    content += text + "\n"
+            # 一次性读入内存后立即关闭文件，解析期间不占用文件描述符
+            with open(filepath, "rb") as f:
+                data = f.read()
+            if not data.startswith(b"%PDF"):
+                raise ExtractionError(f"不是有效的 PDF 文件: {filepath}")
+            content = _parse_pdf_text(data)
 
         else:
             raise ExtractionError(f"不支持的文件格式: .{ext}")
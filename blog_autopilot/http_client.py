@@ -0,0 +1,37 @@
+"""共享 HTTP 会话 — WordPress / Telegram 请求复用 keep-alive 连接池"""
+
+import base64
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from blog_autopilot.constants import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE
+
+
+def _build_session() -> requests.Session:
+    """创建挂载连接池适配器的 Session，同一主机的请求复用 TCP/TLS 连接"""
+    http = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+    )
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    return http
+
+
+# 进程级单例：所有模块共用，避免每次请求重新握手
+session = _build_session()
+
+
+def close_session() -> None:
+    """关闭连接池中的空闲连接（进程退出前调用；之后再发请求会按需重建连接）"""
+    session.close()
+
+
+@lru_cache(maxsize=8)
+def basic_auth(user: str, password: str) -> str:
+    """生成 Basic 认证头的值；同一凭据只编码一次"""
+    token = base64.b64encode(f"{user}:{password}".encode()).decode("utf-8")
+    return f"Basic {token}"
@@ -1,7 +1,11 @@
 """文章入库工作流 — 文本 → 标签提取 → Embedding → 存库"""
 
+import hashlib
 import logging
 import os
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 
 from blog_autopilot.ai_writer import AIWriter
 from blog_autopilot.config import Settings
@@ -14,21 +18,49 @@ from blog_autopilot.exceptions import (
     EmbeddingError,
     TagExtractionError,
 )
-from blog_autopilot.constants import CONTENT_EXCERPT_MAX_LENGTH
+from blog_autopilot.constants import (
+    CONTENT_EXCERPT_MAX_LENGTH,
+    INGEST_CONCURRENCY,
+    SUPPORTED_INGEST_EXTENSIONS,
+)
 from blog_autopilot.extractor import extract_text_from_file
 from blog_autopilot.models import ArticleRecord, IngestionResult, TagSet
 
 logger = logging.getLogger("blog-autopilot")
 
 
+def _content_hash(content: str) -> str:
+    """正文 SHA256，与流水线写入的 source_hash 口径一致"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _safe_extract(filepath: str) -> tuple[str, str | None, Exception | None]:
+    """提取文本，返回 (filepath, content, error)，异常不向上抛出"""
+    try:
+        return filepath, extract_text_from_file(filepath), None
+    except Exception as e:
+        return filepath, None, e
+
+
 class ArticleIngestor:
     """文章入库器，编排完整的入库流程"""
 
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
-        self._writer = AIWriter(settings.ai)
-        self._embedding = EmbeddingClient(settings.embedding)
-        self._db = Database(settings.database)
+
+    # 组件按需创建：只用到其中一部分的调用方不必初始化全部客户端
+
+    @cached_property
+    def _writer(self) -> AIWriter:
+        return AIWriter(self._settings.ai)
+
+    @cached_property
+    def _embedding(self) -> EmbeddingClient:
+        return EmbeddingClient(self._settings.embedding)
+
+    @cached_property
+    def _db(self) -> Database:
+        return Database(self._settings.database)
 
     @property
     def database(self) -> Database:
@@ -46,31 +78,21 @@ class ArticleIngestor:
         任一步骤失败时返回 IngestionResult(success=False)。
         """
         # URL 去重检查
-        if url:
-            try:
-                existing = self._db.get_article_by_url(url)
-                if existing:
-                    logger.info(f"文章已存在 (URL: {url}), 跳过入库")
-                    return IngestionResult(
-                        article_id=existing.id,
-                        title=existing.title,
-                        tags=existing.tags,
-                        success=True,
-                    )
-            except DatabaseError as e:
-                logger.warning(f"URL 去重检查失败: {e}")
+        existing = self._find_existing(url)
+        if existing is not None:
+            return existing
+
+        # 内容哈希去重：相同正文直接复用已有记录，跳过 AI 与 Embedding
+        source_hash = _content_hash(content)
+        existing = self._find_existing_by_hash(source_hash)
+        if existing is not None:
+            return existing
 
         # Step 1: 标签提取 + TG 推广文案
-        try:
-            tags, tg_promo, title = self._writer.extract_tags_and_promo(content)
-        except (AIAPIError, AIResponseParseError, TagExtractionError) as e:
-            logger.error(f"标签提取失败: {e}")
-            return IngestionResult(
-                article_id=article_id or "",
-                title="",
-                error=f"标签提取失败: {e}",
-                success=False,
-            )
+        prepared = self._prepare(content, article_id)
+        if isinstance(prepared, IngestionResult):
+            return prepared
+        tags, tg_promo, title = prepared
 
         # Step 2: Embedding
         try:
@@ -85,8 +107,217 @@ class ArticleIngestor:
                 success=False,
             )
 
-        # Step 3: 构建记录
-        record = ArticleRecord(
+        # Step 3-4: 构建记录并写入数据库
+        record = self._build_record(
+            content, url, article_id, tags, tg_promo, title, embedding,
+        )
+        return self._insert_one(record, source_hash)
+
+    def ingest_batch(
+        self,
+        contents: list[str],
+        urls: list[str | None] | None = None,
+    ) -> list[IngestionResult]:
+        """
+        批量入库，结果顺序与输入一致。
+
+        阶段 A 并发提取标签与推广文案（最多 INGEST_CONCURRENCY 篇在途）；
+        阶段 B 将所有推广文案合并为批量 Embedding 请求（按 embedding.batch_size
+        分块）；阶段 C 逐篇写库。
+        """
+        urls = urls or [None] * len(contents)
+        results: list[IngestionResult | None] = [None] * len(contents)
+
+        # URL 去重：一次查询取回所有已存在的 URL
+        existing_map = self._find_existing_bulk([u for u in urls if u])
+        todo: list[int] = []
+        for i, url in enumerate(urls):
+            existing = existing_map.get(url) if url else None
+            if existing is not None:
+                logger.info(f"文章已存在 (URL: {url}), 跳过入库")
+                results[i] = IngestionResult(
+                    article_id=existing.id,
+                    title=existing.title,
+                    tags=existing.tags,
+                    success=True,
+                )
+            else:
+                todo.append(i)
+
+        # 内容哈希去重：一次查询库内已有正文；批内重复正文只处理首篇
+        hashes = {i: _content_hash(contents[i]) for i in todo}
+        hash_map = self._find_existing_by_hashes(list(set(hashes.values())))
+        first_by_hash: dict[str, int] = {}
+        batch_duplicates: dict[int, int] = {}
+        unique_todo: list[int] = []
+        for i in todo:
+            h = hashes[i]
+            if h in hash_map:
+                results[i] = self._existing_result(hash_map[h])
+            elif h in first_by_hash:
+                batch_duplicates[i] = first_by_hash[h]
+            else:
+                first_by_hash[h] = i
+                unique_todo.append(i)
+        todo = unique_todo
+
+        # 阶段 A: 标签提取（LLM 调用为网络瓶颈，有界并发执行）
+        # 先在当前线程完成 writer 初始化，避免工作线程并发创建
+        _ = self._writer
+        with ThreadPoolExecutor(max_workers=INGEST_CONCURRENCY) as executor:
+            prepared = list(executor.map(
+                self._prepare, [contents[i] for i in todo],
+            ))
+
+        pending: list[tuple[int, TagSet, str, str]] = []
+        for i, item in zip(todo, prepared):
+            if isinstance(item, IngestionResult):
+                results[i] = item
+            else:
+                pending.append((i, *item))
+
+        # 阶段 B: 批量 Embedding
+        embeddings = self._embed_batch([promo for _, _, promo, _ in pending])
+
+        # 阶段 C: 构建记录并单事务批量写库
+        to_store: list[tuple[int, ArticleRecord]] = []
+        new_ids = iter(Database._generate_ids(
+            sum(1 for e in embeddings if not isinstance(e, Exception))
+        ))
+        for (i, tags, tg_promo, title), embedding in zip(pending, embeddings):
+            if isinstance(embedding, Exception):
+                results[i] = IngestionResult(
+                    article_id="",
+                    title="",
+                    tags=tags,
+                    error=f"Embedding 失败: {embedding}",
+                    success=False,
+                )
+                continue
+            to_store.append((i, self._build_record(
+                contents[i], urls[i], next(new_ids), tags, tg_promo, title,
+                embedding,
+            )))
+
+        stored = self._store_bulk(
+            [record for _, record in to_store],
+            [hashes[i] for i, _ in to_store],
+        )
+        for (i, _), result in zip(to_store, stored):
+            results[i] = result
+
+        for i, first in batch_duplicates.items():
+            results[i] = results[first]
+
+        return results
+
+    def _prepare(
+        self, content: str, article_id: str | None = None,
+    ) -> IngestionResult | tuple[TagSet, str, str]:
+        """标签提取 + TG 推广文案；失败时返回失败结果"""
+        try:
+            return self._writer.extract_tags_and_promo(content)
+        except (AIAPIError, AIResponseParseError, TagExtractionError) as e:
+            logger.error(f"标签提取失败: {e}")
+            return IngestionResult(
+                article_id=article_id or "",
+                title="",
+                error=f"标签提取失败: {e}",
+                success=False,
+            )
+
+    def _find_existing(self, url: str | None) -> IngestionResult | None:
+        """URL 去重检查，文章已存在时返回成功结果"""
+        if not url:
+            return None
+        try:
+            existing = self._db.get_article_by_url(url)
+            if existing:
+                logger.info(f"文章已存在 (URL: {url}), 跳过入库")
+                return IngestionResult(
+                    article_id=existing.id,
+                    title=existing.title,
+                    tags=existing.tags,
+                    success=True,
+                )
+        except DatabaseError as e:
+            logger.warning(f"URL 去重检查失败: {e}")
+        return None
+
+    def _find_existing_bulk(self, urls: list[str]) -> dict[str, ArticleRecord]:
+        """批量 URL 去重，查询失败时视为均不存在"""
+        if not urls:
+            return {}
+        try:
+            return self._db.get_articles_by_urls(urls)
+        except DatabaseError as e:
+            logger.warning(f"URL 批量去重检查失败: {e}")
+            return {}
+
+    def _find_existing_by_hash(self, source_hash: str) -> IngestionResult | None:
+        """内容哈希去重检查，正文已入库时返回成功结果"""
+        try:
+            row = self._db.find_duplicate_by_hash(source_hash)
+        except DatabaseError as e:
+            logger.warning(f"内容哈希去重检查失败: {e}")
+            return None
+        return self._existing_result(row) if row else None
+
+    def _find_existing_by_hashes(self, hashes: list[str]) -> dict[str, dict]:
+        """批量内容哈希去重，查询失败时视为均不存在"""
+        if not hashes:
+            return {}
+        try:
+            return self._db.find_duplicates_by_hashes(hashes)
+        except DatabaseError as e:
+            logger.warning(f"内容哈希批量去重检查失败: {e}")
+            return {}
+
+    @staticmethod
+    def _existing_result(row: dict) -> IngestionResult:
+        """由已入库记录 {id, title, url} 构造成功结果"""
+        logger.info(f"相同正文已入库 ({row['id']}), 跳过入库")
+        return IngestionResult(
+            article_id=row["id"],
+            title=row["title"],
+            success=True,
+        )
+
+    def _embed_batch(self, texts: list[str]) -> list:
+        """
+        批量 Embedding；失败批次由客户端二分重试，单条失败以异常对象占位。
+
+        空文本预先剔除并单独占位，不影响同批其他文本。
+        """
+        results: list = [None] * len(texts)
+        valid: list[int] = []
+        for i, text in enumerate(texts):
+            if text and text.strip():
+                valid.append(i)
+            else:
+                logger.error("Embedding 失败: 输入文本为空")
+                results[i] = ValueError("Embedding 输入文本不能为空")
+
+        if valid:
+            embeddings = self._embedding.get_embeddings(
+                [texts[i] for i in valid], return_exceptions=True,
+            )
+            for i, embedding in zip(valid, embeddings):
+                results[i] = embedding
+        return results
+
+    @staticmethod
+    def _build_record(
+        content: str,
+        url: str | None,
+        article_id: str | None,
+        tags: TagSet,
+        tg_promo: str,
+        title: str,
+        embedding,
+    ) -> ArticleRecord:
+        """构建待入库的 ArticleRecord"""
+        return ArticleRecord(
             id=article_id or Database._generate_id(),
             title=title,
             tags=tags,
@@ -96,15 +327,18 @@ class ArticleIngestor:
             content_excerpt=content[:CONTENT_EXCERPT_MAX_LENGTH],
         )
 
-        # Step 4: 写入数据库
+    def _insert_one(
+        self, record: ArticleRecord, source_hash: str | None = None,
+    ) -> IngestionResult:
+        """单条写库，失败时返回失败结果"""
         try:
-            saved_id = self._db.insert_article(record)
+            saved_id = self._db.insert_article(record, source_hash=source_hash)
         except DatabaseError as e:
             logger.error(f"数据库写入失败: {e}")
             return IngestionResult(
                 article_id=record.id,
                 title=record.title,
-                tags=tags,
+                tags=record.tags,
                 error=f"数据库写入失败: {e}",
                 success=False,
             )
@@ -113,58 +347,120 @@ class ArticleIngestor:
         return IngestionResult(
             article_id=saved_id,
             title=record.title,
-            tags=tags,
+            tags=record.tags,
             success=True,
         )
 
+    def _store_bulk(
+        self, records: list[ArticleRecord], source_hashes: list[str],
+    ) -> list[IngestionResult]:
+        """单事务批量写库；整批失败（如个别记录冲突）时退化为逐条写入"""
+        if not records:
+            return []
+        try:
+            saved_ids = self._db.insert_articles_bulk(records, source_hashes)
+        except DatabaseError as e:
+            logger.warning(f"批量写库失败，改为逐条写入: {e}")
+            return [
+                self._insert_one(record, source_hash)
+                for record, source_hash in zip(records, source_hashes)
+            ]
+
+        return [
+            IngestionResult(
+                article_id=saved_id,
+                title=record.title,
+                tags=record.tags,
+                success=True,
+            )
+            for saved_id, record in zip(saved_ids, records)
+        ]
+
     def ingest_from_directory(
         self, directory: str
     ) -> list[IngestionResult]:
         """
-        扫描目录下所有 .md / .txt / .pdf 文件并逐个入库。
+        扫描目录下所有 .md / .txt / .pdf 文件并批量入库，结束后打印汇总。
         """
-        supported_ext = {".md", ".txt", ".pdf"}
-        files = []
+        results = list(self.ingest_from_directory_stream(directory))
+        if not results:
+            return []
+
+        # 汇总（单次遍历统计成功数并收集失败项）
+        success_count = 0
+        failures: list[IngestionResult] = []
+        for r in results:
+            if r.success:
+                success_count += 1
+            else:
+                failures.append(r)
+        # 拼成一个字符串一次写出，避免逐行写 stdout 及多实例输出交错
+        lines = [
+            f"\n入库汇总: 共 {len(results)} 篇",
+            f"  成功: {success_count}",
+            f"  失败: {len(failures)}",
+        ]
+        lines.extend(f"  - {r.title or r.article_id}: {r.error}" for r in failures)
+        print("\n".join(lines))
 
-        for entry in sorted(os.listdir(directory)):
-            _, ext = os.path.splitext(entry)
-            if ext.lower() in supported_ext:
-                files.append(os.path.join(directory, entry))
+        return results
+
+    def ingest_from_directory_stream(
+        self, directory: str
+    ) -> Iterator[IngestionResult]:
+        """
+        流式入库：按 embedding.batch_size 个文件为一个窗口处理并逐条产出结果。
+
+        提取下一窗口文本的同时处理当前窗口，内存中最多保留两个窗口的正文，
+        峰值内存与目录大小无关。
+        """
+        with os.scandir(directory) as it:
+            files = sorted(
+                entry.path for entry in it
+                if entry.is_file()
+                and entry.name.lower().endswith(SUPPORTED_INGEST_EXTENSIONS)
+            )
 
         if not files:
             logger.info(f"目录 {directory} 中没有找到可入库的文件")
-            return []
+            return
 
         logger.info(f"在 {directory} 中找到 {len(files)} 个文件待入库")
 
-        results: list[IngestionResult] = []
-        for i, filepath in enumerate(files, 1):
-            filename = os.path.basename(filepath)
-            logger.info(f"[{i}/{len(files)}] 正在入库: {filename}")
-
-            try:
-                content = extract_text_from_file(filepath)
-            except Exception as e:
-                logger.error(f"文本提取失败 {filename}: {e}")
-                results.append(IngestionResult(
-                    article_id="",
-                    title=filename,
-                    error=f"文本提取失败: {e}",
-                    success=False,
-                ))
-                continue
+        window = self._settings.embedding.batch_size
+        windows = [files[i:i + window] for i in range(0, len(files), window)]
 
-            result = self.ingest_article(content=content)
-            results.append(result)
+        # 并行提取文本（PDF 解析 / 文件读取），预取下一窗口
+        with ThreadPoolExecutor(
+            max_workers=min(32, os.cpu_count() or 1, len(files))
+        ) as executor:
+            futures = [executor.submit(_safe_extract, f) for f in windows[0]]
+            for next_window in [*windows[1:], []]:
+                extracted = [future.result() for future in futures]
+                futures = [executor.submit(_safe_extract, f) for f in next_window]
+                yield from self._ingest_extracted(extracted)
 
-        # 汇总
-        success_count = sum(1 for r in results if r.success)
-        fail_count = len(results) - success_count
-        print(f"\n入库汇总: 共 {len(results)} 篇")
-        print(f"  成功: {success_count}")
-        print(f"  失败: {fail_count}")
-        for r in results:
-            if not r.success:
-                print(f"  - {r.title or r.article_id}: {r.error}")
+    def _ingest_extracted(
+        self, extracted: list[tuple[str, str | None, Exception | None]],
+    ) -> list[IngestionResult]:
+        """对一个窗口的提取结果执行批量入库，提取失败项原位返回失败结果"""
+        results: list[IngestionResult | None] = [None] * len(extracted)
+        contents: list[str] = []
+        content_slots: list[int] = []
+        for i, (filepath, content, err) in enumerate(extracted):
+            if content is not None:
+                contents.append(content)
+                content_slots.append(i)
+                continue
+            filename = os.path.basename(filepath)
+            logger.error(f"文本提取失败 {filename}: {err}")
+            results[i] = IngestionResult(
+                article_id="",
+                title=filename,
+                error=f"文本提取失败: {err}",
+                success=False,
+            )
 
+        for i, result in zip(content_slots, self.ingest_batch(contents)):
+            results[i] = result
         return results
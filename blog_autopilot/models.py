@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    import numpy as np
 
-@dataclass
+
+@dataclass(slots=True)
 class TokenUsage:
     """单次 API 调用的 token 用量"""
     prompt_tokens: int = 0
@@ -16,28 +21,43 @@ class TokenUsage:
     task: str = ""  # "writer" | "promo" | "tagger" | "reviewer" | "seo"
 
 
-@dataclass
+@dataclass(slots=True)
 class TokenUsageSummary:
     """流水线级别的 token 用量汇总"""
-    calls: list[TokenUsage]
-
-    def __init__(self):
-        self.calls = []
+    calls: list[TokenUsage] = field(default_factory=list)
+    # 增量累计，属性读取 O(1)
+    _sum_prompt: int = field(default=0, init=False, repr=False)
+    _sum_completion: int = field(default=0, init=False, repr=False)
+    _sum_total: int = field(default=0, init=False, repr=False)
+    # 流水线会在线程池中并发调用 AI，累加需加锁
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False,
+    )
+
+    def __post_init__(self) -> None:
+        for usage in self.calls:
+            self._sum_prompt += usage.prompt_tokens
+            self._sum_completion += usage.completion_tokens
+            self._sum_total += usage.total_tokens
 
     def add(self, usage: TokenUsage) -> None:
-        self.calls.append(usage)
+        with self._lock:
+            self._sum_prompt += usage.prompt_tokens
+            self._sum_completion += usage.completion_tokens
+            self._sum_total += usage.total_tokens
+            self.calls.append(usage)
 
     @property
     def total_prompt_tokens(self) -> int:
-        return sum(u.prompt_tokens for u in self.calls)
+        return self._sum_prompt
 
     @property
     def total_completion_tokens(self) -> int:
-        return sum(u.completion_tokens for u in self.calls)
+        return self._sum_completion
 
     @property
     def total_tokens(self) -> int:
-        return sum(u.total_tokens for u in self.calls)
+        return self._sum_total
 
     def summary_str(self) -> str:
         if not self.calls:
@@ -50,7 +70,7 @@ class TokenUsageSummary:
         )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CategoryMeta:
     """目录解析后的分类元数据"""
     category_name: str
@@ -60,7 +80,7 @@ class CategoryMeta:
     tg_bot_token: str | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FileTask:
     """待处理文件任务"""
     filepath: str
@@ -68,14 +88,14 @@ class FileTask:
     metadata: CategoryMeta
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ArticleResult:
     """AI 生成的文章结果"""
     title: str
     html_body: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SEOMetadata:
     """SEO 元数据"""
     meta_description: str  # 120-160 字符，用作 WordPress excerpt
@@ -83,7 +103,7 @@ class SEOMetadata:
     wp_tags: tuple[str, ...]  # WordPress 标签关键词
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class QualityIssue:
     """审核发现的单个问题"""
     category: str        # "consistency" | "readability" | "ai_cliche"
@@ -92,7 +112,7 @@ class QualityIssue:
     suggestion: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class QualityReview:
     """质量审核结果"""
     consistency_score: int     # 1-10
@@ -105,7 +125,7 @@ class QualityReview:
     summary: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PipelineResult:
     """单个文件的流水线处理结果"""
     filename: str
@@ -118,7 +138,7 @@ class PipelineResult:
 # ── 文章关联系统数据模型 ──
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TagSet:
     """四级标签集合"""
     tag_magazine: str
@@ -126,22 +146,27 @@ class TagSet:
     tag_topic: str
     tag_content: str
 
+    def as_tuple(self) -> tuple[str, str, str, str]:
+        """按 magazine / science / topic / content 顺序返回四级标签"""
+        return (self.tag_magazine, self.tag_science, self.tag_topic, self.tag_content)
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ArticleRecord:
     """数据库文章记录"""
     id: str
     title: str
     tags: TagSet
     tg_promo: str
-    embedding: list[float] | None = None
+    # float32 一维向量；不参与 __eq__（ndarray 比较结果无法取真值）
+    embedding: np.ndarray | None = field(default=None, compare=False)
     url: str | None = None
     created_at: datetime | None = None
     summary: str | None = None
     content_excerpt: str | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AssociationResult:
     """关联查询结果"""
     article: ArticleRecord
@@ -150,7 +175,7 @@ class AssociationResult:
     similarity: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class IngestionResult:
     """入库处理结果"""
     article_id: str
@@ -163,7 +188,7 @@ class IngestionResult:
 # ── 智能选题推荐数据模型 ──
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ContentGap:
     """内容缺口"""
     gap_type: str          # "tag_gap" | "vector_gap" | "merged"
@@ -173,7 +198,7 @@ class ContentGap:
     reference_title: str | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TopicRecommendation:
     """主题推荐结果"""
     topic: str
@@ -186,7 +211,7 @@ class TopicRecommendation:
 # ── 文章系列数据模型 ──
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SeriesRecord:
     """数据库系列记录"""
     id: str
@@ -197,7 +222,7 @@ class SeriesRecord:
     created_at: datetime | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SeriesInfo:
     """文章系列信息"""
     series_id: str
@@ -205,12 +230,14 @@ class SeriesInfo:
     order: int                          # 本文在系列中的位置 (1-based)
     total: int                          # 系列当前总篇数
     prev_article: ArticleRecord | None  # 上一篇
+    prev_prev_article: ArticleRecord | None = None  # 上上篇（回溯更新上一篇导航用）
+    prev_wp_post_id: int | None = None  # 上一篇的 WordPress post ID
 
 
 # ── 标签治理审计数据模型 ──
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TagStats:
     """单个标签的频率统计"""
     tag: str
@@ -218,7 +245,7 @@ class TagStats:
     count: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CooccurrencePair:
     """标签共现对"""
     tag_a: str
@@ -226,7 +253,7 @@ class CooccurrencePair:
     co_count: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SynonymSuggestion:
     """同义词合并建议"""
     canonical: str       # 建议的标准标签（频率更高的）
@@ -236,7 +263,7 @@ class SynonymSuggestion:
     already_mapped: bool = False  # 是否已在 tag_synonyms.json 中
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TagAuditReport:
     """标签治理审计报告"""
     article_count: int
@@ -250,7 +277,7 @@ class TagAuditReport:
 # ── 综述文章数据模型 ──
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SurveyResult:
     """综述文章生成结果"""
     title: str
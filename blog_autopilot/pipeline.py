@@ -1,18 +1,28 @@
 """主流水线模块 — Pipeline 类"""
 
+import errno
 import fcntl
 import hashlib
 import json
 import logging
 import os
 import shutil
+import signal
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import numpy as np
 
 from blog_autopilot.ai_writer import AIWriter
 from blog_autopilot.config import Settings
 from blog_autopilot.constants import (
+    CATEGORY_QUALITY_THRESHOLDS,
     CONTENT_EXCERPT_MAX_LENGTH,
     DUPLICATE_SIMILARITY_THRESHOLD,
+    PIPELINE_EXTRACT_WORKERS,
+    PIPELINE_IO_WORKERS,
     POLL_INTERVAL,
     QUALITY_MAX_REWRITE_ATTEMPTS,
     SURVEY_CHECK_INTERVAL,
@@ -31,7 +41,14 @@ from blog_autopilot.exceptions import (
     WordPressError,
 )
 from blog_autopilot.extractor import extract_text_from_file
-from blog_autopilot.models import FileTask, PipelineResult
+from blog_autopilot.http_client import close_session
+from blog_autopilot.models import (
+    ArticleRecord,
+    ArticleResult,
+    FileTask,
+    PipelineResult,
+    TagSet,
+)
 from blog_autopilot.publisher import (
     PublishResult,
     ensure_wp_tags,
@@ -40,8 +57,15 @@ from blog_autopilot.publisher import (
     test_wp_connection,
     update_wp_post_content,
 )
-from blog_autopilot.scanner import scan_input_directory
+from blog_autopilot.scanner import _load_categories_config, scan_input_directory
+from blog_autopilot.series import (
+    build_backfill_navigation,
+    detect_series,
+    inject_series_navigation,
+    replace_series_navigation,
+)
 from blog_autopilot.telegram import send_to_telegram, test_tg_connection
+from blog_autopilot.watcher import InputWatcher
 
 logger = logging.getLogger("blog-autopilot")
 
@@ -52,6 +76,36 @@ class Pipeline:
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
         self._writer = AIWriter(settings.ai)
+        # 单文件内互不依赖的网络请求并发执行（数据库连接池非线程安全，不放入）
+        self._executor = ThreadPoolExecutor(
+            max_workers=PIPELINE_IO_WORKERS, thread_name_prefix="pipeline-io",
+        )
+        # 草稿 / 失败记录落盘放到单线程后台执行，不阻塞下一个文件的网络请求；
+        # 单线程保证写入按提交顺序完成
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="io",
+        )
+        # 窗口内文件的文本提取提前提交到独立线程池（不与单文件网络请求抢线程），
+        # 处理到该文件时直接取结果；{filepath: Future[str]}
+        self._extract_executor = ThreadPoolExecutor(
+            max_workers=PIPELINE_EXTRACT_WORKERS, thread_name_prefix="extract",
+        )
+        self._text_futures: dict[str, Future] = {}
+        # 置位后主循环在当前轮次结束时退出（stop() / SIGTERM）
+        self._stop_event = threading.Event()
+        # 持续监控模式下的 input 目录监听器；上一轮扫描是否发现了文件
+        self._watcher: InputWatcher | None = None
+        self._input_pending = True
+        # 当前预筛窗口内已入库文章的 (标题, 归一化 embedding)，
+        # 预筛时的批量去重看不到它们，逐个处理时补查
+        self._window_ingested: list[tuple[str, np.ndarray]] = []
+        # 归档子目录的文件名缓存 {目录: (目录 mtime_ns, 文件名集合)}，跨轮次复用；
+        # 目录 mtime 变化（外部增删文件）时重新列目录
+        self._archived_names: dict[str, tuple[int, set[str]]] = {}
+        # 已确保存在的分类 input 子目录
+        self._ensured_category_dirs: set[str] = set()
+        # 上次据以创建子目录的分类配置（scanner 的共享缓存对象，未变化时直接跳过）
+        self._ensured_categories_config: dict | None = None
         # 封面图生成器（可选）
         self._cover_image_generator = None
         if settings.ai.cover_image_enabled:
@@ -100,13 +154,24 @@ class Pipeline:
             and self._embedding_client is not None
         )
 
-    def process_file(self, task: FileTask) -> PipelineResult:
-        """处理单个文件的完整流水线"""
+    def process_file(
+        self, task: FileTask, prescreen: tuple | None = None,
+    ) -> PipelineResult:
+        """处理单个文件的完整流水线
+
+        prescreen: scan_and_process 预先批量算好的
+            (tags, tg_promo, title, embedding, duplicate)，提供时跳过对应的
+            AI/embedding 调用和全库去重查询
+        """
         # 文件锁：防止多进程同时处理同一文件
+        # 只为持锁打开原始 fd，不构造带缓冲区的文件对象；CLOEXEC 避免子进程继承
+        lock_fd = None
         try:
-            lock_fd = open(task.filepath, "r")
+            lock_fd = os.open(task.filepath, os.O_RDONLY | os.O_CLOEXEC)
             fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
-        except (IOError, OSError):
+        except OSError:
+            if lock_fd is not None:
+                os.close(lock_fd)
             logger.info(f"跳过 {task.filename}: 文件正被其他进程处理")
             return PipelineResult(
                 filename=task.filename, success=False,
@@ -114,12 +179,14 @@ class Pipeline:
             )
 
         try:
-            return self._process_file_impl(task)
+            return self._process_file_impl(task, prescreen)
         finally:
             fcntl.flock(lock_fd, fcntl.LOCK_UN)
-            lock_fd.close()
+            os.close(lock_fd)
 
-    def _process_file_impl(self, task: FileTask) -> PipelineResult:
+    def _process_file_impl(
+        self, task: FileTask, prescreen: tuple | None = None,
+    ) -> PipelineResult:
         """处理单个文件的实际逻辑（已持有文件锁）"""
         self._writer.reset_usage()
         meta = task.metadata
@@ -132,9 +199,9 @@ class Pipeline:
         logger.info(f"Hashtag: {meta.hashtag}")
         logger.info(f"{'='*50}")
 
-        # ① 提取文本
+        # ① 提取文本（已预取时直接取结果）
         try:
-            raw_text = extract_text_from_file(task.filepath)
+            raw_text = self._read_text(task)
         except ExtractionError as e:
             logger.warning(f"跳过 {task.filename}: {e}")
             return PipelineResult(
@@ -164,17 +231,35 @@ class Pipeline:
         pre_title = None
         if self._association_enabled:
             try:
-                pre_tags, pre_tg_promo, pre_title = self._writer.extract_tags_and_promo(
-                    raw_text
-                )
-                pre_embedding = self._embedding_client.get_embedding(
-                    pre_tg_promo
-                )
+                embedding_future = None
+                dup = None
+                if prescreen is not None:
+                    (pre_tags, pre_tg_promo, pre_title,
+                     pre_embedding, dup) = prescreen
+                else:
+                    pre_tags, pre_tg_promo, pre_title = (
+                        self._writer.extract_tags_and_promo(raw_text)
+                    )
+                    # embedding 请求与标题查重并发：API 往返期间主线程查库
+                    embedding_future = self._executor.submit(
+                        self._embedding_client.get_embedding, pre_tg_promo,
+                    )
+                dup_title = None
+                if pre_title:
+                    dup_title = self._database.find_similar_titles(
+                        pre_title, pre_tags,
+                    )
+                if embedding_future is not None:
+                    pre_embedding = embedding_future.result()
 
                 # Level 2 去重：embedding 相似度检查
-                dup = self._database.find_duplicate(
-                    pre_embedding, DUPLICATE_SIMILARITY_THRESHOLD
-                )
+                # （预筛过的文件已批量查过全库，只需补查本窗口新入库的文章）
+                if prescreen is not None:
+                    dup = dup or self._find_window_duplicate(pre_embedding)
+                else:
+                    dup = self._database.find_duplicate(
+                        pre_embedding, DUPLICATE_SIMILARITY_THRESHOLD
+                    )
                 if dup:
                     logger.info(
                         f"跳过重复内容: {task.filename} "
@@ -187,15 +272,11 @@ class Pipeline:
                     )
 
                 # Level 3 去重：标题 + 标签完全匹配（仅警告，不阻断）
-                if pre_title:
-                    dup_title = self._database.find_similar_titles(
-                        pre_title, pre_tags,
+                if dup_title:
+                    logger.warning(
+                        f"疑似重复: {task.filename} 标题和标签与"
+                        f"《{dup_title['title']}》完全匹配，继续处理"
                     )
-                    if dup_title:
-                        logger.warning(
-                            f"疑似重复: {task.filename} 标题和标签与"
-                            f"《{dup_title['title']}》完全匹配，继续处理"
-                        )
 
                 associations = self._database.find_related_articles(
                     tags=pre_tags,
@@ -210,7 +291,7 @@ class Pipeline:
                 associations = None
 
         # ②.3 标签一致性检查 + AI 自动修正
-        if self._association_enabled and pre_tags and pre_embedding:
+        if self._association_enabled and pre_tags and pre_embedding is not None:
             try:
                 from blog_autopilot.tag_governance import compute_tag_consistency
                 score, neighbor_tags = compute_tag_consistency(
@@ -234,9 +315,8 @@ class Pipeline:
 
         # ②.5 系列检测（如果数据库可用）
         series_info = None
-        if self._association_enabled and pre_tags and pre_embedding:
+        if self._association_enabled and pre_tags and pre_embedding is not None:
             try:
-                from blog_autopilot.series import detect_series
                 series_info = detect_series(
                     self._database, pre_tags, pre_embedding,
                     pre_title or "",
@@ -307,13 +387,14 @@ class Pipeline:
         # ③.2 质量审核（失败不阻断发布）
         if self._settings.ai.quality_review_enabled:
             try:
-                # 获取分类专属质量阈值
-                from blog_autopilot.constants import CATEGORY_QUALITY_THRESHOLDS
-                cat_thresholds = CATEGORY_QUALITY_THRESHOLDS.get(meta.category_name)
+                # 获取分类专属质量阈值（未配置时为 None，使用默认值），重写循环复用
+                pass_threshold, rewrite_threshold = CATEGORY_QUALITY_THRESHOLDS.get(
+                    meta.category_name, (None, None),
+                )
                 review = self._writer.review_quality(
                     article.title, article.html_body, raw_text,
-                    pass_threshold=cat_thresholds[0] if cat_thresholds else None,
-                    rewrite_threshold=cat_thresholds[1] if cat_thresholds else None,
+                    pass_threshold=pass_threshold,
+                    rewrite_threshold=rewrite_threshold,
                     calibration_context=calibration_ctx + cliche_ctx,
                 )
                 # 审核结果入库
@@ -346,8 +427,8 @@ class Pipeline:
                     previous_review = review
                     review = self._writer.review_quality(
                         article.title, article.html_body, raw_text,
-                        pass_threshold=cat_thresholds[0] if cat_thresholds else None,
-                        rewrite_threshold=cat_thresholds[1] if cat_thresholds else None,
+                        pass_threshold=pass_threshold,
+                        rewrite_threshold=rewrite_threshold,
                         calibration_context=calibration_ctx + cliche_ctx,
                     )
                     # 审核结果入库
@@ -374,16 +455,35 @@ class Pipeline:
             except (AIAPIError, AIResponseParseError, QualityReviewError) as e:
                 logger.warning(f"质量审核失败（不影响发布）: {e}")
 
-        # ③.5 SEO 元数据提取（失败不阻断发布）
+        # ③.5 SEO 元数据提取与 ③.8 封面图生成互不依赖，并发请求
+        seo_future = self._executor.submit(
+            self._writer.extract_seo_metadata,
+            article.title, article.html_body,
+        )
+        cover_future = None
+        if self._cover_image_generator:
+            cover_future = self._executor.submit(
+                self._cover_image_generator.generate_image,
+                article.title, article.html_body,
+                category_name=meta.category_name,
+            )
+
+        # SEO 结果（失败不阻断发布）
         seo = None
         wp_tag_ids = None
         try:
-            seo = self._writer.extract_seo_metadata(
-                article.title, article.html_body
-            )
+            seo = seo_future.result()
         except (AIAPIError, AIResponseParseError, SEOExtractionError) as e:
             logger.warning(f"SEO 提取失败（不影响发布）: {e}")
 
+        # ③.8 封面图上传只依赖 SEO slug，放到线程池与 ③.6 标签创建并发
+        upload_future = None
+        if cover_future is not None:
+            slug = seo.slug if seo else task.filename.rsplit(".", 1)[0]
+            upload_future = self._executor.submit(
+                self._upload_cover, cover_future, f"cover-{slug}.png",
+            )
+
         # ③.6 WordPress 标签创建（失败不阻断发布）
         try:
             all_wp_names = list(seo.wp_tags) if seo and seo.wp_tags else []
@@ -399,36 +499,17 @@ class Pipeline:
         except Exception as e:
             logger.warning(f"WordPress 标签创建失败（不影响发布）: {e}")
 
-        # ③.8 封面图生成+上传（失败不阻断发布）
-        featured_media_id = None
-        if self._cover_image_generator:
-            try:
-                from blog_autopilot.cover_image import upload_media_to_wordpress
-
-                image_data = self._cover_image_generator.generate_image(
-                    article.title, article.html_body,
-                    category_name=meta.category_name,
-                )
-                slug = seo.slug if seo else task.filename.rsplit(".", 1)[0]
-                featured_media_id = upload_media_to_wordpress(
-                    image_data,
-                    f"cover-{slug}.png",
-                    self._settings.wp,
-                )
-            except CoverImageError as e:
-                logger.warning(f"封面图生成/上传失败（不影响发布）: {e}")
-            except Exception as e:
-                logger.warning(f"封面图步骤异常（不影响发布）: {e}")
+        featured_media_id = upload_future.result() if upload_future else None
 
         # ③.9 注入系列导航（如果检测到系列）
         if series_info:
             try:
-                from blog_autopilot.series import inject_series_navigation
-                from blog_autopilot.models import ArticleResult as _AR
                 html_with_nav = inject_series_navigation(
                     article.html_body, series_info,
                 )
-                article = _AR(title=article.title, html_body=html_with_nav)
+                article = ArticleResult(
+                    title=article.title, html_body=html_with_nav,
+                )
                 logger.info(
                     f"已注入系列导航: 《{series_info.series_title}》"
                     f"第 {series_info.order}/{series_info.total} 篇"
@@ -436,6 +517,11 @@ class Pipeline:
             except Exception as e:
                 logger.warning(f"系列导航注入失败（不影响发布）: {e}")
 
+        # ⑥ 的推广文案只依赖文章内容，与 ④ 发布并发生成，发布后再填入链接推送
+        promo_text_future = self._executor.submit(
+            self._generate_promo_text, article, meta,
+        )
+
         # ④ 发布到 WordPress
         try:
             publish_result = post_to_wordpress(
@@ -453,6 +539,9 @@ class Pipeline:
         except WordPressError as e:
             logger.error(f"{task.filename}: WordPress 发布失败 - {e}")
             self._save_draft(task.filename, article.title, article.html_body)
+            # 已开始的推广文案请求等其结束，避免其 token 用量计入下一个文件
+            if not promo_text_future.cancel():
+                wait([promo_text_future])
             return PipelineResult(
                 filename=task.filename,
                 success=False,
@@ -460,70 +549,37 @@ class Pipeline:
                 error=str(e),
             )
 
+        # 发布后的纯网络步骤（推广文案 + Telegram、回溯上一篇导航）不访问数据库，
+        # 放到线程池与入库（摘要生成 + 写库）并发，返回前汇合
+        promo_future = self._executor.submit(
+            self._send_promo, promo_text_future, blog_link, meta,
+        )
+        backfill_future = None
         # ④.5 回溯更新上一篇文章的系列导航
         if series_info and series_info.prev_article:
-            try:
-                from blog_autopilot.series import (
-                    build_backfill_navigation,
-                    replace_series_navigation,
-                )
-                prev_wp_id = self._database.get_wp_post_id(
-                    series_info.prev_article.id,
-                )
-                if prev_wp_id:
-                    old_content = get_wp_post_content(
-                        prev_wp_id, self._settings.wp,
-                    )
-                    if old_content:
-                        # 上一篇的 prev_article
-                        prev_of_prev = None
-                        if series_info.order > 2:
-                            members = self._database.get_series_articles(
-                                series_info.series_id,
-                            )
-                            for i, m in enumerate(members):
-                                if m.id == series_info.prev_article.id and i > 0:
-                                    prev_of_prev = members[i - 1]
-                                    break
-
-                        new_nav = build_backfill_navigation(
-                            series_title=series_info.series_title,
-                            order=series_info.order - 1,
-                            total=series_info.total,
-                            prev_article=prev_of_prev,
-                            next_article_title=article.title,
-                            next_article_url=blog_link,
-                        )
-                        updated_content = replace_series_navigation(
-                            old_content, new_nav,
-                        )
-                        update_wp_post_content(
-                            prev_wp_id, updated_content, self._settings.wp,
-                        )
-                        logger.info(
-                            f"已回溯更新上一篇导航 (post_id={prev_wp_id})"
-                        )
-            except Exception as e:
-                logger.warning(f"回溯更新导航失败（不影响发布）: {e}")
+            backfill_future = self._executor.submit(
+                self._backfill_series_navigation,
+                series_info, article.title, blog_link,
+            )
 
         # ⑤ 新文章入库（如果数据库可用）
         if self._association_enabled and self._ingestor:
             try:
-                from blog_autopilot.models import ArticleRecord
                 from blog_autopilot.db import Database
 
                 tags = pre_tags
+                tg_promo = pre_tg_promo
                 embedding = pre_embedding
-                # 如果之前关联查询失败或 embedding 缺失，重新提取
-                if tags is None or embedding is None:
+                # 标签提取从未成功时才重新调用 AI；仅 embedding 缺失时只补请求 embedding
+                if tags is None or not tg_promo:
                     tags, tg_promo, _ = self._writer.extract_tags_and_promo(
                         article.html_body
                     )
+                    embedding = None
+                if embedding is None:
                     embedding = self._embedding_client.get_embedding(
                         tg_promo
                     )
-                else:
-                    tg_promo = pre_tg_promo
 
                 # 生成结构化摘要（失败不阻断入库）
                 summary = None
@@ -551,6 +607,9 @@ class Pipeline:
                     wp_post_id=wp_post_id,
                     source_hash=source_hash,
                 )
+                self._window_ingested.append(
+                    (article.title, self._unit_vector(embedding)),
+                )
                 logger.info(f"新文章已入库: {article.title}")
             except Exception as e:
                 logger.warning(f"文章入库失败（不影响发布）: {e}")
@@ -562,15 +621,66 @@ class Pipeline:
                     content_excerpt=raw_text[:CONTENT_EXCERPT_MAX_LENGTH],
                 )
 
-        # ⑥ 推广
+        # ⑥ 推广（已在后台执行，这里等待完成）
+        promo_future.result()
+        if backfill_future is not None:
+            backfill_future.result()
+
+        logger.info(f"{task.filename} 处理完成! -> {blog_link}")
+        # Token 用量汇总
+        logger.info(self._writer.usage_summary.summary_str())
+        return PipelineResult(
+            filename=task.filename,
+            success=True,
+            title=article.title,
+            blog_link=blog_link,
+        )
+
+    def _backfill_series_navigation(
+        self, series_info, next_title: str, next_url: str,
+    ) -> None:
+        """回溯更新上一篇文章的系列导航，补上指向新文章的下一篇链接（失败只记日志）"""
+        try:
+            # post ID 与上上篇在系列检测时已随成员列表取回，无需再查库
+            prev_wp_id = series_info.prev_wp_post_id
+            if prev_wp_id:
+                old_content = get_wp_post_content(
+                    prev_wp_id, self._settings.wp,
+                )
+                if old_content:
+                    new_nav = build_backfill_navigation(
+                        series_title=series_info.series_title,
+                        order=series_info.order - 1,
+                        total=series_info.total,
+                        prev_article=series_info.prev_prev_article,
+                        next_article_title=next_title,
+                        next_article_url=next_url,
+                    )
+                    updated_content = replace_series_navigation(
+                        old_content, new_nav,
+                    )
+                    update_wp_post_content(
+                        prev_wp_id, updated_content, self._settings.wp,
+                    )
+                    logger.info(
+                        f"已回溯更新上一篇导航 (post_id={prev_wp_id})"
+                    )
+        except Exception as e:
+            logger.warning(f"回溯更新导航失败（不影响发布）: {e}")
+
+    def _generate_promo_text(self, article, meta) -> str:
+        """生成推广文案（失败回退简单通知）"""
         try:
-            promo_text = self._writer.generate_promo(
+            return self._writer.generate_promo(
                 article.title, article.html_body, hashtag=meta.hashtag
             )
         except (AIAPIError, AIResponseParseError) as e:
             logger.warning(f"推广文案生成失败，回退简单通知: {e}")
-            promo_text = f"{meta.hashtag}\n\n📖 {article.title}"
+            return f"{meta.hashtag}\n\n📖 {article.title}"
 
+    def _send_promo(self, promo_text_future: Future, blog_link: str, meta) -> None:
+        """等待推广文案生成完成，附上文章链接推送到 Telegram（失败只记日志）"""
+        promo_text = promo_text_future.result()
         try:
             send_to_telegram(
                 promo_text, blog_link, self._settings.tg,
@@ -579,26 +689,55 @@ class Pipeline:
         except TelegramError as e:
             logger.warning(f"Telegram 推送失败（文章已发布）: {e}")
 
-        logger.info(f"{task.filename} 处理完成! -> {blog_link}")
-        # Token 用量汇总
-        logger.info(self._writer.usage_summary.summary_str())
-        return PipelineResult(
-            filename=task.filename,
-            success=True,
-            title=article.title,
-            blog_link=blog_link,
-        )
+    def _upload_cover(self, cover_future: Future, filename: str) -> int | None:
+        """等待封面图生成完成并上传到媒体库，返回 media_id（失败不阻断发布，返回 None）"""
+        try:
+            from blog_autopilot.cover_image import upload_media_to_wordpress
+
+            return upload_media_to_wordpress(
+                cover_future.result(), filename, self._settings.wp,
+            )
+        except CoverImageError as e:
+            logger.warning(f"封面图生成/上传失败（不影响发布）: {e}")
+        except Exception as e:
+            logger.warning(f"封面图步骤异常（不影响发布）: {e}")
+        return None
+
+    def close(self) -> None:
+        """等待后台落盘任务完成，释放线程池和 HTTP 连接"""
+        self._io_executor.shutdown(wait=True)
+        self._executor.shutdown(wait=True)
+        self._extract_executor.shutdown(wait=True, cancel_futures=True)
+        self._text_futures.clear()
+        close_session()
 
     def _save_draft(self, filename: str, title: str, html: str) -> None:
-        """发布失败时，把草稿保存到本地"""
+        """发布失败时，把草稿保存到本地（后台线程写入）"""
         draft_dir = self._settings.paths.drafts_folder
-        os.makedirs(draft_dir, exist_ok=True)
         draft_path = os.path.join(draft_dir, f"{filename}.html")
 
-        with open(draft_path, "w", encoding="utf-8") as f:
-            f.write(f"<!-- 标题: {title} -->\n{html}")
+        def write() -> None:
+            try:
+                data = f"<!-- 标题: {title} -->\n{html}".encode("utf-8")
+                # 同名草稿内容未变时不重写（大小不同即可判定，相同时再比对内容）
+                try:
+                    if os.path.getsize(draft_path) == len(data):
+                        with open(draft_path, "rb") as f:
+                            if f.read() == data:
+                                logger.info(f"草稿未变化，跳过写入: {draft_path}")
+                                return
+                except FileNotFoundError:
+                    os.makedirs(draft_dir, exist_ok=True)
+                # 先写临时文件再原子替换，崩溃时不会留下半截草稿
+                tmp_path = f"{draft_path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, draft_path)
+                logger.info(f"草稿已保存到: {draft_path}")
+            except Exception as e:
+                logger.error(f"草稿保存失败: {e}")
 
-        logger.info(f"草稿已保存到: {draft_path}")
+        self._io_executor.submit(write)
 
     def _save_failed_ingest(
         self,
@@ -643,62 +782,141 @@ class Pipeline:
             record["summary"] = summary
         if content_excerpt:
             record["content_excerpt"] = content_excerpt
-        # embedding 太大不存 JSON，重试时重新生成
+        # embedding 不存 JSON，以 float32 字节另存 .emb 文件，重试时免去重新生成
 
-        filename = hashlib.md5(title.encode()).hexdigest()[:12] + ".json"
+        filename = hashlib.blake2b(
+            title.encode("utf-8"), digest_size=6,
+        ).hexdigest() + ".json"
         filepath = os.path.join(failed_dir, filename)
 
+        def write() -> None:
+            try:
+                # dumps 且不缩进才会走 C 编码器，并一次写入（json.dump 逐块写、走纯 Python 路径）
+                with open(filepath, "w", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False))
+                if embedding is not None:
+                    from blog_autopilot.embedding import pack_embedding
+
+                    with open(self._embedding_sidecar(filepath), "wb") as f:
+                        f.write(pack_embedding(embedding))
+                logger.info(f"入库失败记录已保存: {filepath}")
+            except Exception as save_err:
+                logger.error(f"保存入库失败记录也失败了: {save_err}")
+
+        # 后台写入；record 在提交后不再修改
+        self._io_executor.submit(write)
+
+    @staticmethod
+    def _embedding_sidecar(record_path: str) -> str:
+        """入库失败记录对应的 embedding 字节文件路径"""
+        return os.path.splitext(record_path)[0] + ".emb"
+
+    def _remove_failed_ingest(self, record_path: str) -> None:
+        """删除入库失败记录及其 embedding 文件"""
+        os.remove(record_path)
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(record, f, ensure_ascii=False, indent=2)
-            logger.info(f"入库失败记录已保存: {filepath}")
-        except Exception as save_err:
-            logger.error(f"保存入库失败记录也失败了: {save_err}")
+            os.remove(self._embedding_sidecar(record_path))
+        except FileNotFoundError:
+            pass
+
+    def _read_failed_embedding(self, record_path: str):
+        """读取保存的 embedding，缺失或维度不符时返回 None（由调用方重新生成）"""
+        from blog_autopilot.embedding import unpack_embedding
+
+        sidecar = self._embedding_sidecar(record_path)
+        try:
+            with open(sidecar, "rb") as f:
+                embedding = unpack_embedding(f.read())
+        except FileNotFoundError:
+            return None
+        if embedding.shape[0] == self._settings.embedding.dimensions:
+            return embedding
+        logger.warning(f"embedding 文件维度不符，重新生成: {sidecar}")
+        return None
 
     def retry_failed_ingests(self) -> int:
-        """重试之前入库失败的记录"""
+        """重试之前入库失败的记录
+
+        先读取全部记录，缺少 embedding 的合并为一次批量请求，再逐条入库。
+        """
         failed_dir = os.path.join(
             os.path.dirname(self._settings.paths.drafts_folder),
             "failed_ingests",
         )
-        if not os.path.isdir(failed_dir):
+        if not self._association_enabled or not self._ingestor:
             return 0
 
-        if not self._association_enabled or not self._ingestor:
+        try:
+            with os.scandir(failed_dir) as entries:
+                record_entries = [
+                    entry for entry in entries if entry.name.endswith(".json")
+                ]
+        except (FileNotFoundError, NotADirectoryError):
             return 0
 
-        retried = 0
-        for fname in os.listdir(failed_dir):
-            if not fname.endswith(".json"):
-                continue
-            fpath = os.path.join(failed_dir, fname)
+        # 第一遍：解析记录并读取已保存的 embedding
+        loaded = []
+        for entry in record_entries:
+            fname, fpath = entry.name, entry.path
             try:
                 with open(fpath, encoding="utf-8") as f:
                     record = json.load(f)
             except (json.JSONDecodeError, UnicodeDecodeError) as e:
                 logger.warning(f"入库重试文件损坏，已删除 ({fname}): {e}")
-                os.remove(fpath)
+                self._remove_failed_ingest(fpath)
+                continue
+
+            tags_data = record.get("tags")
+            if not tags_data:
+                logger.warning(f"入库重试记录缺少标签，已删除 ({fname})")
+                self._remove_failed_ingest(fpath)
                 continue
 
             try:
-                from blog_autopilot.models import ArticleRecord, TagSet
-                from blog_autopilot.db import Database
+                embedding = self._read_failed_embedding(fpath)
+            except Exception as e:
+                logger.warning(f"入库重试失败 ({fname}): {e}")
+                continue
+            loaded.append((fname, fpath, record, embedding))
 
-                tags_data = record.get("tags")
-                if not tags_data:
-                    logger.warning(f"入库重试记录缺少标签，已删除 ({fname})")
-                    os.remove(fpath)
-                    continue
+        # 缺少 embedding 的记录一次批量请求（推广文案为空的无法生成，单独记失败）
+        missing = []
+        for i, (fname, fpath, record, embedding) in enumerate(loaded):
+            if embedding is not None:
+                continue
+            if record.get("tg_promo", "").strip():
+                missing.append(i)
+            else:
+                loaded[i] = (
+                    fname, fpath, record,
+                    ValueError("Embedding 输入文本不能为空"),
+                )
+        if missing:
+            try:
+                fetched = self._embedding_client.get_embeddings(
+                    [loaded[i][2].get("tg_promo", "") for i in missing],
+                    return_exceptions=True,
+                )
+            except Exception as e:
+                fetched = [e] * len(missing)
+            for i, embedding in zip(missing, fetched):
+                fname, fpath, record, _ = loaded[i]
+                loaded[i] = (fname, fpath, record, embedding)
+
+        # 第二遍：逐条入库（单条失败保留记录，下次启动再试）
+        retried = 0
+        for fname, fpath, record, embedding in loaded:
+            try:
+                if isinstance(embedding, Exception):
+                    raise embedding
 
-                tags = TagSet(**tags_data)
-                tg_promo = record.get("tg_promo", "")
-                embedding = self._embedding_client.get_embedding(tg_promo)
+                from blog_autopilot.db import Database
 
                 article_record = ArticleRecord(
                     id=Database._generate_id(),
                     title=record["title"],
-                    tags=tags,
-                    tg_promo=tg_promo,
+                    tags=TagSet(**record["tags"]),
+                    tg_promo=record.get("tg_promo", ""),
                     embedding=embedding,
                     url=record.get("url"),
                     summary=record.get("summary"),
@@ -711,7 +929,7 @@ class Pipeline:
                     wp_post_id=record.get("wp_post_id"),
                     source_hash=record.get("source_hash"),
                 )
-                os.remove(fpath)
+                self._remove_failed_ingest(fpath)
                 retried += 1
                 logger.info(f"入库重试成功: {record['title']}")
             except Exception as e:
@@ -726,31 +944,75 @@ class Pipeline:
         rel_path = os.path.relpath(os.path.abspath(filepath), input_folder)
         return os.path.join(processed_dir, rel_path)
 
+    @staticmethod
+    def _list_filenames(directory: str) -> set[str]:
+        """列出目录下的文件名（目录不存在时为空集）"""
+        try:
+            with os.scandir(directory) as entries:
+                return {entry.name for entry in entries}
+        except (FileNotFoundError, NotADirectoryError):
+            return set()
+
+    def _archived_names_in(self, directory: str) -> set[str]:
+        """归档目录下已有的文件名：目录未变化时直接用缓存，只花一次 stat"""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            self._archived_names.pop(directory, None)
+            return set()
+        cached = self._archived_names.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        names = self._list_filenames(directory)
+        self._archived_names[directory] = (mtime, names)
+        return names
+
     def _archive_file(self, filepath: str) -> None:
         """归档文件：保持原目录结构和原文件名"""
         dest = self._get_archive_path(filepath)
         os.makedirs(os.path.dirname(dest), exist_ok=True)
 
-        # 同名文件直接覆盖
+        # 同名文件直接覆盖；同一文件系统下 os.replace 一次系统调用完成，
+        # 跨设备（EXDEV）时才退回 shutil.move 的复制+删除
         try:
-            shutil.move(filepath, dest)
+            try:
+                os.replace(filepath, dest)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.move(filepath, dest)
+            self._record_archived(dest)
             logger.info(f"已归档: {os.path.relpath(dest, self._settings.paths.processed_folder)}")
         except Exception as e:
             logger.error(f"归档失败: {e}")
 
+    def _record_archived(self, dest: str) -> None:
+        """本进程归档后同步更新文件名缓存，避免下一轮为此重新列目录"""
+        directory, name = os.path.split(dest)
+        cached = self._archived_names.get(directory)
+        if cached is None:
+            return
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._archived_names.pop(directory, None)
+            return
+        cached[1].add(name)
+        self._archived_names[directory] = (mtime, cached[1])
+
     def scan_and_process(self) -> int:
         """扫描 input 目录并处理所有文件"""
         input_folder = self._settings.paths.input_folder
         os.makedirs(input_folder, exist_ok=True)
 
         file_list = scan_input_directory(input_folder)
+        self._input_pending = bool(file_list)
 
         if not file_list:
             return 0
 
         # 发布时段检查
         if self._settings.schedule.publish_window_enabled:
-            from datetime import datetime
             now = datetime.now()
             start = self._settings.schedule.publish_window_start
             end = self._settings.schedule.publish_window_end
@@ -769,18 +1031,38 @@ class Pipeline:
         logger.info(f"发现 {len(file_list)} 个文件待处理")
         processed = 0
 
-        for task in sorted(file_list, key=lambda t: t.filepath):
+        pending = []
+        # 每个归档子目录每轮只 stat 一次，文件名集合跨轮次缓存，代替逐文件 stat
+        archived_names: dict[str, set[str]] = {}
+        for task in file_list:
             # 检查 processed 中是否已有同名文件（重复投递）
-            archive_path = self._get_archive_path(task.filepath)
-            if os.path.exists(archive_path):
+            archive_dir, archive_name = os.path.split(
+                self._get_archive_path(task.filepath)
+            )
+            if archive_dir not in archived_names:
+                archived_names[archive_dir] = self._archived_names_in(archive_dir)
+            if archive_name in archived_names[archive_dir]:
                 logger.info(
                     f"跳过重复文件: {task.filename}（已处理过，直接删除）"
                 )
                 os.remove(task.filepath)
                 continue
+            pending.append(task)
+
+        # 按 embedding 批大小分窗口：每窗口先批量预筛，再逐个走完整流水线
+        window = self._settings.embedding.batch_size
+        prescreens: dict[str, tuple] = {}
+        for index, task in enumerate(pending):
+            if index % window == 0:
+                self._window_ingested.clear()
+                self._discard_prefetched()
+                self._prefetch_texts(pending[index:index + window])
+                prescreens = self._prescreen_batch(pending[index:index + window])
 
             try:
-                result = self.process_file(task)
+                result = self.process_file(
+                    task, prescreen=prescreens.get(task.filepath),
+                )
                 if result.success:
                     processed += 1
                     self._archive_file(task.filepath)
@@ -798,28 +1080,154 @@ class Pipeline:
                 )
                 self._archive_file(task.filepath)
 
+        self._discard_prefetched()
         return processed
 
-    def _ensure_category_dirs(self) -> None:
-        """根据 categories.json 自动创建 input 子目录"""
-        config_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), "categories.json"
+    def _prescreen_batch(self, tasks: list[FileTask]) -> dict[str, tuple]:
+        """
+        批量预筛：并发提取标签/推广文案，再用一次批量请求获取全部 embedding。
+
+        返回 {filepath: (tags, tg_promo, title, embedding, duplicate)}，
+        duplicate 为批量全库去重命中的文章（无则 None）；
+        提取失败、指纹重复或 embedding 失败的文件不在结果中，由单文件流程按原逻辑处理。
+        """
+        if not self._association_enabled or len(tasks) < 2:
+            return {}
+
+        # 提取在预取线程池中并行进行；这里按顺序取结果，文本保留给单文件流程复用
+        self._prefetch_texts(tasks)
+        candidates = []
+        for task in tasks:
+            try:
+                raw_text = self._read_text(task, keep=True)
+            except ExtractionError:
+                continue
+            source_hash = hashlib.sha256(raw_text.encode("utf-8")).hexdigest()
+            # 指纹重复的文件无需 AI 调用，留给单文件流程跳过
+            if self._database.find_duplicate_by_hash(source_hash):
+                continue
+            candidates.append((task, raw_text))
+        if len(candidates) < 2:
+            return {}
+
+        def tag(raw_text: str):
+            try:
+                return self._writer.extract_tags_and_promo(raw_text)
+            except Exception as e:
+                logger.warning(f"预筛标签提取失败，改为单文件处理: {e}")
+                return None
+
+        tagged = [
+            (task, extracted)
+            for (task, _), extracted in zip(
+                candidates,
+                self._executor.map(tag, [raw for _, raw in candidates]),
+            )
+            if extracted is not None
+        ]
+        if not tagged:
+            return {}
+
+        try:
+            embeddings = self._embedding_client.get_embeddings(
+                [tg_promo for _, (_, tg_promo, _) in tagged],
+                return_exceptions=True,
+            )
+        except Exception as e:
+            logger.warning(f"预筛批量 Embedding 失败，改为单文件处理: {e}")
+            return {}
+
+        screened = [
+            (task, extracted, embedding)
+            for (task, extracted), embedding in zip(tagged, embeddings)
+            if not isinstance(embedding, Exception)
+        ]
+        # 整个窗口一次矩阵乘法查全库重复，代替逐文件 find_duplicate
+        duplicates = self._database.find_duplicates(
+            [embedding for _, _, embedding in screened],
+            DUPLICATE_SIMILARITY_THRESHOLD,
         )
-        if not os.path.exists(config_path):
-            return
 
-        with open(config_path, encoding="utf-8") as f:
-            categories = json.load(f)
+        prescreens = {}
+        for (task, (tags, tg_promo, title), embedding), dup in zip(
+            screened, duplicates,
+        ):
+            prescreens[task.filepath] = (tags, tg_promo, title, embedding, dup)
+        logger.info(f"批量预筛完成: {len(prescreens)}/{len(tasks)} 个文件")
+        return prescreens
+
+    def _prefetch_texts(self, tasks: list[FileTask]) -> None:
+        """把尚未提交的文件提取任务提交到提取线程池"""
+        for task in tasks:
+            if task.filepath not in self._text_futures:
+                self._text_futures[task.filepath] = self._extract_executor.submit(
+                    extract_text_from_file, task.filepath,
+                )
+
+    def _read_text(self, task: FileTask, keep: bool = False) -> str:
+        """
+        取文件文本：有预取结果时等待并使用，否则当场提取。
+
+        keep=False 时取出后丢弃预取结果，释放文本内存。
+        抛出:
+            ExtractionError: 提取失败
+        """
+        if keep:
+            future = self._text_futures.get(task.filepath)
+        else:
+            future = self._text_futures.pop(task.filepath, None)
+        if future is None:
+            return extract_text_from_file(task.filepath)
+        return future.result()
+
+    def _discard_prefetched(self) -> None:
+        """丢弃未被使用的预取结果（取消尚未开始的提取）"""
+        for future in self._text_futures.values():
+            future.cancel()
+        self._text_futures.clear()
+
+    @staticmethod
+    def _unit_vector(embedding) -> np.ndarray:
+        """L2 归一化（float32），零向量原样返回"""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _find_window_duplicate(self, embedding) -> dict | None:
+        """在当前窗口已入库的文章中查找相似度超过阈值的最相似文章"""
+        if not self._window_ingested:
+            return None
+        titles, vectors = zip(*self._window_ingested)
+        sims = np.vstack(vectors) @ self._unit_vector(embedding)
+        best = int(np.argmax(sims))
+        similarity = float(sims[best])
+        if similarity >= DUPLICATE_SIMILARITY_THRESHOLD:
+            return {"title": titles[best], "similarity": similarity}
+        return None
+
+    def _ensure_category_dirs(self) -> None:
+        """根据 categories.json 自动创建 input 子目录（本进程已创建过的目录跳过）"""
+        categories = _load_categories_config()
+        # 配置文件未变化时 scanner 返回同一缓存对象，目录已全部确保
+        if categories is self._ensured_categories_config:
+            return
 
         input_folder = self._settings.paths.input_folder
         for category, subs in categories.items():
             if category.startswith("_") or not isinstance(subs, list):
                 continue
+            # 每个大类只列一次目录，已存在的子目录不再调用 makedirs
+            category_dir = os.path.join(input_folder, category)
+            existing = self._list_filenames(category_dir)
             for sub in subs:
-                dir_path = os.path.join(
-                    input_folder, category, f"{sub['name']}_{sub['id']}"
-                )
-                os.makedirs(dir_path, exist_ok=True)
+                dir_name = f"{sub['name']}_{sub['id']}"
+                dir_path = os.path.join(category_dir, dir_name)
+                if dir_path in self._ensured_category_dirs:
+                    continue
+                if dir_name not in existing:
+                    os.makedirs(dir_path, exist_ok=True)
+                self._ensured_category_dirs.add(dir_path)
+        self._ensured_categories_config = categories
 
     def _check_and_generate_surveys(self) -> None:
         """检查并生成综述文章"""
@@ -930,28 +1338,65 @@ class Pipeline:
         else:
             logger.info("  质量审核: 未启用")
 
-        if once:
-            count = self.scan_and_process()
-            logger.info(f"单次处理完成, 共处理 {count} 篇文章")
-            return
+        previous_sigterm = None
+        if not once and threading.current_thread() is threading.main_thread():
+            # SIGTERM（如 systemd / supervisor 停止服务）时不再等满轮询间隔
+            previous_sigterm = signal.signal(
+                signal.SIGTERM, lambda signum, frame: self.stop(),
+            )
 
-        last_survey_check = 0.0
-        while True:
-            try:
-                self.scan_and_process()
-            except KeyboardInterrupt:
-                logger.info("\n收到中断信号, 退出...")
-                break
-            except Exception as e:
-                logger.error(f"主循环异常: {e}", exc_info=True)
+        try:
+            if once:
+                count = self.scan_and_process()
+                logger.info(f"单次处理完成, 共处理 {count} 篇文章")
+                return
 
-            # 每 24 小时检查一次综述生成
-            now = time.time()
-            if now - last_survey_check >= SURVEY_CHECK_INTERVAL:
-                last_survey_check = now
-                self._check_and_generate_surveys()
+            self._watcher = InputWatcher(paths.input_folder)
+            if self._watcher.active:
+                logger.info("  目录监听: inotify（新文件到达时立即处理）")
 
-            time.sleep(POLL_INTERVAL)
+            last_survey_check = 0.0
+            should_scan = True
+            while not self._stop_event.is_set():
+                try:
+                    if should_scan:
+                        self.scan_and_process()
+                except KeyboardInterrupt:
+                    logger.info("\n收到中断信号, 退出...")
+                    break
+                except Exception as e:
+                    logger.error(f"主循环异常: {e}", exc_info=True)
+
+                # 每 24 小时检查一次综述生成
+                now = time.time()
+                if now - last_survey_check >= SURVEY_CHECK_INTERVAL:
+                    last_survey_check = now
+                    self._check_and_generate_surveys()
+
+                changed = self._watcher.wait(POLL_INTERVAL)
+                if self._stop_event.is_set():
+                    logger.info("收到停止信号, 退出...")
+                    break
+                # inotify 可用时，期间没有新文件且上一轮目录已空则跳过下一轮扫描；
+                # 仍有遗留文件（如被锁定、不在发布时段）时照常按间隔重扫
+                should_scan = (
+                    changed or not self._watcher.active or self._input_pending
+                )
+        finally:
+            if previous_sigterm is not None:
+                signal.signal(signal.SIGTERM, previous_sigterm)
+            if self._watcher is not None:
+                watcher, self._watcher = self._watcher, None
+                watcher.close()
+            # 退出前落盘所有草稿和失败记录
+            self.close()
+
+    def stop(self) -> None:
+        """请求主循环退出（可从信号处理器或其他线程调用），正在处理的文件会先完成"""
+        self._stop_event.set()
+        watcher = self._watcher
+        if watcher is not None:
+            watcher.wake()
 
     def run_test(self) -> None:
         """测试所有外部连接"""
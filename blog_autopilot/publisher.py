@@ -1,55 +1,127 @@
 """WordPress 发布模块"""
 
-import base64
 import logging
 import re as _re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from urllib.parse import urlencode, urlparse, parse_qs
 
 import requests
-from tenacity import retry, retry_if_exception, retry_if_result, stop_after_attempt, wait_fixed
+from tenacity import (
+    RetryCallState,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+from tenacity.wait import wait_base
+from urllib3.exceptions import ConnectTimeoutError
 
 from blog_autopilot.config import WordPressSettings
+from blog_autopilot.constants import (
+    WP_BATCH_MAX_REQUESTS,
+    WP_CACHE_MAXSIZE,
+    WP_CACHE_TTL,
+    WP_RETRY_AFTER_MAX,
+    WP_SANITIZE_MAX_PASSES,
+    WP_TAG_WORKERS,
+)
 from blog_autopilot.exceptions import WordPressError
+from blog_autopilot.http_client import basic_auth, session
 
 logger = logging.getLogger("blog-autopilot")
 
 
 # ── HTML 清洗 ──
 
-# 危险标签（直接移除整个标签及内容）
-# 注意：闭合标签允许空白 </script > 以防绕过
-_DANGEROUS_TAGS_RE = _re.compile(
-    r"<(script|iframe|object|embed|form|input|textarea|button|select|link|meta|base)"
-    r"[\s>].*?</\1\s*>|"
-    r"<(script|iframe|object|embed|form|input|textarea|button|select|link|meta|base)"
-    r"[^>]*/?>",
-    _re.IGNORECASE | _re.DOTALL,
-)
-
-# 未闭合的危险标签（移除标签本身，防止浏览器解析执行）
-_UNCLOSED_DANGEROUS_RE = _re.compile(
-    r"<(script|iframe|object|embed)[^>]*>",
+# 有闭合标签的危险元素（连同内容移除）与空元素（input/link/meta/base 没有闭合标签，只移除标签本身）
+_DANGEROUS_PAIRED_TAGS = r"script|iframe|object|embed|form|textarea|button|select"
+_DANGEROUS_TAG_NAMES = _DANGEROUS_PAIRED_TAGS + r"|input|link|meta|base"
+_PAIRED_TAG_SET = frozenset(_DANGEROUS_PAIRED_TAGS.split("|"))
+
+# 所有清洗规则合并为一个交替模式，单次扫描完成；分支顺序即优先级：
+# - dangerous: 危险标签的开头（<script 等），内容与闭合位置由 _sanitize_pass 查索引确定，
+#   正则本身不向后扫描，未闭合的开标签不会每个都扫到文档末尾（否则二次方耗时）
+# - event: 事件属性（on* 属性）
+# - attr: javascript: 协议与非图片 data: 协议（保留属性名，值置空）
+_SANITIZE_RE = _re.compile(
+    rf"(?P<dangerous><(?P<tag>{_DANGEROUS_TAG_NAMES})(?P<sep>[\s>])?)"
+    r"""|(?P<event>\s+on\w+\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+))"""
+    r"""|(?P<attr>href|src|action)\s*=\s*["']?\s*(?:javascript:|data:(?!image/))""",
     _re.IGNORECASE,
 )
 
-# 事件属性（on* 属性）
-_EVENT_ATTR_RE = _re.compile(
-    r'\s+on\w+\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]+)',
-    _re.IGNORECASE,
+# 闭合标签允许空白（</script >），防止绕过
+_PAIRED_CLOSE_RE = _re.compile(
+    rf"</({_DANGEROUS_PAIRED_TAGS})\s*>", _re.IGNORECASE,
 )
 
-# javascript: 协议
-_JS_PROTOCOL_RE = _re.compile(
-    r'(href|src|action)\s*=\s*["\']?\s*javascript:',
-    _re.IGNORECASE,
-)
 
-# data: 协议（除了 data:image）
-_DATA_PROTOCOL_RE = _re.compile(
-    r'(href|src|action)\s*=\s*["\']?\s*data:(?!image/)',
-    _re.IGNORECASE,
-)
+def _index_closing_tags(html: str) -> dict[str, tuple[list[int], list[int]]]:
+    """一次扫描建立 {标签名: (各闭合标签起点, 终点)}，供开标签二分查找配对"""
+    index: dict[str, tuple[list[int], list[int]]] = {}
+    for m in _PAIRED_CLOSE_RE.finditer(html):
+        starts, ends = index.setdefault(m.group(1).lower(), ([], []))
+        starts.append(m.start())
+        ends.append(m.end())
+    return index
+
+
+def _sanitize_pass(html: str) -> tuple[str, int]:
+    """
+    按 _SANITIZE_RE 扫描一遍并移除命中内容，返回 (结果, 移除次数)。
+
+    危险标签规则：有配对闭合标签的连同内容移除到第一个闭合标签；
+    否则只移除标签本身（到下一个 ">"）；后面没有 ">" 则不处理。
+    闭合标签位置与最后一个 ">" 预先算好，每个开标签 O(log n) 判定，整遍线性。
+    """
+    parts: list[str] = []
+    count = 0
+    pos = 0
+    closers = None
+    last_gt = html.rfind(">")
+
+    m = _SANITIZE_RE.search(html)
+    while m:
+        start, end = m.span()
+        if m.group("dangerous"):
+            tag = m.group("tag").lower()
+            end = -1
+            if tag in _PAIRED_TAG_SET and m.group("sep"):
+                if closers is None:
+                    closers = _index_closing_tags(html)
+                starts, ends = closers.get(tag, ((), ()))
+                i = bisect_left(starts, m.end("tag") + 1)
+                if i < len(starts):
+                    end = ends[i]
+            if end < 0 and last_gt >= m.end("tag"):
+                end = html.index(">", m.end("tag")) + 1
+            if end < 0:
+                # 无法构成标签，原样保留，从下一个字符继续
+                m = _SANITIZE_RE.search(html, start + 1)
+                continue
+            replacement = ""
+        else:
+            attr = m.group("attr")
+            replacement = f'{attr}=""' if attr else ""
+
+        parts.append(html[pos:start])
+        parts.append(replacement)
+        count += 1
+        pos = end
+        m = _SANITIZE_RE.search(html, end)
+
+    if not count:
+        return html, 0
+    parts.append(html[pos:])
+    return "".join(parts), count
 
 
 def sanitize_html(html: str) -> str:
@@ -59,26 +131,25 @@ def sanitize_html(html: str) -> str:
     - 移除 script/iframe/object/embed/form 等危险标签
     - 移除 on* 事件属性
     - 移除 javascript: 和非图片 data: 协议
+
+    抛出 WordPressError 当 WP_SANITIZE_MAX_PASSES 轮后仍有危险内容时（恶意嵌套）。
     """
-    if not html:
+    if not html or ("<" not in html and "=" not in html):
         return html
 
     original_len = len(html)
 
-    # 1. 移除危险标签（含内容）
-    html = _DANGEROUS_TAGS_RE.sub("", html)
-
-    # 1.5 移除残留的未闭合危险标签
-    html = _UNCLOSED_DANGEROUS_RE.sub("", html)
-
-    # 2. 移除事件属性
-    html = _EVENT_ATTR_RE.sub("", html)
-
-    # 3. 移除 javascript: 协议
-    html = _JS_PROTOCOL_RE.sub(r'\1=""', html)
-
-    # 4. 移除非图片 data: 协议
-    html = _DATA_PROTOCOL_RE.sub(r'\1=""', html)
+    # 单次扫描移除全部命中；若有移除，再扫一遍直到不再变化，
+    # 防止拼接后重新形成危险片段（如 <scr<script></script>ipt>）。
+    # 每轮只剥掉一层嵌套，轮数设上限，避免层层嵌套的输入耗时二次方增长
+    for _ in range(WP_SANITIZE_MAX_PASSES):
+        html, count = _sanitize_pass(html)
+        if not count:
+            break
+    else:
+        raise WordPressError(
+            f"HTML 清洗 {WP_SANITIZE_MAX_PASSES} 轮后仍有危险内容（疑似恶意嵌套），拒绝发布"
+        )
 
     if len(html) != original_len:
         logger.warning(
@@ -88,32 +159,126 @@ def sanitize_html(html: str) -> str:
     return html
 
 
-@dataclass(frozen=True)
+class _TTLCache:
+    """线程安全的 TTL + LRU 内存缓存（超过容量淘汰最久未用的条目）"""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if time.monotonic() - stored_at >= self._ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# (tags_url, 标签名) → 标签 ID；同一进程内连续发布复用，省去重复的创建/查询请求
+_tag_id_cache = _TTLCache(WP_CACHE_MAXSIZE, WP_CACHE_TTL)
+# (posts_url, post_id) → 文章 raw 内容；发布/更新时写入，系列导航回溯时免去一次 GET
+_post_content_cache = _TTLCache(WP_CACHE_MAXSIZE, WP_CACHE_TTL)
+
+
+@dataclass(frozen=True, slots=True)
 class PublishResult:
     """WordPress 发布结果"""
     url: str
     post_id: int
 
 
-def _is_server_error(result: str | None) -> bool:
-    """tenacity 重试条件：仅当返回 None（即 5xx 失败）时重试"""
-    return result is None
-
-
 def _is_retryable_wp_error(exc: BaseException) -> bool:
     """tenacity 重试条件：仅当 WordPressError.retryable=True 时重试"""
     return isinstance(exc, WordPressError) and exc.retryable
 
 
+def _retry_after_seconds(resp: requests.Response) -> float | None:
+    """解析 Retry-After 头（秒数或 HTTP-date），缺失或无法解析时返回 None"""
+    value = resp.headers.get("Retry-After")
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class _wait_retry_after(wait_base):
+    """异常带有 Retry-After 时按服务器要求等待（封顶 WP_RETRY_AFTER_MAX），否则使用回退策略"""
+
+    def __init__(self, fallback: wait_base) -> None:
+        self._fallback = fallback
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        delay = getattr(exc, "retry_after", None)
+        if delay is not None:
+            return min(delay, WP_RETRY_AFTER_MAX)
+        return self._fallback(retry_state)
+
+
+def _is_throttled(status_code: int) -> bool:
+    """429 限流与 5xx 服务器错误可重试"""
+    return status_code == 429 or status_code >= 500
+
+
+def _check_html_size(content: str, settings: WordPressSettings) -> None:
+    """发送前检查 HTML 体积，超出 max_html_bytes 抛出不可重试的 WordPressError"""
+    limit = settings.max_html_bytes
+    # UTF-8 每字符至少 1 字节：字符数已超限时无需编码即可判定
+    if len(content) > limit or len(content.encode("utf-8")) > limit:
+        raise WordPressError(
+            f"文章 HTML 过大 ({len(content)} 字符)，超过上限 {limit} 字节"
+        )
+
+
+def _request_not_sent(exc: requests.exceptions.ConnectionError) -> bool:
+    """连接阶段即失败（拒绝连接 / DNS 解析 / 连接超时），请求未发出，重试不会重复发布"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, ConnectTimeoutError)
+
+
 def _build_auth_header(settings: WordPressSettings) -> dict[str, str]:
-    credentials = f"{settings.user}:{settings.app_password.get_secret_value()}"
-    token = base64.b64encode(credentials.encode()).decode("utf-8")
     return {
-        "Authorization": f"Basic {token}",
+        "Authorization": basic_auth(
+            settings.user, settings.app_password.get_secret_value(),
+        ),
         "Content-Type": "application/json",
     }
 
 
+@lru_cache(maxsize=8)
 def _get_tags_url(posts_url: str) -> str:
     """从 posts URL 推导 tags endpoint URL"""
     parsed = urlparse(posts_url)
@@ -127,11 +292,98 @@ def _get_tags_url(posts_url: str) -> str:
     return posts_url.rsplit("/", 1)[0] + "/tags"
 
 
+@lru_cache(maxsize=8)
+def _get_batch_url(posts_url: str) -> tuple[str, str]:
+    """
+    从 posts URL 推导 batch endpoint URL 与批量子请求中使用的 tags 路由。
+
+    返回 (batch_url, tags_route)。
+    """
+    parsed = urlparse(posts_url)
+    qs = parse_qs(parsed.query)
+    if "rest_route" in qs:
+        # ?rest_route=/wp/v2/posts → ?rest_route=/batch/v1
+        tags_route = qs["rest_route"][0].rsplit("/", 1)[0] + "/tags"
+        new_qs = urlencode({"rest_route": "/batch/v1"})
+        return f"{parsed.scheme}://{parsed.netloc}{parsed.path}?{new_qs}", tags_route
+    # Pretty permalink: .../wp-json/wp/v2/posts → .../wp-json/batch/v1
+    base, namespace, version, _ = posts_url.rsplit("/", 3)
+    return f"{base}/batch/v1", f"/{namespace}/{version}/tags"
+
+
+# 已确认不支持 /batch/v1 的站点（WP < 5.6），后续直接逐个创建标签
+_batch_unsupported: set[str] = set()
+
+
+def _batch_create_wp_tags(
+    tag_names: list[str],
+    settings: WordPressSettings,
+    headers: dict[str, str],
+) -> dict[str, int] | None:
+    """
+    通过 /batch/v1 一次请求创建多个标签。
+
+    返回 {标签名: ID}（仅含成功解析的标签）；batch endpoint 不可用时返回 None。
+    """
+    batch_url, tags_route = _get_batch_url(settings.url)
+    if batch_url in _batch_unsupported:
+        return None
+
+    resolved: dict[str, int] = {}
+    for start in range(0, len(tag_names), WP_BATCH_MAX_REQUESTS):
+        chunk = tag_names[start:start + WP_BATCH_MAX_REQUESTS]
+        payload = {
+            "validation": "normal",
+            "requests": [
+                {"method": "POST", "path": tags_route, "body": {"name": name}}
+                for name in chunk
+            ],
+        }
+        try:
+            resp = session.post(batch_url, headers=headers, json=payload, timeout=30)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"批量标签创建请求异常: {e}")
+            return resolved if start else None
+
+        if resp.status_code in (404, 405):
+            logger.info("WordPress 不支持 /batch/v1，逐个创建标签")
+            _batch_unsupported.add(batch_url)
+            return None
+        if resp.status_code not in (200, 207):
+            logger.warning(f"批量标签创建失败 ({resp.status_code})")
+            return resolved if start else None
+
+        try:
+            responses = resp.json().get("responses", [])
+        except ValueError:
+            responses = []
+        for name, item in zip(chunk, responses):
+            body = item.get("body") or {}
+            if item.get("status") == 201 and body.get("id"):
+                resolved[name] = int(body["id"])
+            elif body.get("code") == "term_exists":
+                term_id = (body.get("data") or {}).get("term_id")
+                if term_id:
+                    resolved[name] = int(term_id)
+    return resolved
+
+
+def _give_up_tag(retry_state: RetryCallState) -> None:
+    """标签重试耗尽：记录日志并返回 None，跳过该标签而不阻断发布"""
+    tag_name = retry_state.args[0] if retry_state.args else retry_state.kwargs.get("tag_name")
+    logger.warning(
+        f"标签创建重试 {retry_state.attempt_number} 次仍失败: "
+        f"{tag_name} - {retry_state.outcome.exception()}"
+    )
+    return None
+
+
 @retry(
-    stop=stop_after_attempt(2),
-    wait=wait_fixed(3),
-    retry=retry_if_result(_is_server_error),
-    reraise=True,
+    stop=stop_after_attempt(4),
+    # 优先遵循 Retry-After；否则指数退避 + 随机抖动，避免多个标签请求同步重试
+    wait=_wait_retry_after(wait_exponential_jitter(initial=1, max=30)),
+    retry=retry_if_exception(_is_retryable_wp_error),
+    retry_error_callback=_give_up_tag,
 )
 def _create_or_get_wp_tag(
     tag_name: str,
@@ -142,9 +394,10 @@ def _create_or_get_wp_tag(
     创建或获取 WordPress 标签 ID。
 
     返回标签 ID，失败返回 None（不阻断流程）。
+    5xx 与连接/超时错误会重试（同名标签重复创建返回 term_exists，重试是幂等的）。
     """
     try:
-        resp = requests.post(
+        resp = session.post(
             tags_url,
             headers=headers,
             json={"name": tag_name},
@@ -161,7 +414,7 @@ def _create_or_get_wp_tag(
             if term_id:
                 return int(term_id)
             # 回退：搜索标签
-            search_resp = requests.get(
+            search_resp = session.get(
                 tags_url,
                 headers=headers,
                 params={"search": tag_name, "per_page": 1},
@@ -173,13 +426,20 @@ def _create_or_get_wp_tag(
                     return results[0]["id"]
             return None
 
-        if resp.status_code >= 500:
+        if _is_throttled(resp.status_code):
             logger.warning(f"标签创建服务器错误 ({resp.status_code}), 将重试...")
-            return None  # 触发 tenacity 重试
+            raise WordPressError(
+                f"标签创建服务器错误 ({resp.status_code})",
+                status_code=resp.status_code,
+                retryable=True,
+                retry_after=_retry_after_seconds(resp),
+            )
 
         logger.warning(f"标签创建失败 ({resp.status_code}): {tag_name}")
         return None
 
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        raise WordPressError(f"标签创建网络错误: {e}", retryable=True) from e
     except requests.exceptions.RequestException as e:
         logger.warning(f"标签创建请求异常: {tag_name} - {e}")
         return None
@@ -192,14 +452,42 @@ def ensure_wp_tags(
     """
     批量创建/获取 WordPress 标签 ID。
 
-    跳过失败的标签，返回成功的 ID 列表。
+    优先通过 /batch/v1 一次请求完成，批量中未解析的标签再逐个创建；
+    跳过失败的标签，返回成功的 ID 列表（保持输入顺序）。
     """
     tags_url = _get_tags_url(settings.url)
     headers = _build_auth_header(settings)
     tag_ids = []
 
+    resolved: dict[str, int | None] = {}
     for name in tag_names:
-        tag_id = _create_or_get_wp_tag(name, tags_url, headers)
+        cached = _tag_id_cache.get((tags_url, name))
+        if cached is not None:
+            resolved[name] = cached
+    uncached = list(dict.fromkeys(n for n in tag_names if n not in resolved))
+    if uncached:
+        resolved.update(_batch_create_wp_tags(uncached, settings, headers) or {})
+
+    # 未解析的标签并发逐个创建（纯网络等待，共享连接池复用连接）
+    pending = [n for n in uncached if n not in resolved]
+    if len(pending) > 1:
+        with ThreadPoolExecutor(
+            max_workers=min(WP_TAG_WORKERS, len(pending)),
+            thread_name_prefix="wp-tags",
+        ) as pool:
+            results = pool.map(
+                lambda name: _create_or_get_wp_tag(name, tags_url, headers), pending,
+            )
+            resolved.update(zip(pending, results))
+    elif pending:
+        resolved[pending[0]] = _create_or_get_wp_tag(pending[0], tags_url, headers)
+
+    for name in uncached:
+        if resolved.get(name) is not None:
+            _tag_id_cache.put((tags_url, name), resolved[name])
+
+    for name in tag_names:
+        tag_id = resolved.get(name)
         if tag_id is not None:
             tag_ids.append(tag_id)
         else:
@@ -210,8 +498,9 @@ def ensure_wp_tags(
 
 
 @retry(
-    stop=stop_after_attempt(2),
-    wait=wait_fixed(5),
+    stop=stop_after_attempt(4),
+    # 优先遵循 Retry-After；否则指数退避 + 随机抖动：瞬时 5xx 更快恢复，多个请求不会同时重试
+    wait=_wait_retry_after(wait_exponential_jitter(initial=1, max=30)),
     retry=retry_if_exception(_is_retryable_wp_error),
     reraise=True,
 )
@@ -233,6 +522,7 @@ def post_to_wordpress(
     抛出 WordPressError 当发布失败时。
     """
     effective_category = category_id or settings.target_category_id
+    _check_html_size(content, settings)
     content = sanitize_html(content)
     logger.info(
         f"正在发布到博客: 《{title}》 "
@@ -256,27 +546,32 @@ def post_to_wordpress(
         payload["featured_media"] = featured_media
 
     try:
-        resp = requests.post(
+        resp = session.post(
             settings.url, headers=headers, json=payload, timeout=30
         )
         resp.raise_for_status()
     except requests.exceptions.HTTPError as e:
         status_code = e.response.status_code
         body = e.response.text[:500]
-        # 5xx 抛出可重试异常
-        if status_code >= 500:
+        # 429 / 5xx 抛出可重试异常（429 表示请求被拒绝未处理，重试不会重复发布）
+        if _is_throttled(status_code):
             logger.warning(f"WordPress 服务器错误 ({status_code}), 将重试...")
             raise WordPressError(
                 f"WordPress 服务器错误 ({status_code})",
                 status_code=status_code,
                 retryable=True,
+                retry_after=_retry_after_seconds(e.response),
             ) from e
         raise WordPressError(
             f"博客发布失败 (HTTP {status_code}): {body}",
             status_code=status_code,
         ) from e
     except requests.exceptions.ConnectionError as e:
-        raise WordPressError("无法连接到 WordPress, 请检查 WP_URL") from e
+        # 仅连接建立前失败时重试；请求发出后连接中断可能已创建文章，不重试以免重复发布
+        raise WordPressError(
+            "无法连接到 WordPress, 请检查 WP_URL",
+            retryable=_request_not_sent(e),
+        ) from e
     except Exception as e:
         raise WordPressError(f"博客发布异常: {e}") from e
 
@@ -288,27 +583,47 @@ def post_to_wordpress(
             f"WordPress 返回数据不完整: id={post_id}, link={post_link}"
         )
     logger.info(f"博客发布成功! ID: {post_id} | URL: {post_link}")
+    _post_content_cache.put((settings.url, int(post_id)), content)
     return PublishResult(url=post_link, post_id=int(post_id))
 
 
-def _build_post_url(post_id: int, settings: WordPressSettings) -> str:
-    """从 posts URL 构造单篇文章 URL"""
-    parsed = urlparse(settings.url)
+@lru_cache(maxsize=8)
+def _post_url_prefix(posts_url: str) -> str:
+    """单篇文章 URL 的前缀（拼接文章 ID 即得完整 URL），同一 posts URL 只解析一次"""
+    parsed = urlparse(posts_url)
     qs = parse_qs(parsed.query)
     if "rest_route" in qs:
-        route = qs["rest_route"][0].rstrip("/") + f"/{post_id}"
+        # 文章 ID 为纯数字，urlencode 不会转义，可直接拼在编码后的路由之后
+        route = qs["rest_route"][0].rstrip("/") + "/"
         new_qs = urlencode({"rest_route": route})
         return f"{parsed.scheme}://{parsed.netloc}{parsed.path}?{new_qs}"
-    return settings.url.rstrip("/") + f"/{post_id}"
+    return posts_url.rstrip("/") + "/"
 
 
-def get_wp_post_content(post_id: int, settings: WordPressSettings) -> str | None:
-    """获取 WordPress 文章内容（raw HTML）"""
+def _build_post_url(post_id: int, settings: WordPressSettings) -> str:
+    """从 posts URL 构造单篇文章 URL"""
+    return f"{_post_url_prefix(settings.url)}{post_id}"
+
+
+def get_wp_post_content(
+    post_id: int, settings: WordPressSettings, use_cache: bool = True,
+) -> str | None:
+    """
+    获取 WordPress 文章内容（raw HTML）。
+
+    本进程发布/更新过的文章在 WP_CACHE_TTL 内直接返回缓存；use_cache=False 强制读取。
+    """
+    cache_key = (settings.url, post_id)
+    if use_cache:
+        cached = _post_content_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     headers = _build_auth_header(settings)
     url = _build_post_url(post_id, settings)
 
     try:
-        resp = requests.get(
+        resp = session.get(
             url, headers=headers, params={"context": "edit"}, timeout=15,
         )
         resp.raise_for_status()
@@ -316,8 +631,11 @@ def get_wp_post_content(post_id: int, settings: WordPressSettings) -> str | None
         content = data.get("content", {})
         # WP REST API 在 context=edit 时返回 {"raw": "...", "rendered": "..."}
         if isinstance(content, dict):
-            return content.get("raw") or content.get("rendered", "")
-        return str(content)
+            content = content.get("raw") or content.get("rendered", "")
+        else:
+            content = str(content)
+        _post_content_cache.put(cache_key, content)
+        return content
     except Exception as e:
         logger.warning(f"获取文章内容失败 (post_id={post_id}): {e}")
         return None
@@ -327,18 +645,27 @@ def update_wp_post_content(
     post_id: int, content: str, settings: WordPressSettings,
 ) -> bool:
     """更新 WordPress 文章内容"""
+    try:
+        _check_html_size(content, settings)
+    except WordPressError as e:
+        logger.warning(f"文章内容更新失败 (post_id={post_id}): {e}")
+        return False
+
     headers = _build_auth_header(settings)
     url = _build_post_url(post_id, settings)
 
     try:
-        resp = requests.post(
+        resp = session.post(
             url, headers=headers, json={"content": content}, timeout=15,
         )
         resp.raise_for_status()
         logger.info(f"文章内容更新成功 (post_id={post_id})")
+        _post_content_cache.put((settings.url, post_id), content)
         return True
     except Exception as e:
         logger.warning(f"文章内容更新失败 (post_id={post_id}): {e}")
+        # 更新结果未知，丢弃缓存，下次读取以服务器为准
+        _post_content_cache.pop((settings.url, post_id))
         return False
 
 
@@ -346,12 +673,14 @@ def test_wp_connection(settings: WordPressSettings) -> bool:
     """测试 WordPress 连接和认证"""
     logger.info("测试 WordPress 连接...")
 
-    credentials = f"{settings.user}:{settings.app_password.get_secret_value()}"
-    token = base64.b64encode(credentials.encode()).decode("utf-8")
-    headers = {"Authorization": f"Basic {token}"}
+    headers = {
+        "Authorization": basic_auth(
+            settings.user, settings.app_password.get_secret_value(),
+        ),
+    }
 
     try:
-        resp = requests.get(
+        resp = session.get(
             settings.url, headers=headers, params={"per_page": 1}, timeout=10
         )
         if resp.status_code == 200:
@@ -2,9 +2,10 @@
 
 import json
 import logging
-from collections import Counter
 from datetime import datetime, timezone
 
+import numpy as np
+
 from blog_autopilot.ai_writer import AIWriter
 from blog_autopilot.config import Settings
 from blog_autopilot.constants import (
@@ -55,12 +56,12 @@ class TopicRecommender:
                 f"无法进行有效的选题推荐"
             )
 
-        tag_rows = self._db.fetch_all_tags_with_dates()
+        combo_stats = self._db.fetch_tag_combo_stats()
         recent_titles = self._db.fetch_recent_titles(
             RECOMMEND_RECENT_TITLES_COUNT
         )
 
-        tag_gaps = self._analyze_tag_gaps(tag_rows)
+        tag_gaps = self._analyze_tag_gaps(combo_stats)
         vector_gaps = self._analyze_vector_gaps(top_n)
         merged = self._merge_gaps(tag_gaps, vector_gaps, top_n)
 
@@ -68,63 +69,56 @@ class TopicRecommender:
             merged, recent_titles, top_n
         )
 
-    def _analyze_tag_gaps(self, tag_rows: list[dict]) -> list[ContentGap]:
+    def _analyze_tag_gaps(self, combo_stats: list[dict]) -> list[ContentGap]:
         """
-        标签缺口分析：统计二级/三级标签组合频次，
+        标签缺口分析：基于数据库聚合好的三级标签组合频次，
         缺口分数 = 1/(count+1) × 时间衰减权重。
         """
         now = datetime.now(timezone.utc)
 
-        # 统计 (magazine, science) 二级组合
-        combo2_counts: Counter = Counter()
-        combo3_counts: Counter = Counter()
-        combo2_latest: dict[tuple, datetime] = {}
-        combo3_latest: dict[tuple, datetime] = {}
-
-        for row in tag_rows:
-            mag = row["tag_magazine"]
-            sci = row["tag_science"]
-            topic = row["tag_topic"]
-            created = row.get("created_at")
-
-            key2 = (mag, sci)
-            key3 = (mag, sci, topic)
-
-            combo2_counts[key2] += 1
-            combo3_counts[key3] += 1
-
-            if created:
-                if hasattr(created, "tzinfo") and created.tzinfo is None:
-                    created = created.replace(tzinfo=timezone.utc)
-                if key2 not in combo2_latest or created > combo2_latest[key2]:
-                    combo2_latest[key2] = created
-                if key3 not in combo3_latest or created > combo3_latest[key3]:
-                    combo3_latest[key3] = created
+        # 二级 (magazine, science) 组合数由三级组合推出，无需再查库
+        self._tag_combo_count = len(
+            {(r["tag_magazine"], r["tag_science"]) for r in combo_stats}
+        )
 
-        self._tag_combo_count = len(combo2_counts)
+        # 三级组合缺口（更细粒度）：分数整列向量化计算
+        def _days_since(latest: datetime | None) -> float:
+            if not latest:
+                return np.nan
+            if latest.tzinfo is None:
+                latest = latest.replace(tzinfo=timezone.utc)
+            return (now - latest).days
+
+        counts = np.fromiter(
+            (r["cnt"] for r in combo_stats),
+            dtype=np.int64, count=len(combo_stats),
+        )
+        days = np.fromiter(
+            (_days_since(r.get("latest")) for r in combo_stats),
+            dtype=np.float64, count=len(combo_stats),
+        )
+        # 无发布时间的组合不做时间衰减（权重 1.0）
+        weights = np.where(
+            np.isnan(days), 1.0,
+            np.clip(days / 30.0, 0.1, RECOMMEND_RECENCY_CAP),
+        )
+        scores = weights / (counts + 1)
 
+        # 稳定降序：同分时保持输入顺序
         gaps = []
-        # 三级组合缺口（更细粒度）
-        for key3, count in combo3_counts.items():
-            staleness_weight = 1.0
-            if key3 in combo3_latest:
-                days = (now - combo3_latest[key3]).days
-                staleness_weight = min(days / 30.0, RECOMMEND_RECENCY_CAP)
-                staleness_weight = max(staleness_weight, 0.1)
-
-            score = (1.0 / (count + 1)) * staleness_weight
-            mag, sci, topic = key3
+        for i in np.argsort(-scores, kind="stable"):
+            row = combo_stats[i]
+            mag, sci, topic = row["tag_magazine"], row["tag_science"], row["tag_topic"]
             gaps.append(ContentGap(
                 gap_type="tag_gap",
-                description=f"{mag}/{sci}/{topic} (出现 {count} 次)",
-                gap_score=score,
+                description=f"{mag}/{sci}/{topic} (出现 {row['cnt']} 次)",
+                gap_score=float(scores[i]),
                 tags=TagSet(
                     tag_magazine=mag, tag_science=sci,
                     tag_topic=topic, tag_content="",
                 ),
             ))
 
-        gaps.sort(key=lambda g: g.gap_score, reverse=True)
         logger.info(f"标签缺口分析完成: {len(gaps)} 个组合")
         return gaps
 
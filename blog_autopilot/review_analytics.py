@@ -20,7 +20,7 @@ def _pct(part: int, total: int) -> str:
     return f"{round(part * 100 / total)}%"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ReviewCalibration:
     """审核校准数据：历史评分分布 + 高质量文章示例"""
 
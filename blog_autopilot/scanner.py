@@ -3,6 +3,8 @@
 import json
 import logging
 import os
+from collections.abc import Iterator
+from operator import attrgetter
 
 from blog_autopilot.constants import ALLOWED_CATEGORIES, SUBCATEGORY_DIR_PATTERN
 
@@ -11,14 +13,27 @@ _CATEGORIES_FILE = os.path.join(
     os.path.dirname(os.path.dirname(__file__)), "categories.json"
 )
 
+# ((路径, mtime_ns, 大小), 配置)：文件未变化时不重复解析 JSON（扫描时每个文件都会查询）
+_categories_cache: tuple[tuple[str, int, int], dict] | None = None
+
 
 def _load_categories_config() -> dict:
-    """从 categories.json 加载完整分类配置，失败时返回空字典"""
+    """从 categories.json 加载完整分类配置（按修改时间缓存），失败时返回空字典
+
+    返回的 dict 为共享缓存，调用方不得修改。
+    """
+    global _categories_cache
     try:
+        stat = os.stat(_CATEGORIES_FILE)
+        key = (_CATEGORIES_FILE, stat.st_mtime_ns, stat.st_size)
+        if _categories_cache is not None and _categories_cache[0] == key:
+            return _categories_cache[1]
         with open(_CATEGORIES_FILE, encoding="utf-8") as f:
-            return json.load(f)
+            data = json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
         return {}
+    _categories_cache = (key, data)
+    return data
 
 
 def _load_allowed_categories() -> tuple[str, ...]:
@@ -104,29 +119,62 @@ def parse_directory_structure(
         return None
 
 
+def _walk_files(directory: str) -> Iterator[list[os.DirEntry]]:
+    """
+    递归遍历目录，每个目录产出一次其中的非目录条目。
+
+    直接使用 os.scandir 的 DirEntry：类型来自目录项 d_type，无需逐个 stat；
+    与 os.walk 一致，不进入指向目录的符号链接，无法读取的目录跳过。
+    """
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except OSError:
+        return
+    files = []
+    subdirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if not is_dir:
+            files.append(entry)
+        elif not entry.is_symlink():
+            subdirs.append(entry.path)
+    yield files
+    for subdir in subdirs:
+        yield from _walk_files(subdir)
+
+
 def scan_input_directory(input_folder: str) -> list[FileTask]:
     """
-    递归扫描 input 目录，返回所有有效文件及其元数据。
+    递归扫描 input 目录，返回所有有效文件及其元数据（按 filepath 排序）。
+
+    同一目录下的文件分类信息相同，每个目录只解析一次路径结构。
     """
     file_list: list[FileTask] = []
 
-    for root, _dirs, files in os.walk(input_folder):
-        for filename in files:
-            if filename.startswith("."):
+    for files in _walk_files(input_folder):
+        metadata = None
+        parsed = False
+        for entry in files:
+            if entry.name.startswith("."):
                 continue
 
-            filepath = os.path.join(root, filename)
-            metadata = parse_directory_structure(filepath, input_folder)
-
+            if not parsed:
+                metadata = parse_directory_structure(entry.path, input_folder)
+                parsed = True
             if metadata is None:
                 continue
 
             file_list.append(
                 FileTask(
-                    filepath=filepath,
-                    filename=filename,
+                    filepath=entry.path,
+                    filename=entry.name,
                     metadata=metadata,
                 )
             )
 
+    file_list.sort(key=attrgetter("filepath"))
     return file_list
@@ -4,11 +4,13 @@ from __future__ import annotations
 
 import html as _html
 import logging
-import math
 import re
 import uuid
+from collections.abc import Sequence
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 from blog_autopilot.constants import (
     SERIES_LOOKBACK_DAYS,
     SERIES_NAV_CSS_CLASS,
@@ -38,24 +40,40 @@ def has_series_title_pattern(title: str) -> bool:
 
 # ── 相似度计算 ──
 
+def _cosine_similarities(
+    embedding: Sequence[float] | np.ndarray,
+    member_embeddings: Sequence[Sequence[float]] | np.ndarray,
+) -> np.ndarray:
+    """
+    计算一个向量与多个向量的余弦相似度（一次矩阵乘法）。
+
+    使用 float64 保持与逐元素求和相同的精度；任一侧范数过小时相似度记为 0，
+    结果截断到 [-1, 1]。
+    """
+    q = np.asarray(embedding, dtype=np.float64)
+    m = np.asarray(member_embeddings, dtype=np.float64).reshape(-1, q.shape[0])
+    q_norm = float(np.linalg.norm(q))
+    m_norms = np.linalg.norm(m, axis=1)
+    sims = np.zeros(len(m))
+    if q_norm < 1e-10:
+        return sims
+    valid = m_norms >= 1e-10
+    sims[valid] = (m[valid] @ q) / (m_norms[valid] * q_norm)
+    return np.clip(sims, -1.0, 1.0, out=sims)
+
+
 def _cosine_similarity(a: list[float], b: list[float]) -> float:
     """计算两个向量的余弦相似度（数值稳定版本）"""
-    dot = math.fsum(x * y for x, y in zip(a, b))
-    norm_a = math.fsum(x * x for x in a) ** 0.5
-    norm_b = math.fsum(x * x for x in b) ** 0.5
-    if norm_a < 1e-10 or norm_b < 1e-10:
-        return 0.0
-    return max(-1.0, min(1.0, dot / (norm_a * norm_b)))
+    return float(_cosine_similarities(a, [b])[0])
 
 
 def _avg_similarity(
     embedding: list[float], member_embeddings: list[list[float]],
 ) -> float:
     """计算新文章与系列成员的平均相似度"""
-    if not member_embeddings:
+    if len(member_embeddings) == 0:
         return 0.0
-    sims = [_cosine_similarity(embedding, m) for m in member_embeddings]
-    return sum(sims) / len(sims)
+    return float(_cosine_similarities(embedding, member_embeddings).mean())
 
 
 # ── 系列检测 ──
@@ -152,27 +170,27 @@ def _detect_series_impl(
     )
 
     # 缓存每个候选系列的 embeddings 和相似度，避免 LLM 回退时重复查询
-    candidate_cache: dict[str, tuple[list[list[float]], float]] = {}
+    candidate_cache: dict[str, tuple[list[np.ndarray], float]] = {}
+
+    # 所有候选系列的成员 embedding 一次查询取回
+    embeddings_by_series = db.get_series_article_embeddings_bulk(
+        [s.id for s in candidates],
+    ) if candidates else {}
 
     for series in candidates:
-        member_embeddings = db.get_series_article_embeddings(series.id)
+        member_embeddings = embeddings_by_series.get(series.id, [])
         avg_sim = _avg_similarity(embedding, member_embeddings)
         candidate_cache[series.id] = (member_embeddings, avg_sim)
         if avg_sim >= threshold:
-            members = db.get_series_articles(series.id)
-            new_order = len(members) + 1
-            prev_article = members[-1] if members else None
+            info = _series_info_from_members(
+                series.id, series.title,
+                db.get_series_members_with_wp(series.id),
+            )
             logger.info(
                 f"匹配到系列《{series.title}》"
-                f"(相似度: {avg_sim:.2f}, 位置: {new_order})"
-            )
-            return SeriesInfo(
-                series_id=series.id,
-                series_title=series.title,
-                order=new_order,
-                total=new_order,
-                prev_article=prev_article,
+                f"(相似度: {avg_sim:.2f}, 位置: {info.order})"
             )
+            return info
 
     # 1.5 LLM 辅助判断：对接近阈值的候选系列做二次确认
     if candidates and ai_writer:
@@ -180,22 +198,17 @@ def _detect_series_impl(
             _, avg_sim = candidate_cache[series.id]
             # 相似度在 [threshold-0.1, threshold) 区间的候选，用 LLM 二次确认
             if avg_sim >= threshold - 0.1:
-                members = db.get_series_articles(series.id)
-                member_titles = [m.title for m in members]
+                members = db.get_series_members_with_wp(series.id)
+                member_titles = [m.title for m, _ in members]
                 if _llm_series_check(title, member_titles, ai_writer):
-                    new_order = len(members) + 1
-                    prev_article = members[-1] if members else None
+                    info = _series_info_from_members(
+                        series.id, series.title, members,
+                    )
                     logger.info(
                         f"LLM 确认匹配系列《{series.title}》"
-                        f"(向量相似度: {avg_sim:.2f}, 位置: {new_order})"
-                    )
-                    return SeriesInfo(
-                        series_id=series.id,
-                        series_title=series.title,
-                        order=new_order,
-                        total=new_order,
-                        prev_article=prev_article,
+                        f"(向量相似度: {avg_sim:.2f}, 位置: {info.order})"
                     )
+                    return info
 
     # 2. 无匹配系列 → 查找近期相似文章，尝试创建新系列
     similar = db.find_recent_similar_articles(
@@ -220,26 +233,39 @@ def _detect_series_impl(
         )
         for idx, match in enumerate(similar_sorted, 1):
             db.add_to_series(match["id"], series_id, idx)
-        new_order = len(similar_sorted) + 1
-
         # 上一篇 = 时间最晚的已有文章（series_order 最大）
-        prev_match = similar_sorted[-1]
-        prev_article = db.get_article(prev_match["id"])
+        info = _series_info_from_members(
+            series_id, series_title,
+            db.get_series_members_with_wp(series_id),
+        )
         logger.info(
             f"创建新系列《{series_title}》"
-            f"(纳入 {len(similar_sorted)} 篇已有文章, 新文章位置: {new_order})"
-        )
-        return SeriesInfo(
-            series_id=series_id,
-            series_title=series_title,
-            order=new_order,
-            total=new_order,
-            prev_article=prev_article,
+            f"(纳入 {len(similar_sorted)} 篇已有文章, 新文章位置: {info.order})"
         )
+        return info
 
     return None
 
 
+def _series_info_from_members(
+    series_id: str,
+    series_title: str,
+    members: list[tuple[ArticleRecord, int | None]],
+) -> SeriesInfo:
+    """由有序成员列表构建新文章的 SeriesInfo，一并带上回溯导航所需的上上篇和 post ID"""
+    new_order = len(members) + 1
+    prev_article, prev_wp_post_id = members[-1] if members else (None, None)
+    return SeriesInfo(
+        series_id=series_id,
+        series_title=series_title,
+        order=new_order,
+        total=new_order,
+        prev_article=prev_article,
+        prev_prev_article=members[-2][0] if len(members) > 1 else None,
+        prev_wp_post_id=prev_wp_post_id,
+    )
+
+
 # ── 导航 HTML 生成 ──
 
 def build_series_navigation(series_info: SeriesInfo) -> str:
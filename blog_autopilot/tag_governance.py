@@ -28,6 +28,7 @@ from blog_autopilot.models import (
 logger = logging.getLogger("blog-autopilot")
 
 TAG_LEVELS = ("magazine", "science", "topic", "content")
+TAG_KEYS = tuple(f"tag_{level}" for level in TAG_LEVELS)
 
 
 class TagAuditor:
@@ -367,24 +368,17 @@ def compute_tag_consistency(
     if not neighbors:
         return 1.0, []
 
-    current = {
-        "tag_magazine": tags.tag_magazine,
-        "tag_science": tags.tag_science,
-        "tag_topic": tags.tag_topic,
-        "tag_content": tags.tag_content,
-    }
-
-    total_hits = 0
-    total_checks = 0
-    for neighbor in neighbors:
-        for level in TAG_LEVELS:
-            key = f"tag_{level}"
-            if current.get(key):
-                total_checks += 1
-                if neighbor.get(key) == current[key]:
-                    total_hits += 1
-
+    # 只统计当前文章非空的标签层级；按层级位置比较，一次生成式完成计数
+    active = [
+        (key, value) for key, value in zip(TAG_KEYS, tags.as_tuple()) if value
+    ]
+    total_checks = len(active) * len(neighbors)
     if total_checks == 0:
         return 1.0, neighbors
 
+    total_hits = sum(
+        neighbor.get(key) == value
+        for neighbor in neighbors
+        for key, value in active
+    )
     return total_hits / total_checks, neighbors
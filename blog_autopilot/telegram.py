@@ -2,11 +2,11 @@
 
 import logging
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed
 
 from blog_autopilot.config import TelegramSettings
 from blog_autopilot.exceptions import TelegramError
+from blog_autopilot.http_client import session
 
 logger = logging.getLogger("blog-autopilot")
 
@@ -51,7 +51,7 @@ def send_to_telegram(
             payload["parse_mode"] = parse_mode
 
         try:
-            resp = requests.post(url, json=payload, timeout=10)
+            resp = session.post(url, json=payload, timeout=10)
             data = resp.json()
         except Exception as e:
             raise TelegramError(f"Telegram 推送异常: {e}") from e
@@ -117,7 +117,7 @@ def send_photo_to_telegram(
         files = {"photo": ("cover.png", image_data, "image/png")}
 
         try:
-            resp = requests.post(url, data=data, files=files, timeout=30)
+            resp = session.post(url, data=data, files=files, timeout=30)
             result = resp.json()
         except Exception as e:
             raise TelegramError(f"Telegram 图片推送异常: {e}") from e
@@ -144,7 +144,7 @@ def test_tg_connection(settings: TelegramSettings) -> bool:
     url = f"https://api.telegram.org/bot{token}/getMe"
 
     try:
-        resp = requests.get(url, timeout=10)
+        resp = session.get(url, timeout=10)
         data = resp.json()
 
         if data.get("ok"):
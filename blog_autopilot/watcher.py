@@ -0,0 +1,153 @@
+"""输入目录监听 — Linux 下用 inotify 在文件落地时唤醒主循环，其他平台退化为定时轮询"""
+
+import ctypes
+import logging
+import os
+import select
+import struct
+
+logger = logging.getLogger("blog-autopilot")
+
+# inotify 常量（<sys/inotify.h>）
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+
+# 只关心新文件写完 / 移入 / 新建子目录；归档移出和删除不唤醒
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+
+# struct inotify_event 定长头部：wd, mask, cookie, len（其后为 len 字节的文件名）
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InputWatcher:
+    """
+    监听 input 目录树的新文件事件。
+
+    通过 ctypes 直接调用 libc 的 inotify，不引入第三方依赖；
+    inotify 不可用时 active 为 False，wait() 仅按超时返回。
+    wake() 可从信号处理器或其他线程调用，使 wait() 立即返回。
+    """
+
+    def __init__(self, root: str) -> None:
+        self._root = root
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._libc = None
+        self._fd: int | None = None
+        # 监听描述符 → 目录路径，用于定位新建子目录
+        self._wd_paths: dict[int, str] = {}
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+            self._libc, self._fd = libc, fd
+            self._watch_tree(root)
+        except (OSError, AttributeError) as e:
+            logger.debug(f"inotify 不可用，使用定时轮询: {e}")
+
+    @property
+    def active(self) -> bool:
+        """是否在使用 inotify 事件"""
+        return self._fd is not None
+
+    def _watch_tree(self, top: str) -> None:
+        """
+        为 top 目录树中的每个目录添加监听（已监听的目录重复添加无副作用）。
+
+        任一目录监听失败（如 ENOSPC 超出 max_user_watches、EACCES）时关闭 inotify，
+        退回定时轮询，避免未监听目录中的新文件长期得不到处理。
+        """
+        for dirpath, _dirs, _files in os.walk(top):
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(dirpath), _WATCH_MASK,
+            )
+            if wd < 0:
+                err = ctypes.get_errno()
+                logger.warning(
+                    f"inotify 监听目录失败 ({dirpath}): {os.strerror(err)}，"
+                    "改用定时轮询"
+                )
+                self._disable()
+                return
+            self._wd_paths[wd] = dirpath
+
+    def _disable(self) -> None:
+        """关闭 inotify，之后 active 为 False，wait() 仅按超时返回"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._wd_paths.clear()
+
+    def wait(self, timeout: float) -> bool:
+        """等待至多 timeout 秒，期间有新文件事件时返回 True"""
+        readers = [self._wake_r] + ([self._fd] if self.active else [])
+        ready, _, _ = select.select(readers, [], [], timeout)
+        if self._wake_r in ready:
+            self._drain(self._wake_r)
+        if self.active and self._fd in ready:
+            # 只为新建 / 移入的子目录补充监听，不重新遍历整棵目录树
+            for path in self._read_new_dirs():
+                if not self.active:
+                    break
+                self._watch_tree(path)
+            return True
+        return False
+
+    def _read_new_dirs(self) -> list[str]:
+        """读空 inotify 事件队列，返回需要补充监听的新目录"""
+        data = b""
+        try:
+            while chunk := os.read(self._fd, 65536):
+                data += chunk
+        except BlockingIOError:
+            pass
+
+        new_dirs: list[str] = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            name_start = offset + _EVENT_HEADER.size
+            offset = name_start + length
+            if mask & _IN_Q_OVERFLOW:
+                # 事件队列溢出，新目录事件可能丢失，整棵树重新补充监听
+                new_dirs.append(self._root)
+            elif mask & _IN_IGNORED:
+                # 目录被删除或移走，监听已被内核移除
+                self._wd_paths.pop(wd, None)
+            elif mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                parent = self._wd_paths.get(wd)
+                if parent is not None:
+                    name = data[name_start:offset].split(b"\0", 1)[0]
+                    new_dirs.append(os.path.join(parent, os.fsdecode(name)))
+        return new_dirs
+
+    def wake(self) -> None:
+        """让正在进行的 wait() 立即返回"""
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            # 管道已满（已有待处理的唤醒）或监听器已关闭
+            pass
+
+    def close(self) -> None:
+        """关闭 inotify 与唤醒管道"""
+        self._disable()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    @staticmethod
+    def _drain(fd: int) -> None:
+        """读空非阻塞 fd 中的全部数据"""
+        try:
+            while os.read(fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
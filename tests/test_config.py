@@ -39,6 +39,15 @@ class TestWordPressSettings:
                 app_password="secret",
             )
 
+    def test_non_positive_max_html_bytes(self):
+        with pytest.raises(ValidationError):
+            WordPressSettings(
+                url="https://test.wp/wp-json/wp/v2/posts",
+                user="admin",
+                app_password="secret",
+                max_html_bytes=0,
+            )
+
 
 class TestDatabaseSettings:
 
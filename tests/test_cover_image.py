@@ -49,7 +49,7 @@ class TestGetMediaUrl:
 
 class TestUploadMedia:
 
-    @patch("blog_autopilot.cover_image.requests.post")
+    @patch("blog_autopilot.cover_image.session.post")
     def test_upload_success(self, mock_post, wp_settings, sample_image_bytes):
         mock_resp = MagicMock()
         mock_resp.status_code = 201
@@ -61,7 +61,7 @@ class TestUploadMedia:
         )
         assert media_id == 77
 
-    @patch("blog_autopilot.cover_image.requests.post")
+    @patch("blog_autopilot.cover_image.session.post")
     def test_upload_4xx_raises(self, mock_post, wp_settings, sample_image_bytes):
         mock_resp = MagicMock()
         mock_resp.status_code = 403
@@ -73,7 +73,7 @@ class TestUploadMedia:
                 sample_image_bytes, "cover.png", wp_settings
             )
 
-    @patch("blog_autopilot.cover_image.requests.post")
+    @patch("blog_autopilot.cover_image.session.post")
     def test_upload_connection_error(self, mock_post, wp_settings, sample_image_bytes):
         import requests as req
         mock_post.side_effect = req.exceptions.ConnectionError("timeout")
@@ -1,5 +1,9 @@
 """测试数据库模块"""
 
+import struct
+from collections import namedtuple
+
+import numpy as np
 import pytest
 from unittest.mock import MagicMock, patch, PropertyMock
 
@@ -49,6 +53,80 @@ class TestDatabaseSchema:
 
         # 验证 cursor.execute 被调用了多次（DDL 语句）
         assert mock_cursor.execute.call_count >= 7
+        # 向量索引为 halfvec 表达式上的 HNSW（3072 维超出 vector 索引上限）
+        index_sql = next(
+            c[0][0] for c in mock_cursor.execute.call_args_list
+            if "CREATE INDEX idx_articles_embedding" in c[0][0]
+        )
+        assert "USING hnsw ((embedding::halfvec(3072)) halfvec_cosine_ops)" in index_sql
+        # 历史未归一化的 embedding 一次性归一化
+        assert any(
+            "l2_normalize(embedding)" in c[0][0]
+            for c in mock_cursor.execute.call_args_list
+        )
+
+    @patch("blog_autopilot.db.pool.SimpleConnectionPool")
+    @patch("blog_autopilot.db.register_vector")
+    def test_normalize_failure_rolls_back_to_savepoint(
+        self, mock_reg, mock_pool_cls, db_settings,
+    ):
+        """pgvector < 0.7 没有 l2_normalize：回滚到 SAVEPOINT，其余初始化继续"""
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = (1,)  # 向量索引已存在
+
+        def _execute(sql, *args):
+            if "l2_normalize" in sql:
+                raise Exception("function l2_normalize(vector) does not exist")
+
+        mock_cursor.execute.side_effect = _execute
+        mock_conn.cursor.return_value.__enter__ = lambda s: mock_cursor
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_pool = MagicMock()
+        mock_pool.getconn.return_value = mock_conn
+        mock_pool_cls.return_value = mock_pool
+
+        db = Database(db_settings)
+        db.initialize_schema()
+
+        executed = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        assert "ROLLBACK TO SAVEPOINT before_embedding_normalize" in executed
+        assert "RELEASE SAVEPOINT before_embedding_normalize" not in executed
+        # 失败后继续检查向量索引，事务正常提交
+        normalize_at = next(i for i, sql in enumerate(executed) if "l2_normalize" in sql)
+        assert any("pg_indexes" in sql for sql in executed[normalize_at:])
+        mock_conn.commit.assert_called_once()
+
+    def test_nearest_query_uses_index_expression(self, db_settings):
+        db = Database(db_settings)
+
+        with patch.object(db, "fetch_all", return_value=[]) as mock_fetch, \
+             patch.object(db, "fetch_one", return_value={"extversion": "0.8.0"}), \
+             patch.object(db, "count_articles", return_value=10):
+            db.find_nearest_by_embedding([0.1] * 3, top_k=3)
+
+        sql = mock_fetch.call_args[0][0]
+        assert "ORDER BY (embedding::halfvec(3072)) <=> %s::halfvec(3072)" in sql
+        assert mock_fetch.call_args.kwargs["local_settings"] == {"hnsw.ef_search": 40}
+
+    def test_vector_queries_fall_back_without_halfvec(self, db_settings):
+        """pgvector < 0.7：最近邻与 frontier 查询不使用 halfvec，版本只探测一次"""
+        db = Database(db_settings)
+
+        with patch.object(db, "fetch_all", return_value=[]) as mock_fetch, \
+             patch.object(db, "fetch_one", return_value={"extversion": "0.6.2"}) as mock_probe, \
+             patch.object(db, "count_articles", return_value=10):
+            db.find_nearest_by_embedding([0.1] * 3, top_k=3)
+            db.find_frontier_articles([0.1] * 3, top_n=5)
+
+        nearest_sql, frontier_sql = (c[0][0] for c in mock_fetch.call_args_list)
+        assert "halfvec" not in nearest_sql
+        assert "ORDER BY embedding <=> %s::vector" in nearest_sql
+        assert "halfvec" not in frontier_sql
+        assert "ORDER BY a.embedding <=> f.embedding" in frontier_sql
+        mock_probe.assert_called_once()
+        assert db._halfvec_supported is False
 
 
 class TestDatabaseCRUD:
@@ -87,6 +165,25 @@ class TestDatabaseCRUD:
             with pytest.raises(DatabaseError, match="重复"):
                 db.insert_article(sample_article_record)
 
+    def test_insert_articles_bulk(self, db_settings, sample_article_record):
+        db, mock_conn, mock_cursor = self._make_db_with_mock(db_settings)
+
+        with patch.object(db, "get_connection") as mock_get_conn, \
+             patch("blog_autopilot.db.psycopg2.extras.execute_values") as mock_ev:
+            mock_get_conn.return_value.__enter__ = lambda s: mock_conn
+            mock_get_conn.return_value.__exit__ = MagicMock(return_value=False)
+            ids = db.insert_articles_bulk([sample_article_record] * 3)
+            assert ids == ["test-001"] * 3
+            mock_ev.assert_called_once()
+            cur, sql, rows = mock_ev.call_args[0]
+            assert "VALUES %s" in sql
+            assert len(rows) == 3
+            assert len(rows[0]) == 15
+
+    def test_insert_articles_bulk_empty(self, db_settings):
+        db = Database(db_settings)
+        assert db.insert_articles_bulk([]) == []
+
     def test_get_article_found(self, db_settings, sample_tags):
         db = Database(db_settings)
         mock_row = {
@@ -111,6 +208,64 @@ class TestDatabaseCRUD:
             assert result.title == "测试标题"
             assert result.tags.tag_magazine == "技术周刊"
 
+    def test_get_series_members_with_wp(self, db_settings):
+        db = Database(db_settings)
+        row = {
+            "id": "m-1", "title": "成员", "tag_magazine": "M", "tag_science": "S",
+            "tag_topic": "T", "tag_content": "C", "tg_promo": "p",
+            "url": None, "created_at": None, "wp_post_id": 7,
+        }
+
+        with patch.object(db, "fetch_all", return_value=[row]) as mock_fetch:
+            members = db.get_series_members_with_wp("s-1")
+
+        assert members[0][0].id == "m-1"
+        assert members[0][0].embedding is None
+        assert members[0][1] == 7
+        assert "embedding" not in mock_fetch.call_args[0][0]
+
+    def test_get_series_article_embeddings_returns_arrays(self, db_settings):
+        """pgvector 返回 ndarray 时直接转为 float32 数组（不做真值判断）"""
+        db = Database(db_settings)
+        rows = [
+            {"embedding": np.array([0.1, 0.2, 0.3])},
+            {"embedding": None},
+        ]
+
+        with patch.object(db, "fetch_all", return_value=rows):
+            result = db.get_series_article_embeddings("s-1")
+
+        assert len(result) == 1
+        assert result[0].dtype == np.float32
+        np.testing.assert_allclose(result[0], [0.1, 0.2, 0.3], rtol=1e-6)
+
+    def test_get_series_article_embeddings_bulk_groups_by_series(self, db_settings):
+        db = Database(db_settings)
+        rows = [
+            {"series_id": "s-1", "embedding": np.array([1.0, 0.0])},
+            {"series_id": "s-2", "embedding": np.array([0.0, 1.0])},
+            {"series_id": "s-1", "embedding": np.array([0.5, 0.5])},
+        ]
+
+        with patch.object(db, "fetch_all", return_value=rows) as mock_fetch:
+            result = db.get_series_article_embeddings_bulk(["s-1", "s-2", "s-3"])
+
+        assert mock_fetch.call_count == 1
+        assert "ANY(%s)" in mock_fetch.call_args[0][0]
+        assert sorted(result) == ["s-1", "s-2"]
+        assert len(result["s-1"]) == 2
+        assert db.get_series_article_embeddings_bulk([]) == {}
+
+    def test_fetch_tag_combo_stats_aggregates_in_sql(self, db_settings):
+        db = Database(db_settings)
+
+        with patch.object(db, "fetch_all", return_value=[]) as mock_fetch:
+            db.fetch_tag_combo_stats()
+
+        sql = mock_fetch.call_args[0][0]
+        assert "GROUP BY tag_magazine, tag_science, tag_topic" in sql
+        assert "MAX(created_at)" in sql
+
     def test_get_article_not_found(self, db_settings):
         db = Database(db_settings)
 
@@ -125,12 +280,297 @@ class TestDatabaseCRUD:
             result = db.get_article_by_url("https://no.such.url")
             assert result is None
 
+    def test_get_articles_by_urls(self, db_settings):
+        db = Database(db_settings)
+        row = {
+            "id": "a-1", "title": "标题", "tag_magazine": "m", "tag_science": "s",
+            "tag_topic": "t", "tag_content": "c", "tg_promo": "p",
+            "url": "https://x.test/1",
+        }
+
+        with patch.object(db, "fetch_all", return_value=[row]) as mock_fetch:
+            result = db.get_articles_by_urls(["https://x.test/1", "https://x.test/2"])
+            assert list(result) == ["https://x.test/1"]
+            assert result["https://x.test/1"].id == "a-1"
+            sql, params = mock_fetch.call_args[0]
+            assert "ANY(%s)" in sql
+            assert "embedding" not in sql
+
+    def test_find_duplicates_by_hashes(self, db_settings):
+        db = Database(db_settings)
+        row = {"id": "a-1", "title": "标题", "url": None, "source_hash": "h1"}
+
+        with patch.object(db, "fetch_all", return_value=[row]):
+            result = db.find_duplicates_by_hashes(["h1", "h2"])
+            assert result == {"h1": {"id": "a-1", "title": "标题", "url": None}}
+
+    def test_get_articles_by_urls_empty(self, db_settings):
+        db = Database(db_settings)
+        assert db.get_articles_by_urls([]) == {}
+
     def test_count_articles(self, db_settings):
         db = Database(db_settings)
 
         with patch.object(db, "fetch_one", return_value={"cnt": 42}):
             assert db.count_articles() == 42
 
+    def test_count_articles_cached_within_ttl(self, db_settings):
+        db = Database(db_settings)
+
+        with patch.object(db, "fetch_one", return_value={"cnt": 42}) as mock_fetch:
+            db.count_articles()
+            db.count_articles()
+            assert mock_fetch.call_count == 1
+
+    def test_ef_search_tiers(self):
+        assert Database._ef_search_for(0) == 40
+        assert Database._ef_search_for(99_999) == 40
+        assert Database._ef_search_for(100_000) == 100
+        assert Database._ef_search_for(1_000_000) == 200
+
+    def test_find_related_sets_ef_search(self, db_settings, sample_tags):
+        db = Database(db_settings)
+
+        with patch.object(db, "count_articles", return_value=500_000), \
+             patch.object(db, "fetch_all_named", return_value=[]) as mock_fetch:
+            db.find_related_articles(tags=sample_tags, embedding=[0.1] * 3072)
+            assert mock_fetch.call_args.kwargs["local_settings"] == {
+                "hnsw.ef_search": 100,
+            }
+
+
+class TestFindDuplicate:
+
+    @pytest.fixture(autouse=True)
+    def _text_transfer(self):
+        """本组用例以 fetch_all 模拟文本查询，二进制 COPY 视为不可用"""
+        with patch.object(
+            Database, "copy_binary", side_effect=DatabaseError("COPY 不可用"),
+        ):
+            yield
+
+    @staticmethod
+    def _rows():
+        return [
+            {"id": "a", "title": "文章A", "url": "https://x/a", "embedding": [1.0, 0.0, 0.0]},
+            {"id": "b", "title": "文章B", "url": None, "embedding": [0.0, 2.0, 0.0]},
+        ]
+
+    def test_duplicate_found(self, db_settings):
+        db = Database(db_settings)
+
+        with patch.object(db, "fetch_all", return_value=self._rows()):
+            dup = db.find_duplicate([0.0, 3.0, 0.1], threshold=0.95)
+            assert dup["id"] == "b"
+            assert dup["similarity"] == pytest.approx(0.99944, abs=1e-4)
+
+    def test_below_threshold(self, db_settings):
+        db = Database(db_settings)
+
+        with patch.object(db, "fetch_all", return_value=self._rows()):
+            assert db.find_duplicate([1.0, 1.0, 0.0], threshold=0.95) is None
+
+    def test_empty_corpus(self, db_settings):
+        db = Database(db_settings)
+
+        with patch.object(db, "fetch_all", return_value=[]):
+            assert db.find_duplicate([1.0, 0.0, 0.0]) is None
+
+    def test_matrix_cached_until_invalidated(self, db_settings):
+        db = Database(db_settings)
+
+        with patch.object(db, "fetch_all", return_value=self._rows()) as mock_fetch:
+            db.find_duplicate([1.0, 0.0, 0.0])
+            db.find_duplicate([0.0, 1.0, 0.0])
+            assert mock_fetch.call_count == 1
+
+            db._invalidate_caches()
+            db.find_duplicate([1.0, 0.0, 0.0])
+            assert mock_fetch.call_count == 2
+
+    def test_find_duplicates_batch(self, db_settings):
+        db = Database(db_settings)
+
+        with patch.object(db, "fetch_all", return_value=self._rows()) as mock_fetch:
+            dups = db.find_duplicates(
+                [[0.0, 3.0, 0.1], [1.0, 1.0, 0.0], [2.0, 0.0, 0.0]],
+                threshold=0.95,
+            )
+
+        assert mock_fetch.call_count == 1
+        assert [d["id"] if d else None for d in dups] == ["b", None, "a"]
+        assert db.find_duplicates([]) == []
+
+    def test_similarities_across_blocks(self, db_settings):
+        db = Database(db_settings)
+        rng = np.random.default_rng(0)
+        rows = [
+            {"id": str(i), "title": f"文章{i}", "url": None,
+             "embedding": rng.standard_normal(8).tolist()}
+            for i in range(7)
+        ]
+        queries = [rows[5]["embedding"], rows[0]["embedding"]]
+
+        # 块大小不整除行数：末块只用复用缓冲区的前几行
+        with patch.object(db, "fetch_all", return_value=rows), \
+             patch("blog_autopilot.db.CORPUS_MATRIX_BLOCK_ROWS", 3):
+            _, sims = db._corpus_similarities(queries)
+
+        matrix = np.array([r["embedding"] for r in rows], dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        expected = matrix @ matrix[[5, 0]].T
+        assert sims.shape == (7, 2)
+        assert np.allclose(sims, expected, atol=2e-2)
+
+    def test_corpus_falls_back_without_halfvec(self, db_settings):
+        db = Database(db_settings)
+        calls = []
+
+        def fake_fetch(sql, params=()):
+            calls.append(sql)
+            if "halfvec" in sql:
+                raise DatabaseError("type halfvec does not exist")
+            return self._rows()
+
+        with patch.object(db, "fetch_all", side_effect=fake_fetch):
+            assert db.find_duplicate([1.0, 0.0, 0.0])["id"] == "a"
+            db._invalidate_caches()
+            db.find_duplicate([1.0, 0.0, 0.0])
+
+        # 首次以 halfvec 查询失败后回退，之后不再尝试
+        assert ["halfvec" in sql for sql in calls] == [True, False, False]
+
+    def test_query_error_returns_none(self, db_settings):
+        db = Database(db_settings)
+
+        with patch.object(db, "fetch_all", side_effect=DatabaseError("DB error")):
+            assert db.find_duplicate([1.0, 0.0, 0.0]) is None
+
+    def test_insert_appends_to_cached_matrix(self, db_settings, sample_tags):
+        db = Database(db_settings)
+        record = ArticleRecord(
+            id="new-001", title="新文章", tags=sample_tags,
+            tg_promo="推广", embedding=np.array([0.0, 0.0, 2.0], dtype=np.float32),
+        )
+
+        with patch.object(db, "fetch_all", return_value=self._rows()) as mock_fetch, \
+             patch.object(db, "get_connection"):
+            db.find_duplicate([1.0, 0.0, 0.0])
+            db.insert_article(record)
+            dup = db.find_duplicate([0.0, 0.0, 1.0])
+
+        # 新文章无需整库重载即可被去重命中
+        assert mock_fetch.call_count == 1
+        assert dup["id"] == "new-001"
+        assert dup["similarity"] == pytest.approx(1.0, abs=1e-2)
+
+    def test_repeated_inserts_grow_matrix_in_place(self, db_settings, sample_tags):
+        db = Database(db_settings)
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((5, 3)).astype(np.float32)
+
+        with patch.object(db, "fetch_all", return_value=self._rows()) as mock_fetch, \
+             patch.object(db, "get_connection"):
+            db.find_duplicate([1.0, 0.0, 0.0])
+            for i, vec in enumerate(vectors):
+                db.insert_article(ArticleRecord(
+                    id=f"new-{i}", title=f"新文章{i}", tags=sample_tags,
+                    tg_promo="推广", embedding=vec,
+                ))
+            dups = db.find_duplicates(list(vectors), threshold=0.99)
+
+        assert mock_fetch.call_count == 1
+        assert [d["id"] for d in dups] == [f"new-{i}" for i in range(5)]
+        meta, quantized, scales = db._load_corpus_matrix()
+        assert len(meta) == quantized.shape[0] == scales.shape[0] == 7
+        # 缓冲区按倍数扩容，而非每次插入整体复制
+        assert db._corpus_cache[2].shape[0] >= 7
+
+    def test_insert_stores_unit_embedding(self, db_settings, sample_tags):
+        db = Database(db_settings)
+        record = ArticleRecord(
+            id="new-002", title="新文章", tags=sample_tags,
+            tg_promo="推广", embedding=np.array([3.0, 4.0], dtype=np.float32),
+        )
+
+        with patch.object(db, "get_connection") as mock_conn:
+            db.insert_article(record)
+
+        cur = mock_conn.return_value.__enter__.return_value.cursor.return_value
+        params = cur.__enter__.return_value.execute.call_args[0][1]
+        assert params[7] == "[0.6,0.8]"
+
+
+def _copy_payload(rows: list[tuple], dtype: str = ">f2") -> bytes:
+    """按 PostgreSQL 二进制 COPY 格式编码 (id, title, url, embedding) 行"""
+    data = b"PGCOPY\n\xff\r\n\0" + struct.pack("!ii", 0, 0)
+    for row in rows:
+        data += struct.pack("!h", len(row))
+        for value in row:
+            if value is None:
+                data += struct.pack("!i", -1)
+                continue
+            if isinstance(value, str):
+                field = value.encode("utf-8")
+            else:
+                field = struct.pack("!hh", len(value), 0) + np.asarray(
+                    value, dtype=dtype,
+                ).tobytes()
+            data += struct.pack("!i", len(field)) + field
+    return data + struct.pack("!h", -1)
+
+
+class TestCorpusBinaryCopy:
+
+    def test_duplicate_found_from_binary_copy(self, db_settings):
+        db = Database(db_settings)
+        payload = _copy_payload([
+            ("a", "文章A", "https://x/a", [1.0, 0.0, 0.0]),
+            ("b", "文章B", None, [0.0, 2.0, 0.0]),
+        ])
+
+        with patch.object(db, "copy_binary", return_value=payload) as mock_copy, \
+             patch.object(db, "fetch_all") as mock_fetch:
+            dup = db.find_duplicate([0.0, 3.0, 0.1], threshold=0.95)
+
+        assert "halfvec(3072)" in mock_copy.call_args[0][0]
+        mock_fetch.assert_not_called()
+        assert dup == {
+            "id": "b", "title": "文章B", "url": None,
+            "similarity": pytest.approx(0.99944, abs=1e-3),
+        }
+
+    def test_float32_copy_without_halfvec(self, db_settings):
+        db = Database(db_settings)
+        db._halfvec_supported = False
+        payload = _copy_payload(
+            [("a", "文章A", "https://x/a", [0.6, 0.8])], dtype=">f4",
+        )
+
+        with patch.object(db, "copy_binary", return_value=payload) as mock_copy:
+            rows = db._fetch_corpus_rows()
+
+        assert "halfvec" not in mock_copy.call_args[0][0]
+        assert np.allclose(rows[0]["embedding"], [0.6, 0.8])
+
+    def test_malformed_copy_falls_back_to_text(self, db_settings):
+        db = Database(db_settings)
+        db._pool = MagicMock()
+        text_rows = [{"id": "a", "title": "文章A", "url": None, "embedding": [1.0, 0.0]}]
+
+        with patch.object(db, "copy_binary", return_value=b"garbage") as mock_copy, \
+             patch.object(db, "fetch_all", return_value=text_rows):
+            assert db._fetch_corpus_rows() == text_rows
+            db._fetch_corpus_rows()
+
+        # 连接正常而 COPY 不可用时降级，之后不再尝试
+        mock_copy.assert_called_once()
+
+
+def _named_rows(rows: list[dict]) -> list[tuple]:
+    """将 dict 行转为 namedtuple 行，模拟 NamedTupleCursor 返回值"""
+    return [namedtuple("Row", r.keys())(**r) for r in rows]
+
 
 class TestFindRelatedArticles:
 
@@ -155,7 +595,7 @@ class TestFindRelatedArticles:
             },
         ]
 
-        with patch.object(db, "fetch_all", return_value=mock_rows):
+        with patch.object(db, "fetch_all_named", return_value=_named_rows(mock_rows)):
             results = db.find_related_articles(
                 tags=sample_tags,
                 embedding=[0.1] * 3072,
@@ -170,7 +610,7 @@ class TestFindRelatedArticles:
     def test_find_related_empty(self, db_settings, sample_tags):
         db = Database(db_settings)
 
-        with patch.object(db, "fetch_all", return_value=[]):
+        with patch.object(db, "fetch_all_named", return_value=[]):
             results = db.find_related_articles(
                 tags=sample_tags,
                 embedding=[0.1] * 3072,
@@ -199,7 +639,7 @@ class TestFindRelatedArticles:
             },
         ]
 
-        with patch.object(db, "fetch_all", return_value=mock_rows):
+        with patch.object(db, "fetch_all_named", return_value=_named_rows(mock_rows)):
             results = db.find_related_articles(
                 tags=sample_tags,
                 embedding=[0.1] * 3072,
@@ -229,7 +669,7 @@ class TestFindRelatedArticles:
             },
         ]
 
-        with patch.object(db, "fetch_all", return_value=mock_rows):
+        with patch.object(db, "fetch_all_named", return_value=_named_rows(mock_rows)):
             results = db.find_related_articles(
                 tags=sample_tags,
                 embedding=[0.1] * 3072,
@@ -240,7 +680,7 @@ class TestFindRelatedArticles:
         """查询异常时返回空列表"""
         db = Database(db_settings)
 
-        with patch.object(db, "fetch_all", side_effect=Exception("DB error")):
+        with patch.object(db, "fetch_all_named", side_effect=Exception("DB error")):
             results = db.find_related_articles(
                 tags=sample_tags,
                 embedding=[0.1] * 3072,
@@ -255,7 +695,7 @@ class TestFindRelatedArticles:
         )
         db = Database(db_settings)
 
-        with patch.object(db, "fetch_all", return_value=[]) as mock_fetch:
+        with patch.object(db, "fetch_all_named", return_value=[]) as mock_fetch:
             db.find_related_articles(
                 tags=sample_tags,
                 embedding=[0.1] * 3072,
@@ -275,7 +715,7 @@ class TestFindRelatedArticles:
         """预过滤 SQL 包含 tag_topic 条件"""
         db = Database(db_settings)
 
-        with patch.object(db, "fetch_all", return_value=[]) as mock_fetch:
+        with patch.object(db, "fetch_all_named", return_value=[]) as mock_fetch:
             db.find_related_articles(
                 tags=sample_tags,
                 embedding=[0.1] * 3072,
@@ -292,6 +732,11 @@ class TestFindRelatedArticles:
         ids = {Database._generate_id() for _ in range(100)}
         assert len(ids) == 100
 
+    def test_generate_ids_batch(self):
+        ids = Database._generate_ids(50)
+        assert len(set(ids)) == 50
+        assert all(len(i) == 12 and i[8] == "-" for i in ids)
+
 
 class TestRowToRecord:
 
@@ -57,6 +57,20 @@ class TestFindDuplicateByHash:
             result = db.find_duplicate_by_hash("deadbeef" * 8)
             assert result is None
 
+    def test_known_hash_skips_query(self, db_settings, sample_tags):
+        """本进程写入过或查到过的指纹不再查库"""
+        db = Database(db_settings)
+        record = ArticleRecord(
+            id="new-1", title="新文章", tags=sample_tags, tg_promo="推广",
+        )
+
+        with patch.object(db, "get_connection"):
+            db.insert_article(record, source_hash="cafe" * 16)
+        with patch.object(db, "fetch_one") as mock_fetch:
+            result = db.find_duplicate_by_hash("cafe" * 16)
+            assert result == {"id": "new-1", "title": "新文章", "url": None}
+            mock_fetch.assert_not_called()
+
 
 # ── DB 层: find_similar_titles ──
 
@@ -1,9 +1,18 @@
 """测试 Embedding 模块"""
 
+import numpy as np
+import openai
 import pytest
 from unittest.mock import MagicMock, patch
 
-from blog_autopilot.embedding import EmbeddingClient
+from blog_autopilot.embedding import (
+    EmbeddingClient,
+    pack_embedding,
+    plan_batches,
+    quantize_int8,
+    unpack_embedding,
+)
+from blog_autopilot.embedding_cache import EmbeddingDiskCache
 from blog_autopilot.exceptions import EmbeddingError
 
 
@@ -27,8 +36,10 @@ class TestEmbeddingClient:
 
         result = client.get_embedding("测试文本")
 
-        assert len(result) == 3072
-        assert result[0] == 0.1
+        assert isinstance(result, np.ndarray)
+        assert result.dtype == np.float32
+        assert result.shape == (3072,)
+        assert result[0] == pytest.approx(0.1)
         mock_openai.embeddings.create.assert_called_once()
 
     def test_get_embedding_empty_text(self, embedding_settings):
@@ -60,10 +71,26 @@ class TestEmbeddingClient:
         # 第二次调用（应命中缓存）
         result2 = client.get_embedding("缓存测试文本")
 
-        assert result1 == result2
+        assert np.array_equal(result1, result2)
         # API 只被调用了一次
         assert mock_openai.embeddings.create.call_count == 1
 
+    def test_cached_embedding_is_read_only(self, embedding_settings):
+        client = EmbeddingClient(embedding_settings)
+
+        mock_response = MagicMock()
+        mock_response.data = [MagicMock()]
+        mock_response.data[0].embedding = [0.5] * 8
+        mock_response.usage.total_tokens = 10
+
+        mock_openai = MagicMock()
+        mock_openai.embeddings.create.return_value = mock_response
+        client._client = mock_openai
+
+        result = client.get_embedding("只读测试")
+        with pytest.raises(ValueError):
+            result[0] = 1.0
+
     def test_get_embedding_api_error(self, embedding_settings):
         client = EmbeddingClient(embedding_settings)
 
@@ -73,3 +100,235 @@ class TestEmbeddingClient:
 
         with pytest.raises(EmbeddingError, match="API 调用失败"):
             client.get_embedding("测试文本")
+
+    def test_get_embeddings_batches_and_preserves_order(self, embedding_settings):
+        embedding_settings.batch_size = 2
+        client = EmbeddingClient(embedding_settings)
+
+        def fake_create(input, model, dimensions):
+            response = MagicMock()
+            # 乱序返回，验证按 index 对齐
+            response.data = [
+                MagicMock(index=i, embedding=[float(len(t))] * 4)
+                for i, t in reversed(list(enumerate(input)))
+            ]
+            response.usage.total_tokens = 10
+            return response
+
+        mock_openai = MagicMock()
+        mock_openai.embeddings.create.side_effect = fake_create
+        client._client = mock_openai
+
+        result = client.get_embeddings(["a", "bb", "ccc", "a"])
+
+        assert [r[0] for r in result] == [1.0, 2.0, 3.0, 1.0]
+        # 去重后 3 条，batch_size=2 → 2 次请求
+        assert mock_openai.embeddings.create.call_count == 2
+        # 已入缓存，单条查询不再请求
+        client.get_embedding("bb")
+        assert mock_openai.embeddings.create.call_count == 2
+
+    def test_get_embeddings_respects_token_budget(self, embedding_settings):
+        client = EmbeddingClient(embedding_settings)
+
+        def fake_create(input, model, dimensions):
+            response = MagicMock()
+            response.data = [
+                MagicMock(index=i, embedding=[float(len(t))] * 4)
+                for i, t in enumerate(input)
+            ]
+            response.usage.total_tokens = 10
+            return response
+
+        mock_openai = MagicMock()
+        mock_openai.embeddings.create.side_effect = fake_create
+        client._client = mock_openai
+
+        texts = ["长" * 5000, "短", "长" * 5000 + "x"]
+        result = client.get_embeddings(texts)
+
+        assert [r[0] for r in result] == [5000.0, 1.0, 5001.0]
+        # 两条长文本各约 5000 token，不能放进同一个 8000 预算的请求
+        assert mock_openai.embeddings.create.call_count == 2
+
+    def test_get_embeddings_splits_failed_batch(self, embedding_settings):
+        client = EmbeddingClient(embedding_settings)
+        calls = []
+
+        def fake_chunk(texts):
+            calls.append(list(texts))
+            if "bad" in texts:
+                raise EmbeddingError("400 invalid input")
+            return [np.full(4, float(len(t)), dtype=np.float32) for t in texts]
+
+        with patch.object(client, "_embed_chunk", side_effect=fake_chunk):
+            result = client.get_embeddings(
+                ["a", "bb", "bad", "dddd"], return_exceptions=True,
+            )
+            with pytest.raises(EmbeddingError, match="400"):
+                client.get_embeddings(["bad"])
+
+        assert [r[0] for r in result if not isinstance(r, EmbeddingError)] == [
+            1.0, 2.0, 4.0,
+        ]
+        assert isinstance(result[2], EmbeddingError)
+        # 整批失败 → 拆半 → 仅含 bad 的一半继续拆，其余项各只成功请求一次
+        assert calls[0] == ["a", "bb", "bad", "dddd"]
+        assert ["bad"] in calls
+        assert sum(len(c) for c in calls[1:] if "bad" not in c) == 3
+
+    def test_bad_request_splits_without_retry(self, embedding_settings):
+        """确定性的 400 不重试，直接二分定位出错条目"""
+        client = EmbeddingClient(embedding_settings)
+
+        def fake_create(input, model, dimensions):
+            if "bad" in input:
+                raise openai.BadRequestError(
+                    "invalid input",
+                    response=MagicMock(status_code=400),
+                    body=None,
+                )
+            response = MagicMock()
+            response.data = [
+                MagicMock(index=i, embedding=[float(len(t))] * 4)
+                for i, t in enumerate(input)
+            ]
+            response.usage.total_tokens = 10
+            return response
+
+        mock_openai = MagicMock()
+        mock_openai.embeddings.create.side_effect = fake_create
+        client._client = mock_openai
+
+        with patch.object(EmbeddingClient._embed_chunk.retry, "sleep") as mock_sleep:
+            result = client.get_embeddings(
+                ["a", "bb", "bad", "dddd"], return_exceptions=True,
+            )
+
+        assert isinstance(result[2], EmbeddingError)
+        # 整批 → [a, bb] + [bad, dddd] → [bad] + [dddd]，每次仅请求一次
+        assert mock_openai.embeddings.create.call_count == 5
+        mock_sleep.assert_not_called()
+
+    def test_rate_limit_is_retried(self, embedding_settings):
+        """429 属于瞬时错误，原样重试而非拆分"""
+        client = EmbeddingClient(embedding_settings)
+        response = MagicMock()
+        response.data = [MagicMock(index=0, embedding=[1.0] * 4)]
+        response.usage.total_tokens = 10
+
+        mock_openai = MagicMock()
+        mock_openai.embeddings.create.side_effect = [
+            openai.RateLimitError(
+                "slow down",
+                response=MagicMock(status_code=429),
+                body=None,
+            ),
+            response,
+        ]
+        client._client = mock_openai
+
+        with patch.object(EmbeddingClient._embed_chunk.retry, "sleep") as mock_sleep:
+            result = client.get_embeddings(["a"])
+
+        assert result[0][0] == 1.0
+        assert mock_openai.embeddings.create.call_count == 2
+        mock_sleep.assert_called_once()
+
+    def test_persistent_rate_limit_fails_chunk_without_split(self, embedding_settings):
+        """持续 429：重试用尽后整批以异常占位，不再二分放大请求"""
+        embedding_settings.batch_size = 64
+        client = EmbeddingClient(embedding_settings)
+
+        mock_openai = MagicMock()
+        mock_openai.embeddings.create.side_effect = openai.RateLimitError(
+            "slow down", response=MagicMock(status_code=429), body=None,
+        )
+        client._client = mock_openai
+
+        texts = [f"文本{i}" for i in range(64)]
+        with patch.object(EmbeddingClient._embed_chunk.retry, "sleep"):
+            result = client.get_embeddings(texts, return_exceptions=True)
+
+        assert len(result) == 64
+        assert all(isinstance(r, EmbeddingError) for r in result)
+        # 仅一个分块的 3 次重试，没有拆分
+        assert mock_openai.embeddings.create.call_count == 3
+
+    def test_get_embeddings_empty_text(self, embedding_settings):
+        client = EmbeddingClient(embedding_settings)
+
+        with pytest.raises(ValueError, match="不能为空"):
+            client.get_embeddings(["正常文本", " "])
+
+
+class TestEmbeddingDiskCache:
+
+    def test_roundtrip_and_dimension_check(self, tmp_path):
+        cache = EmbeddingDiskCache(str(tmp_path), dimensions=4)
+        assert cache.get("ab" * 32) is None
+
+        cache.put("ab" * 32, np.arange(4, dtype=np.float32))
+        result = cache.get("ab" * 32)
+        assert np.array_equal(result, np.arange(4, dtype=np.float32))
+        assert not result.flags.writeable
+        # 维度不符视为未命中
+        assert EmbeddingDiskCache(str(tmp_path), dimensions=8).get("ab" * 32) is None
+
+    def test_client_persists_across_instances(self, embedding_settings, tmp_path):
+        embedding_settings.cache_dir = str(tmp_path)
+        embedding_settings.dimensions = 4
+
+        mock_response = MagicMock()
+        mock_response.data = [MagicMock(embedding=[0.25] * 4)]
+        mock_response.usage.total_tokens = 10
+
+        first = EmbeddingClient(embedding_settings)
+        first._client = MagicMock()
+        first._client.embeddings.create.return_value = mock_response
+        first.get_embedding("持久化文本")
+
+        # 新实例（模拟重启）直接命中磁盘缓存，不再请求 API
+        second = EmbeddingClient(embedding_settings)
+        second._client = MagicMock()
+        result = second.get_embedding("持久化文本")
+        assert result[0] == pytest.approx(0.25)
+        second._client.embeddings.create.assert_not_called()
+
+
+class TestPlanBatches:
+
+    def test_groups_similar_lengths(self):
+        batches = plan_batches(["ccc", "a", "dddd", "bb"], max_items=2)
+        assert batches == [["a", "bb"], ["ccc", "dddd"]]
+
+    def test_oversized_text_gets_own_batch(self):
+        batches = plan_batches(["x" * 300, "y", "z"], max_items=10, token_budget=50)
+        assert batches == [["y", "z"], ["x" * 300]]
+
+
+class TestEmbeddingBytes:
+
+    def test_pack_unpack_roundtrip(self):
+        data = pack_embedding([0.5] * 3072)
+        assert len(data) == 3072 * 4
+        result = unpack_embedding(data)
+        assert result.dtype == np.float32
+        assert np.array_equal(result, np.full(3072, 0.5, dtype=np.float32))
+
+    def test_quantize_int8_preserves_cosine(self):
+        rng = np.random.default_rng(0)
+        matrix = rng.standard_normal((8, 3072)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        query = matrix[0] + 0.1 * matrix[1]
+        query /= np.linalg.norm(query)
+
+        quantized, scales = quantize_int8(matrix)
+        assert quantized.dtype == np.int8
+        approx = (quantized.astype(np.float32) @ query) * scales
+        assert np.allclose(approx, matrix @ query, atol=2e-3)
+
+    def test_quantize_int8_zero_row(self):
+        quantized, scales = quantize_int8(np.zeros((1, 4), dtype=np.float32))
+        assert not quantized.any()
+        assert scales[0] == 1.0
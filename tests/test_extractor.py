@@ -22,6 +22,14 @@ class TestExtractText:
         result = extract_text_from_file(str(f))
         assert "Title" in result
 
+    def test_large_txt_uses_mmap_with_same_semantics(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("blog_autopilot.extractor.MMAP_READ_THRESHOLD", 10)
+        f = tmp_path / "large.txt"
+        f.write_bytes(("第一行\r\n" + "内容" * 50 + "\r末尾").encode("utf-8"))
+        with open(f, encoding="utf-8") as fh:
+            expected = fh.read().strip()
+        assert extract_text_from_file(str(f)) == expected
+
     def test_too_short_raises(self, tmp_path):
         f = tmp_path / "short.txt"
         f.write_text("Hi", encoding="utf-8")
@@ -34,6 +42,32 @@ class TestExtractText:
         with pytest.raises(ExtractionError, match="不支持的文件格式"):
             extract_text_from_file(str(f))
 
+    def test_pdf_without_header_raises(self, tmp_path):
+        f = tmp_path / "fake.pdf"
+        f.write_bytes(b"not a pdf at all")
+        with pytest.raises(ExtractionError, match="不是有效的 PDF"):
+            extract_text_from_file(str(f))
+
     def test_nonexistent_file_raises(self):
         with pytest.raises(ExtractionError, match="读取文件失败"):
             extract_text_from_file("/nonexistent/file.txt")
+
+    def test_identical_pdf_parsed_once(self, tmp_path, monkeypatch):
+        from collections import OrderedDict
+        from unittest.mock import MagicMock, patch
+
+        monkeypatch.setattr("blog_autopilot.extractor._pdf_text_cache", OrderedDict())
+        page = MagicMock()
+        page.extract_text.return_value = "PDF 正文" * 20
+        data = b"%PDF-1.4 fake"
+        first, second = tmp_path / "a.pdf", tmp_path / "b.pdf"
+        first.write_bytes(data)
+        second.write_bytes(data)
+
+        with patch("blog_autopilot.extractor.PdfReader") as mock_reader:
+            mock_reader.return_value.pages = [page]
+            assert extract_text_from_file(str(first)) == ("PDF 正文" * 20)
+            # 同一内容换个文件名重新投递，不再解析
+            assert extract_text_from_file(str(second)) == ("PDF 正文" * 20)
+
+        assert mock_reader.call_count == 1
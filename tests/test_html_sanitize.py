@@ -1,5 +1,10 @@
 """测试 HTML 清洗"""
 
+import time
+
+import pytest
+
+from blog_autopilot.exceptions import WordPressError
 from blog_autopilot.publisher import sanitize_html
 
 
@@ -63,3 +68,66 @@ class TestSanitizeHtml:
         html = '<p>Safe</p><script>alert(1)'
         result = sanitize_html(html)
         assert "<script" not in result
+
+    def test_reassembled_script_tag_removed(self):
+        """移除后拼接形成的新危险标签也应被移除"""
+        html = '<p>Safe</p><scr<script></script>ipt>alert(1)</script>'
+        result = sanitize_html(html)
+        assert "<script" not in result.lower()
+        assert result.startswith("<p>Safe</p>")
+
+    def test_void_tags_do_not_swallow_following_content(self):
+        """input/meta 等空元素只移除标签本身，后续正文保留"""
+        html = '<ul><li><input type="checkbox">任务一</li><li><input type="checkbox">任务二</li></ul>' * 200
+        result = sanitize_html(html)
+        assert "<input" not in result
+        assert result.count("任务二") == 200
+
+    def test_script_case_insensitive_closing(self):
+        html = '<p>Safe</p><SCRIPT>alert(1)</script>'
+        assert sanitize_html(html) == "<p>Safe</p>"
+
+    def test_unclosed_script_with_huge_body_is_linear(self):
+        """未闭合 <script> 后跟 10M 字符：只移除开标签，线性耗时"""
+        html = "<script>" + "a" * 10_000_000
+        started = time.perf_counter()
+        result = sanitize_html(html)
+        assert time.perf_counter() - started < 10
+        assert result == "a" * 10_000_000
+
+    def test_many_unclosed_openers_are_linear(self):
+        """大量未闭合/无 ">" 的危险开标签不应逐个扫描到文档末尾"""
+        n = 50_000
+        cases = [
+            ("<script>x" * n, "x" * n),
+            ("<iframe>x" * n, "x" * n),
+            ("</script>" + "<script>x" * n, "</script>" + "x" * n),
+            ("<script " * n, "<script " * n),
+            ("<input " * n, "<input " * n),
+        ]
+        for html, expected in cases:
+            started = time.perf_counter()
+            result = sanitize_html(html)
+            # 二次方实现在此规模下需要数十秒
+            assert time.perf_counter() - started < 2, html[:20]
+            assert result == expected
+
+    def test_deeply_nested_reassembly_rejected_quickly(self):
+        """层层嵌套（每轮只剥一层）超过轮数上限时拒绝，不做二次方次扫描"""
+        k = 16_000
+        html = "<scr" * k + "<script>" + "ipt>" * k
+        started = time.perf_counter()
+        with pytest.raises(WordPressError, match="恶意嵌套"):
+            sanitize_html(html)
+        assert time.perf_counter() - started < 2
+
+    def test_multi_pass_nested_input_is_linear(self):
+        """大文档中多处轮数上限内的嵌套拼接：多轮扫描后清净，整体仍为线性耗时"""
+        nested = "<scr" * 3 + "<script></script>" + "ipt>" * 3 + "alert(1)</script>"
+        html = ("<p>正文段落</p>" * 20_000 + nested) * 10
+        started = time.perf_counter()
+        result = sanitize_html(html)
+        assert time.perf_counter() - started < 2
+        assert "<script" not in result.lower()
+        assert "alert" not in result
+        assert result.count("<p>正文段落</p>") == 200_000
@@ -5,6 +5,7 @@ import os
 import pytest
 from unittest.mock import MagicMock, patch
 
+from blog_autopilot.db import Database
 from blog_autopilot.ingest import ArticleIngestor
 from blog_autopilot.models import (
     ArticleRecord,
@@ -39,6 +40,7 @@ def mock_settings():
     settings.embedding.api_base = "https://test.emb/v1"
     settings.embedding.model = "test-embedding-model"
     settings.embedding.dimensions = 3072
+    settings.embedding.batch_size = 64
     return settings
 
 
@@ -52,6 +54,7 @@ def ingestor(mock_settings):
         mock_writer = MockWriter.return_value
         mock_emb = MockEmb.return_value
         mock_db = MockDB.return_value
+        MockDB._generate_ids.side_effect = Database._generate_ids
 
         mock_writer.extract_tags_and_promo.return_value = (
             TagSet("技术周刊", "AI应用", "API开发", "自动化"),
@@ -59,8 +62,17 @@ def ingestor(mock_settings):
             "测试标题",
         )
         mock_emb.get_embedding.return_value = [0.1] * 3072
+        mock_emb.get_embeddings.side_effect = lambda texts, return_exceptions=False: [
+            [0.1] * 3072 for _ in texts
+        ]
         mock_db.get_article_by_url.return_value = None
+        mock_db.get_articles_by_urls.return_value = {}
+        mock_db.find_duplicate_by_hash.return_value = None
+        mock_db.find_duplicates_by_hashes.return_value = {}
         mock_db.insert_article.return_value = "gen-001"
+        mock_db.insert_articles_bulk.side_effect = lambda records, source_hashes=None: [
+            r.id for r in records
+        ]
 
         ing = ArticleIngestor(mock_settings)
         # 替换内部组件为 mock
@@ -70,6 +82,22 @@ def ingestor(mock_settings):
         yield ing
 
 
+class TestLazyComponents:
+
+    def test_components_created_on_first_access(self, mock_settings):
+        with patch("blog_autopilot.ingest.AIWriter") as MockWriter, \
+             patch("blog_autopilot.ingest.EmbeddingClient") as MockEmb, \
+             patch("blog_autopilot.ingest.Database") as MockDB:
+            ing = ArticleIngestor(mock_settings)
+            MockWriter.assert_not_called()
+            MockEmb.assert_not_called()
+            MockDB.assert_not_called()
+
+            assert ing.database is ing.database
+            MockDB.assert_called_once_with(mock_settings.database)
+            MockWriter.assert_not_called()
+
+
 class TestIngestArticle:
 
     def test_success(self, ingestor):
@@ -103,6 +131,22 @@ class TestIngestArticle:
         # 不应该调用 insert
         ingestor._db.insert_article.assert_not_called()
 
+    def test_content_hash_dedup_skip(self, ingestor):
+        """相同正文已入库时跳过 AI 与 Embedding"""
+        ingestor._db.find_duplicate_by_hash.return_value = {
+            "id": "existing-002", "title": "已有文章", "url": None,
+        }
+        result = ingestor.ingest_article("内容" * 50)
+        assert result.success is True
+        assert result.article_id == "existing-002"
+        ingestor._writer.extract_tags_and_promo.assert_not_called()
+        ingestor._embedding.get_embedding.assert_not_called()
+
+    def test_source_hash_stored(self, ingestor):
+        ingestor.ingest_article("内容" * 50)
+        source_hash = ingestor._db.insert_article.call_args.kwargs["source_hash"]
+        assert len(source_hash) == 64
+
     def test_tag_extraction_failure(self, ingestor):
         ingestor._writer.extract_tags_and_promo.side_effect = AIAPIError(
             "API 超时"
@@ -128,6 +172,106 @@ class TestIngestArticle:
         assert "数据库写入失败" in result.error
 
 
+class TestIngestBatch:
+
+    def test_single_embedding_request(self, ingestor):
+        results = ingestor.ingest_batch(["内容A" * 50, "内容B" * 50, "内容C" * 50])
+        assert [r.success for r in results] == [True, True, True]
+        ingestor._embedding.get_embeddings.assert_called_once()
+        assert len(ingestor._embedding.get_embeddings.call_args[0][0]) == 3
+        ingestor._embedding.get_embedding.assert_not_called()
+
+    def test_tag_failure_keeps_order(self, ingestor):
+        ok = ingestor._writer.extract_tags_and_promo.return_value
+
+        def extract(content):
+            # 并发执行，按内容而非调用顺序决定失败项
+            if content.startswith("B"):
+                raise AIAPIError("API 超时")
+            return ok
+
+        ingestor._writer.extract_tags_and_promo.side_effect = extract
+        results = ingestor.ingest_batch(["A" * 100, "B" * 100, "C" * 100])
+        assert [r.success for r in results] == [True, False, True]
+        assert "标签提取失败" in results[1].error
+        assert len(ingestor._embedding.get_embeddings.call_args[0][0]) == 2
+
+    def test_per_item_embedding_failure(self, ingestor):
+        ingestor._embedding.get_embeddings.side_effect = None
+        ingestor._embedding.get_embeddings.return_value = [
+            [0.1] * 3072, EmbeddingError("单条失败"),
+        ]
+        results = ingestor.ingest_batch(["A" * 100, "B" * 100])
+        assert results[0].success is True
+        assert results[1].success is False
+        assert "Embedding 失败" in results[1].error
+        assert ingestor._embedding.get_embeddings.call_args[1] == {
+            "return_exceptions": True,
+        }
+        ingestor._embedding.get_embedding.assert_not_called()
+
+    def test_empty_promo_fails_only_its_item(self, ingestor):
+        ok = ingestor._writer.extract_tags_and_promo.return_value
+
+        def extract(content):
+            if content.startswith("B"):
+                return ok[0], " ", ok[2]
+            return ok
+
+        ingestor._writer.extract_tags_and_promo.side_effect = extract
+        results = ingestor.ingest_batch(["A" * 100, "B" * 100, "C" * 100])
+        assert [r.success for r in results] == [True, False, True]
+        assert "不能为空" in results[1].error
+        # 空文本不送入批量请求
+        assert len(ingestor._embedding.get_embeddings.call_args[0][0]) == 2
+
+    def test_url_dedup_single_query(self, ingestor):
+        existing = ArticleRecord(
+            id="existing-001",
+            title="已有文章",
+            tags=TagSet("周刊", "AI", "测试", "内容"),
+            tg_promo="已有推广",
+            url="https://blog.test/existing",
+        )
+        ingestor._db.get_articles_by_urls.return_value = {existing.url: existing}
+
+        results = ingestor.ingest_batch(
+            ["A" * 100, "B" * 100],
+            urls=["https://blog.test/existing", "https://blog.test/new"],
+        )
+        ingestor._db.get_articles_by_urls.assert_called_once_with(
+            ["https://blog.test/existing", "https://blog.test/new"]
+        )
+        ingestor._db.get_article_by_url.assert_not_called()
+        assert results[0].article_id == "existing-001"
+        assert ingestor._writer.extract_tags_and_promo.call_count == 1
+        assert results[1].success is True
+
+    def test_duplicate_content_in_batch_processed_once(self, ingestor):
+        results = ingestor.ingest_batch(["相同" * 50, "不同" * 50, "相同" * 50])
+        assert ingestor._writer.extract_tags_and_promo.call_count == 2
+        assert results[2].article_id == results[0].article_id
+        records, hashes = ingestor._db.insert_articles_bulk.call_args[0]
+        assert len(records) == 2
+        assert len(set(hashes)) == 2
+
+    def test_single_bulk_insert(self, ingestor):
+        results = ingestor.ingest_batch(["A" * 100, "B" * 100])
+        ingestor._db.insert_articles_bulk.assert_called_once()
+        ingestor._db.insert_article.assert_not_called()
+        assert [r.success for r in results] == [True, True]
+
+    def test_bulk_insert_failure_falls_back_per_row(self, ingestor):
+        ingestor._db.insert_articles_bulk.side_effect = DatabaseError("冲突")
+        ingestor._db.insert_article.side_effect = [
+            "gen-001", DatabaseError("duplicate key"),
+        ]
+        results = ingestor.ingest_batch(["A" * 100, "B" * 100])
+        assert results[0].success is True
+        assert results[1].success is False
+        assert "数据库写入失败" in results[1].error
+
+
 class TestIngestFromDirectory:
 
     def test_directory_scan(self, ingestor, tmp_path):
@@ -142,6 +286,45 @@ class TestIngestFromDirectory:
         # 只处理 .txt 和 .md，不处理 .xyz
         assert len(results) == 2
 
+    def test_extraction_failure_keeps_order(self, ingestor, tmp_path):
+        (tmp_path / "a.txt").write_text("A" * 200, encoding="utf-8")
+        (tmp_path / "b.txt").write_text("短", encoding="utf-8")
+        (tmp_path / "c.txt").write_text("C" * 200, encoding="utf-8")
+
+        results = ingestor.ingest_from_directory(str(tmp_path))
+
+        assert [r.success for r in results] == [True, False, True]
+        assert results[1].title == "b.txt"
+        assert "文本提取失败" in results[1].error
+
+    def test_summary_single_write(self, ingestor, tmp_path):
+        (tmp_path / "a.txt").write_text("A" * 200, encoding="utf-8")
+        (tmp_path / "b.txt").write_text("短", encoding="utf-8")
+
+        # 只替换 ingest 模块内的 print，不拦截 logging 等其他模块的输出
+        with patch("blog_autopilot.ingest.print", create=True) as mock_print:
+            ingestor.ingest_from_directory(str(tmp_path))
+
+        mock_print.assert_called_once()
+        summary = mock_print.call_args[0][0]
+        assert "共 2 篇" in summary
+        assert "  - b.txt: " in summary
+
+    def test_stream_processes_in_windows(self, ingestor, tmp_path):
+        ingestor._settings.embedding.batch_size = 2
+        for name in ("a", "b", "c", "d", "e"):
+            (tmp_path / f"{name}.txt").write_text(name * 200, encoding="utf-8")
+
+        stream = ingestor.ingest_from_directory_stream(str(tmp_path))
+        first = next(stream)
+        assert first.success is True
+        # 第一个窗口处理完即产出，尚未处理后续窗口
+        assert ingestor._embedding.get_embeddings.call_count == 1
+
+        rest = list(stream)
+        assert len(rest) == 4
+        assert ingestor._embedding.get_embeddings.call_count == 3
+
     def test_empty_directory(self, ingestor, tmp_path):
         results = ingestor.ingest_from_directory(str(tmp_path))
         assert results == []
@@ -1,5 +1,6 @@
 """测试数据模型"""
 
+import numpy as np
 import pytest
 
 from blog_autopilot.models import (
@@ -41,6 +42,40 @@ class TestTagSet:
         with pytest.raises(AttributeError):
             tags.tag_magazine = "new"
 
+    def test_as_tuple_order(self):
+        tags = TagSet(
+            tag_magazine="a", tag_science="b",
+            tag_topic="c", tag_content="d",
+        )
+        assert tags.as_tuple() == ("a", "b", "c", "d")
+
+    def test_slots_no_instance_dict(self):
+        tags = TagSet(
+            tag_magazine="a", tag_science="b",
+            tag_topic="c", tag_content="d",
+        )
+        record = ArticleRecord(id="x", title="t", tags=tags, tg_promo="p")
+        assert not hasattr(tags, "__dict__")
+        assert not hasattr(record, "__dict__")
+
+    def test_record_equality_ignores_embedding(self):
+        """embedding 为 ndarray 时相等比较与成员判断不报错，只比较标量字段"""
+        tags = TagSet(
+            tag_magazine="a", tag_science="b",
+            tag_topic="c", tag_content="d",
+        )
+        a = ArticleRecord(
+            id="x", title="t", tags=tags, tg_promo="p",
+            embedding=np.ones(4, dtype=np.float32),
+        )
+        b = ArticleRecord(
+            id="x", title="t", tags=tags, tg_promo="p",
+            embedding=np.zeros(4, dtype=np.float32),
+        )
+        assert a == b
+        assert a in [b]
+        assert a != ArticleRecord(id="y", title="t", tags=tags, tg_promo="p")
+
 
 class TestArticleResult:
 
@@ -160,6 +195,12 @@ class TestTokenUsageSummary:
         assert "1,500" in result
         assert "1 次" in result
 
+    def test_init_with_calls(self):
+        s = TokenUsageSummary([TokenUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15)])
+        assert s.total_tokens == 15
+        assert not hasattr(s, "__dict__")
+        assert TokenUsageSummary().calls is not TokenUsageSummary().calls
+
 
 class TestSeriesInfo:
 
@@ -106,6 +106,331 @@ class TestPipeline:
         assert result.title == "测试标题"
         assert result.blog_link == "https://test.wp/post-1"
 
+    @patch("blog_autopilot.cover_image.upload_media_to_wordpress")
+    @patch("blog_autopilot.pipeline.send_to_telegram")
+    @patch("blog_autopilot.pipeline.post_to_wordpress")
+    def test_seo_and_cover_image_run_concurrently(
+        self, mock_wp, mock_tg, mock_upload, test_settings, sample_task
+    ):
+        """SEO 提取与封面图生成并发，封面上传仍使用 SEO slug"""
+        import threading
+        from blog_autopilot.models import SEOMetadata
+
+        mock_wp.return_value = PublishResult(url="https://test.wp/post-1", post_id=1)
+        mock_upload.return_value = 42
+
+        pipeline = Pipeline(test_settings)
+        mock_article = ArticleResult(title="测试标题", html_body="<p>正文</p>")
+        pipeline._writer = MagicMock()
+        pipeline._writer.generate_blog_post_with_context.return_value = mock_article
+        pipeline._writer.generate_promo.return_value = "推广文案"
+
+        # 两个任务互相等待：串行执行会超时失败
+        barrier = threading.Barrier(2, timeout=5)
+
+        def seo(*args):
+            barrier.wait()
+            return SEOMetadata(meta_description="描述", slug="my-slug", wp_tags=())
+
+        def cover(*args, **kwargs):
+            barrier.wait()
+            return b"png"
+
+        pipeline._writer.extract_seo_metadata.side_effect = seo
+        pipeline._cover_image_generator = MagicMock()
+        pipeline._cover_image_generator.generate_image.side_effect = cover
+
+        result = pipeline.process_file(sample_task)
+
+        assert result.success is True
+        assert mock_upload.call_args[0][1] == "cover-my-slug.png"
+        assert mock_wp.call_args.kwargs["featured_media"] == 42
+
+    @patch("blog_autopilot.pipeline.ensure_wp_tags")
+    @patch("blog_autopilot.cover_image.upload_media_to_wordpress")
+    @patch("blog_autopilot.pipeline.send_to_telegram")
+    @patch("blog_autopilot.pipeline.post_to_wordpress")
+    def test_cover_upload_overlaps_tag_creation(
+        self, mock_wp, mock_tg, mock_upload, mock_tags, test_settings, sample_task
+    ):
+        """封面上传与 WordPress 标签创建并发"""
+        import threading
+        from blog_autopilot.models import SEOMetadata
+
+        mock_wp.return_value = PublishResult(url="https://test.wp/post-1", post_id=1)
+        barrier = threading.Barrier(2, timeout=5)
+
+        def upload(*args):
+            barrier.wait()
+            return 42
+
+        def tags(*args):
+            barrier.wait()
+            return [7]
+
+        mock_upload.side_effect = upload
+        mock_tags.side_effect = tags
+
+        pipeline = Pipeline(test_settings)
+        pipeline._writer = MagicMock()
+        pipeline._writer.generate_blog_post.return_value = ArticleResult(
+            title="测试标题", html_body="<p>正文</p>"
+        )
+        pipeline._writer.generate_promo.return_value = "推广文案"
+        pipeline._writer.extract_seo_metadata.return_value = SEOMetadata(
+            meta_description="描述", slug="my-slug", wp_tags=("标签",),
+        )
+        pipeline._cover_image_generator = MagicMock()
+        pipeline._cover_image_generator.generate_image.return_value = b"png"
+
+        result = pipeline.process_file(sample_task)
+
+        assert result.success is True
+        assert mock_wp.call_args.kwargs["featured_media"] == 42
+        assert mock_wp.call_args.kwargs["tag_ids"] == [7]
+
+    @patch("blog_autopilot.pipeline.send_to_telegram")
+    @patch("blog_autopilot.pipeline.post_to_wordpress")
+    def test_promo_generated_during_publish(
+        self, mock_wp, mock_tg, test_settings, sample_task
+    ):
+        """推广文案与 WordPress 发布并发生成，推送时带上发布链接"""
+        import threading
+
+        barrier = threading.Barrier(2, timeout=5)
+
+        def publish(**kwargs):
+            barrier.wait()
+            return PublishResult(url="https://test.wp/post-1", post_id=1)
+
+        def promo(*args, **kwargs):
+            barrier.wait()
+            return "推广文案"
+
+        mock_wp.side_effect = publish
+        pipeline = Pipeline(test_settings)
+        pipeline._writer = MagicMock()
+        pipeline._writer.generate_blog_post.return_value = ArticleResult(
+            title="测试标题", html_body="<p>正文</p>"
+        )
+        pipeline._writer.generate_promo.side_effect = promo
+
+        result = pipeline.process_file(sample_task)
+
+        assert result.success is True
+        assert mock_tg.call_args[0][:2] == ("推广文案", "https://test.wp/post-1")
+
+    def test_save_draft_flushed_on_close(self, test_settings):
+        """草稿在后台线程写入，close() 后保证落盘"""
+        pipeline = Pipeline(test_settings)
+        pipeline._save_draft("a.txt", "标题", "<p>正文</p>")
+        pipeline.close()
+
+        draft_path = os.path.join(test_settings.paths.drafts_folder, "a.txt.html")
+        with open(draft_path, encoding="utf-8") as f:
+            assert f.read() == "<!-- 标题: 标题 -->\n<p>正文</p>"
+        # 临时文件已原子替换为正式草稿
+        assert os.listdir(test_settings.paths.drafts_folder) == ["a.txt.html"]
+
+    @patch("blog_autopilot.pipeline.close_session")
+    def test_close_releases_http_connections(self, mock_close_session, test_settings):
+        """close() 释放共享 HTTP 会话的空闲连接"""
+        pipeline = Pipeline(test_settings)
+        pipeline.close()
+        mock_close_session.assert_called_once_with()
+
+    def test_save_draft_skips_identical_content(self, test_settings):
+        """同名草稿内容未变时不重写文件"""
+        pipeline = Pipeline(test_settings)
+        draft_path = os.path.join(test_settings.paths.drafts_folder, "a.txt.html")
+        pipeline._save_draft("a.txt", "标题", "<p>正文</p>")
+        pipeline._io_executor.submit(lambda: None).result()
+        os.utime(draft_path, ns=(0, 0))
+
+        pipeline._save_draft("a.txt", "标题", "<p>正文</p>")
+        pipeline._io_executor.submit(lambda: None).result()
+        assert os.stat(draft_path).st_mtime_ns == 0
+
+        pipeline._save_draft("a.txt", "标题", "<p>新正文</p>")
+        pipeline.close()
+        with open(draft_path, encoding="utf-8") as f:
+            assert f.read() == "<!-- 标题: 标题 -->\n<p>新正文</p>"
+
+    def test_locked_file_skipped(self, test_settings, sample_task):
+        """文件已被其他进程加锁时跳过"""
+        import fcntl
+
+        pipeline = Pipeline(test_settings)
+        pipeline._writer = MagicMock()
+        with open(sample_task.filepath) as holder:
+            fcntl.flock(holder, fcntl.LOCK_EX)
+            result = pipeline.process_file(sample_task)
+
+        assert result.success is False
+        assert "文件被锁定" in result.error
+        pipeline._writer.reset_usage.assert_not_called()
+
+    def test_scan_skips_already_archived_file(self, test_settings, sample_task):
+        """processed 中已有同名文件时直接删除，不进入处理"""
+        archived = os.path.join(
+            test_settings.paths.processed_folder,
+            "Magazine", "Science_28", "test.txt",
+        )
+        os.makedirs(os.path.dirname(archived))
+        open(archived, "w").close()
+
+        pipeline = Pipeline(test_settings)
+        with patch(
+            "blog_autopilot.pipeline.scan_input_directory",
+            return_value=[sample_task],
+        ), patch.object(pipeline, "process_file") as mock_process:
+            assert pipeline.scan_and_process() == 0
+
+        mock_process.assert_not_called()
+        assert not os.path.exists(sample_task.filepath)
+
+    def test_archived_names_cached_until_dir_changes(
+        self, test_settings, sample_task
+    ):
+        """归档目录未变化时复用文件名缓存；本进程归档会同步更新缓存"""
+        archive_dir = os.path.join(
+            test_settings.paths.processed_folder, "Magazine", "Science_28",
+        )
+        os.makedirs(archive_dir)
+        open(os.path.join(archive_dir, "old.txt"), "w").close()
+
+        pipeline = Pipeline(test_settings)
+        with patch.object(
+            pipeline, "_list_filenames", wraps=pipeline._list_filenames,
+        ) as mock_list:
+            assert pipeline._archived_names_in(archive_dir) == {"old.txt"}
+            pipeline._archive_file(sample_task.filepath)
+            assert pipeline._archived_names_in(archive_dir) == {
+                "old.txt", "test.txt",
+            }
+            assert mock_list.call_count == 1
+
+            # 外部改动目录 → mtime 变化 → 重新列目录
+            os.remove(os.path.join(archive_dir, "old.txt"))
+            # 时间戳粒度较粗的文件系统上显式改 mtime，避免同一时钟节拍内未变化
+            os.utime(archive_dir, ns=(1, 1))
+            assert pipeline._archived_names_in(archive_dir) == {"test.txt"}
+            assert mock_list.call_count == 2
+
+    def test_ensure_category_dirs_only_creates_missing(self, test_settings):
+        """只为缺失的子目录调用 makedirs；配置未变化时整体跳过"""
+        input_dir = test_settings.paths.input_folder
+        os.makedirs(os.path.join(input_dir, "Magazine", "Science_28"))
+        categories = {
+            "_comment": "说明",
+            "Magazine": [
+                {"name": "Science", "id": 28},
+                {"name": "Tech", "id": 29},
+            ],
+        }
+
+        pipeline = Pipeline(test_settings)
+        with patch(
+            "blog_autopilot.pipeline._load_categories_config",
+            return_value=categories,
+        ), patch(
+            "blog_autopilot.pipeline.os.makedirs", wraps=os.makedirs,
+        ) as mock_makedirs:
+            pipeline._ensure_category_dirs()
+            pipeline._ensure_category_dirs()
+
+        mock_makedirs.assert_called_once_with(
+            os.path.join(input_dir, "Magazine", "Tech_29"), exist_ok=True,
+        )
+        assert os.path.isdir(os.path.join(input_dir, "Magazine", "Tech_29"))
+
+    @patch("blog_autopilot.pipeline.send_to_telegram")
+    @patch("blog_autopilot.pipeline.post_to_wordpress")
+    def test_prefetched_text_used_once(
+        self, mock_wp, mock_tg, test_settings, sample_task
+    ):
+        """预取的文本由单文件流程直接取用，不再重复提取"""
+        from blog_autopilot.extractor import extract_text_from_file
+
+        mock_wp.return_value = PublishResult(url="https://test.wp/post-1", post_id=1)
+        pipeline = Pipeline(test_settings)
+        pipeline._writer = MagicMock()
+        pipeline._writer.generate_blog_post.return_value = ArticleResult(
+            title="测试标题", html_body="<p>正文</p>"
+        )
+        pipeline._writer.generate_promo.return_value = "推广文案"
+
+        with patch(
+            "blog_autopilot.pipeline.extract_text_from_file",
+            side_effect=extract_text_from_file,
+        ) as mock_extract:
+            pipeline._prefetch_texts([sample_task])
+            result = pipeline.process_file(sample_task)
+
+        assert result.success is True
+        mock_extract.assert_called_once_with(sample_task.filepath)
+        assert pipeline._text_futures == {}
+
+    def test_archive_falls_back_across_devices(self, test_settings, sample_task):
+        """input 与 processed 不在同一文件系统时退回 shutil.move"""
+        import errno
+
+        pipeline = Pipeline(test_settings)
+        with patch(
+            "blog_autopilot.pipeline.os.replace",
+            side_effect=OSError(errno.EXDEV, "cross-device link"),
+        ), patch("blog_autopilot.pipeline.shutil.move") as mock_move:
+            pipeline._archive_file(sample_task.filepath)
+
+        mock_move.assert_called_once_with(
+            sample_task.filepath,
+            pipeline._get_archive_path(sample_task.filepath),
+        )
+
+    def test_run_loop_exits_on_stop(self, test_settings):
+        """stop() 后主循环不再等满轮询间隔，并恢复原 SIGTERM 处理器"""
+        import signal
+
+        pipeline = Pipeline(test_settings)
+        previous = signal.getsignal(signal.SIGTERM)
+        with patch.object(
+            pipeline, "scan_and_process", side_effect=pipeline.stop,
+        ) as mock_scan, patch.object(pipeline, "_check_and_generate_surveys"), \
+                patch("blog_autopilot.pipeline.POLL_INTERVAL", 3600):
+            pipeline.run()
+
+        mock_scan.assert_called_once()
+        assert signal.getsignal(signal.SIGTERM) is previous
+
+    def test_run_loop_skips_scan_when_watcher_idle(self, test_settings):
+        """inotify 可用且无新文件、上一轮目录已空时，不再重复扫描"""
+        pipeline = Pipeline(test_settings)
+        waits = iter([False, False, True])
+
+        def fake_wait(timeout):
+            changed = next(waits, None)
+            if changed is None:
+                pipeline.stop()
+                return False
+            return changed
+
+        def fake_scan():
+            pipeline._input_pending = False
+            return 0
+
+        with patch("blog_autopilot.pipeline.InputWatcher") as mock_cls, \
+                patch.object(
+                    pipeline, "scan_and_process", side_effect=fake_scan,
+                ) as mock_scan, \
+                patch.object(pipeline, "_check_and_generate_surveys"):
+            mock_cls.return_value.active = True
+            mock_cls.return_value.wait.side_effect = fake_wait
+            pipeline.run()
+
+        # 首轮 + 文件事件后各扫描一次，两次空闲等待后不扫描
+        assert mock_scan.call_count == 2
+        mock_cls.return_value.close.assert_called_once()
+
 
 class TestPipelineNoDatabase:
     """数据库未配置时的回退行为"""
@@ -202,6 +527,67 @@ class TestPipelineWithDatabase:
         assert call_args.kwargs.get("associations") is not None
         assert call_args.kwargs.get("category_name") == "Magazine"
 
+    def test_prescreen_batch_single_embedding_request(
+        self, test_settings, sample_task, tmp_path
+    ):
+        """批量预筛：一次 get_embeddings 请求覆盖整个窗口，指纹重复的文件跳过"""
+        import hashlib
+        from dataclasses import replace
+
+        tasks = [sample_task]
+        for name, body in (("b.txt", "B" * 200), ("dup.txt", "D" * 200)):
+            path = os.path.join(os.path.dirname(sample_task.filepath), name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(body)
+            tasks.append(replace(sample_task, filepath=path, filename=name))
+
+        pipeline = Pipeline(test_settings)
+        pipeline._writer = MagicMock()
+        pipeline._writer.extract_tags_and_promo.side_effect = lambda text: (
+            TagSet("周刊", "AI", "测试", "内容"), f"推广{text[0]}", f"标题{text[0]}",
+        )
+        dup_hash = hashlib.sha256(("D" * 200).encode("utf-8")).hexdigest()
+        mock_db = MagicMock()
+        mock_db.find_duplicate_by_hash.side_effect = (
+            lambda h: {"title": "已有"} if h == dup_hash else None
+        )
+        mock_db.find_duplicates.side_effect = lambda embs, threshold: [
+            {"title": "已有", "similarity": 0.99} if emb[0] == 1.0 else None
+            for emb in embs
+        ]
+        mock_emb = MagicMock()
+        mock_emb.get_embeddings.side_effect = lambda texts, return_exceptions: [
+            [float(i)] * 4 for i in range(len(texts))
+        ]
+        pipeline._database = mock_db
+        pipeline._embedding_client = mock_emb
+
+        prescreens = pipeline._prescreen_batch(tasks)
+
+        mock_emb.get_embeddings.assert_called_once()
+        assert mock_emb.get_embeddings.call_args[0][0] == ["推广A", "推广B"]
+        # 整个窗口一次批量去重
+        mock_db.find_duplicates.assert_called_once()
+        mock_db.find_duplicate.assert_not_called()
+        assert set(prescreens) == {tasks[0].filepath, tasks[1].filepath}
+        assert prescreens[tasks[0].filepath][4] is None
+        assert prescreens[tasks[1].filepath][1:] == (
+            "推广B", "标题B", [1.0] * 4, {"title": "已有", "similarity": 0.99},
+        )
+
+    def test_window_duplicate_detects_same_window_ingest(self, test_settings):
+        """同一预筛窗口内先入库的文章也参与 embedding 去重"""
+        pipeline = Pipeline(test_settings)
+        assert pipeline._find_window_duplicate([1.0, 0.0]) is None
+
+        pipeline._window_ingested.append(
+            ("先发文章", pipeline._unit_vector([2.0, 0.0])),
+        )
+        dup = pipeline._find_window_duplicate([1.0, 0.01])
+        assert dup["title"] == "先发文章"
+        assert dup["similarity"] == pytest.approx(1.0, abs=1e-3)
+        assert pipeline._find_window_duplicate([0.0, 1.0]) is None
+
     @patch("blog_autopilot.pipeline.send_to_telegram")
     @patch("blog_autopilot.pipeline.post_to_wordpress")
     def test_association_error_fallback(
@@ -235,6 +621,127 @@ class TestPipelineWithDatabase:
         call_args = pipeline._writer.generate_blog_post_with_context.call_args
         assert call_args.kwargs.get("associations") is None
 
+    @patch("blog_autopilot.pipeline.send_to_telegram")
+    @patch("blog_autopilot.pipeline.post_to_wordpress")
+    def test_ingest_reuses_tags_when_only_embedding_failed(
+        self, mock_wp, mock_tg, test_settings, sample_task
+    ):
+        """关联阶段仅 embedding 失败时，入库只补请求 embedding，不再重新提取标签"""
+        mock_wp.return_value = PublishResult(url="https://test.wp/post-1", post_id=1)
+
+        pipeline = Pipeline(test_settings)
+        mock_article = ArticleResult(title="标题", html_body="<p>正文</p>")
+        pipeline._writer = MagicMock()
+        pipeline._writer.generate_blog_post_with_context.return_value = mock_article
+        pipeline._writer.generate_promo.return_value = "推广"
+        pipeline._writer.extract_tags_and_promo.return_value = (
+            TagSet("周刊", "AI", "测试", "内容"), "推广文案", "标题",
+        )
+
+        mock_db = MagicMock()
+        mock_db.find_duplicate_by_hash.return_value = None
+        mock_emb = MagicMock()
+        mock_emb.get_embedding.side_effect = [Exception("超时"), [0.1] * 4]
+        pipeline._database = mock_db
+        pipeline._embedding_client = mock_emb
+        pipeline._ingestor = MagicMock()
+
+        result = pipeline.process_file(sample_task)
+
+        assert result.success is True
+        pipeline._writer.extract_tags_and_promo.assert_called_once()
+        assert mock_emb.get_embedding.call_args_list[-1][0] == ("推广文案",)
+        record = mock_db.insert_article.call_args[0][0]
+        assert record.tg_promo == "推广文案"
+        assert record.embedding == [0.1] * 4
+
+    @patch("blog_autopilot.pipeline.send_to_telegram")
+    @patch("blog_autopilot.pipeline.post_to_wordpress")
+    def test_promo_runs_concurrently_with_ingest(
+        self, mock_wp, mock_tg, test_settings, sample_task
+    ):
+        """推广文案 + Telegram 推送与入库摘要生成并发，返回前已推送"""
+        import threading
+
+        mock_wp.return_value = PublishResult(url="https://test.wp/post-1", post_id=1)
+
+        pipeline = Pipeline(test_settings)
+        mock_article = ArticleResult(title="标题", html_body="<p>正文</p>")
+        pipeline._writer = MagicMock()
+        pipeline._writer.generate_blog_post_with_context.return_value = mock_article
+        pipeline._writer.extract_tags_and_promo.return_value = (
+            TagSet("周刊", "AI", "测试", "内容"), "推广文案", "标题",
+        )
+        # 两个任务互相等待：串行执行会超时失败
+        barrier = threading.Barrier(2, timeout=5)
+
+        def summary(*args):
+            barrier.wait()
+            return "摘要"
+
+        def promo(*args, **kwargs):
+            barrier.wait()
+            return "推广"
+
+        pipeline._writer.generate_summary.side_effect = summary
+        pipeline._writer.generate_promo.side_effect = promo
+
+        mock_db = MagicMock()
+        mock_db.find_duplicate_by_hash.return_value = None
+        mock_db.find_duplicate.return_value = None
+        mock_emb = MagicMock()
+        mock_emb.get_embedding.return_value = [0.1] * 4
+        pipeline._database = mock_db
+        pipeline._embedding_client = mock_emb
+        pipeline._ingestor = MagicMock()
+
+        result = pipeline.process_file(sample_task)
+
+        assert result.success is True
+        assert mock_db.insert_article.call_args[0][0].summary == "摘要"
+        mock_tg.assert_called_once()
+        assert mock_tg.call_args[0][:2] == ("推广", "https://test.wp/post-1")
+
+    def test_retry_failed_ingests_batches_missing_embeddings(
+        self, test_settings, tmp_path
+    ):
+        """入库重试：缺少 embedding 的记录合并为一次批量请求"""
+        import json
+        import numpy as np
+
+        failed_dir = tmp_path / "failed_ingests"
+        failed_dir.mkdir()
+        tags = {
+            "tag_magazine": "周刊", "tag_science": "AI",
+            "tag_topic": "测试", "tag_content": "内容",
+        }
+        for name in ("a", "b", "c"):
+            (failed_dir / f"{name}.json").write_text(
+                json.dumps({"title": f"标题{name}", "tags": tags,
+                            "tg_promo": f"推广{name}"}),
+                encoding="utf-8",
+            )
+        test_settings.embedding.dimensions = 4
+        np.full(4, 0.5, dtype=np.float32).tofile(failed_dir / "b.emb")
+
+        pipeline = Pipeline(test_settings)
+        pipeline._database = MagicMock()
+        pipeline._embedding_client = MagicMock()
+        pipeline._embedding_client.get_embeddings.return_value = [
+            [0.1] * 4, [0.2] * 4,
+        ]
+        pipeline._ingestor = MagicMock()
+
+        assert pipeline.retry_failed_ingests() == 3
+
+        pipeline._embedding_client.get_embeddings.assert_called_once()
+        assert sorted(
+            pipeline._embedding_client.get_embeddings.call_args[0][0]
+        ) == ["推广a", "推广c"]
+        pipeline._embedding_client.get_embedding.assert_not_called()
+        assert pipeline._database.insert_article.call_count == 3
+        assert list(failed_dir.iterdir()) == []
+
     @patch("blog_autopilot.pipeline.send_to_telegram")
     @patch("blog_autopilot.pipeline.post_to_wordpress")
     def test_ingest_error_not_blocking(
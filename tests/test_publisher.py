@@ -5,13 +5,33 @@ from unittest.mock import MagicMock, patch
 
 from blog_autopilot.config import WordPressSettings
 from blog_autopilot.exceptions import WordPressError
+from blog_autopilot.http_client import basic_auth
 from blog_autopilot.publisher import (
     ensure_wp_tags,
+    get_wp_post_content,
     post_to_wordpress,
+    update_wp_post_content,
+    _post_content_cache,
+    _tag_id_cache,
+    _batch_unsupported,
+    _build_auth_header,
+    _create_or_get_wp_tag,
+    _retry_after_seconds,
+    _build_post_url,
+    _get_batch_url,
     _get_tags_url,
 )
 
 
+@pytest.fixture(autouse=True)
+def _clear_wp_caches():
+    _tag_id_cache.clear()
+    _post_content_cache.clear()
+    yield
+    _tag_id_cache.clear()
+    _post_content_cache.clear()
+
+
 @pytest.fixture
 def wp_settings():
     return WordPressSettings(
@@ -24,7 +44,7 @@ def wp_settings():
 
 class TestPostToWordpress:
 
-    @patch("blog_autopilot.publisher.requests.post")
+    @patch("blog_autopilot.publisher.session.post")
     def test_publish_success(self, mock_post, wp_settings):
         mock_resp = MagicMock()
         mock_resp.status_code = 201
@@ -41,7 +61,7 @@ class TestPostToWordpress:
         assert link.url == "https://test.wp/post-42"
         assert link.post_id == 42
 
-    @patch("blog_autopilot.publisher.requests.post")
+    @patch("blog_autopilot.publisher.session.post")
     def test_publish_4xx_raises(self, mock_post, wp_settings):
         import requests as req
 
@@ -57,7 +77,7 @@ class TestPostToWordpress:
                 "Title", "<p>Body</p>", wp_settings
             )
 
-    @patch("blog_autopilot.publisher.requests.post")
+    @patch("blog_autopilot.publisher.session.post")
     def test_publish_with_seo_fields(self, mock_post, wp_settings):
         mock_resp = MagicMock()
         mock_resp.status_code = 201
@@ -81,7 +101,7 @@ class TestPostToWordpress:
         assert payload["slug"] == "test-slug"
         assert payload["tags"] == [10, 20]
 
-    @patch("blog_autopilot.publisher.requests.post")
+    @patch("blog_autopilot.publisher.session.post")
     def test_publish_without_seo_fields(self, mock_post, wp_settings):
         """SEO 字段为 None 时不应出现在 payload 中"""
         mock_resp = MagicMock()
@@ -98,7 +118,7 @@ class TestPostToWordpress:
         assert "tags" not in payload
         assert "featured_media" not in payload
 
-    @patch("blog_autopilot.publisher.requests.post")
+    @patch("blog_autopilot.publisher.session.post")
     def test_publish_with_featured_media(self, mock_post, wp_settings):
         """featured_media 参数应正确传入 payload"""
         mock_resp = MagicMock()
@@ -128,30 +148,335 @@ class TestGetTagsUrl:
         assert "rest_route=%2Fwp%2Fv2%2Ftags" in url
 
 
+class TestGetBatchUrl:
+
+    def test_pretty_permalink(self):
+        url, route = _get_batch_url("https://test.wp/wp-json/wp/v2/posts")
+        assert url == "https://test.wp/wp-json/batch/v1"
+        assert route == "/wp/v2/tags"
+
+    def test_rest_route_param(self):
+        url, route = _get_batch_url("https://test.wp/?rest_route=/wp/v2/posts")
+        assert url == "https://test.wp/?rest_route=%2Fbatch%2Fv1"
+        assert route == "/wp/v2/tags"
+
+
+class TestBuildPostUrl:
+
+    def test_pretty_permalink(self, wp_settings):
+        assert _build_post_url(42, wp_settings) == "https://test.wp/wp-json/wp/v2/posts/42"
+
+    def test_rest_route_param(self, wp_settings):
+        settings = wp_settings.model_copy(
+            update={"url": "https://test.wp/?rest_route=/wp/v2/posts"},
+        )
+        assert _build_post_url(42, settings) == (
+            "https://test.wp/?rest_route=%2Fwp%2Fv2%2Fposts%2F42"
+        )
+
+    def test_url_parsed_once(self, wp_settings):
+        from blog_autopilot.publisher import _post_url_prefix
+
+        _post_url_prefix.cache_clear()
+        _build_post_url(1, wp_settings)
+        _build_post_url(2, wp_settings)
+        assert _post_url_prefix.cache_info().misses == 1
+
+
+class TestBuildAuthHeader:
+
+    def test_basic_token_encoded_once(self, wp_settings):
+        basic_auth.cache_clear()
+        first = _build_auth_header(wp_settings)
+        second = _build_auth_header(wp_settings)
+
+        assert first["Authorization"] == "Basic dGVzdHVzZXI6dGVzdHBhc3M="
+        assert first == second and first is not second
+        assert basic_auth.cache_info().hits == 1
+
+
 class TestEnsureWPTags:
+    """batch endpoint 不可用时逐个创建"""
+
+    @pytest.fixture(autouse=True)
+    def _no_batch(self):
+        with patch("blog_autopilot.publisher._batch_create_wp_tags", return_value=None):
+            yield
 
     @patch("blog_autopilot.publisher._create_or_get_wp_tag")
     def test_all_tags_created(self, mock_create, wp_settings):
-        mock_create.side_effect = [10, 20, 30]
+        ids_by_name = {"标签1": 10, "标签2": 20, "标签3": 30}
+        mock_create.side_effect = lambda name, *_: ids_by_name[name]
         ids = ensure_wp_tags(("标签1", "标签2", "标签3"), wp_settings)
         assert ids == [10, 20, 30]
 
     @patch("blog_autopilot.publisher._create_or_get_wp_tag")
     def test_existing_tag(self, mock_create, wp_settings):
-        mock_create.side_effect = [10, 20, 30]
+        ids_by_name = {"新标签": 10, "已有标签": 20, "另一个": 30}
+        mock_create.side_effect = lambda name, *_: ids_by_name[name]
         ids = ensure_wp_tags(("新标签", "已有标签", "另一个"), wp_settings)
         assert len(ids) == 3
 
     @patch("blog_autopilot.publisher._create_or_get_wp_tag")
     def test_partial_failure(self, mock_create, wp_settings):
-        mock_create.side_effect = [10, None, 30]
+        ids_by_name = {"标签1": 10, "失败标签": None, "标签3": 30}
+        mock_create.side_effect = lambda name, *_: ids_by_name[name]
         ids = ensure_wp_tags(("标签1", "失败标签", "标签3"), wp_settings)
         assert ids == [10, 30]
 
+    @patch("blog_autopilot.publisher._create_or_get_wp_tag")
+    def test_tags_created_concurrently(self, mock_create, wp_settings):
+        """逐个创建的标签并发请求，结果仍按输入顺序返回"""
+        import threading
+
+        barrier = threading.Barrier(3, timeout=5)
+
+        def create(name, *_):
+            barrier.wait()  # 三个请求必须同时在途才能通过
+            return {"a": 1, "b": 2, "c": 3}[name]
+
+        mock_create.side_effect = create
+        assert ensure_wp_tags(("c", "a", "b"), wp_settings) == [3, 1, 2]
+
+
+class TestRetryAfterSeconds:
+
+    def test_delta_seconds(self):
+        assert _retry_after_seconds(MagicMock(headers={"Retry-After": "5"})) == 5.0
+
+    def test_http_date(self):
+        from datetime import datetime, timedelta, timezone
+        from email.utils import format_datetime
+
+        when = datetime.now(timezone.utc) + timedelta(seconds=30)
+        resp = MagicMock(headers={"Retry-After": format_datetime(when, usegmt=True)})
+        assert 25 <= _retry_after_seconds(resp) <= 30
+
+    def test_past_date_clamped_to_zero(self):
+        resp = MagicMock(headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        assert _retry_after_seconds(resp) == 0.0
+
+    def test_missing_or_invalid(self):
+        assert _retry_after_seconds(MagicMock(headers={})) is None
+        assert _retry_after_seconds(MagicMock(headers={"Retry-After": "soon"})) is None
+
+
+class TestCreateOrGetWPTag:
+
+    TAGS_URL = "https://test.wp/wp-json/wp/v2/tags"
+
+    @pytest.fixture(autouse=True)
+    def _no_backoff_sleep(self, monkeypatch):
+        monkeypatch.setattr(_create_or_get_wp_tag.retry, "sleep", lambda _s: None)
+
+    @patch("blog_autopilot.publisher.session.post")
+    def test_transient_errors_retried(self, mock_post):
+        import requests as req
+
+        ok = MagicMock(status_code=201)
+        ok.json.return_value = {"id": 7}
+        mock_post.side_effect = [
+            MagicMock(status_code=503),
+            req.exceptions.ConnectTimeout("timeout"),
+            ok,
+        ]
+
+        assert _create_or_get_wp_tag("标签", self.TAGS_URL, {}) == 7
+        assert mock_post.call_count == 3
+
+    @patch("blog_autopilot.publisher.session.post")
+    def test_persistent_5xx_returns_none(self, mock_post):
+        """重试耗尽返回 None 而不是抛出 RetryError"""
+        mock_post.return_value = MagicMock(status_code=502)
+
+        assert _create_or_get_wp_tag("标签", self.TAGS_URL, {}) is None
+        assert mock_post.call_count == 4
+
+    @patch("blog_autopilot.publisher.session.post")
+    def test_rate_limit_honors_retry_after(self, mock_post, monkeypatch):
+        """429 按 Retry-After 等待后重试"""
+        sleeps = []
+        monkeypatch.setattr(_create_or_get_wp_tag.retry, "sleep", sleeps.append)
+        ok = MagicMock(status_code=201)
+        ok.json.return_value = {"id": 7}
+        mock_post.side_effect = [
+            MagicMock(status_code=429, headers={"Retry-After": "12"}),
+            ok,
+        ]
+
+        assert _create_or_get_wp_tag("标签", self.TAGS_URL, {}) == 7
+        assert sleeps == [12.0]
+
+    @patch("blog_autopilot.publisher.session.post")
+    def test_client_error_not_retried(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=403)
+
+        assert _create_or_get_wp_tag("标签", self.TAGS_URL, {}) is None
+        assert mock_post.call_count == 1
+
+
+class TestEnsureWPTagsBatch:
+
+    @pytest.fixture(autouse=True)
+    def _reset_batch_support(self):
+        _batch_unsupported.clear()
+        yield
+        _batch_unsupported.clear()
+
+    @staticmethod
+    def _batch_resp(status_code, responses=None):
+        resp = MagicMock()
+        resp.status_code = status_code
+        resp.json.return_value = {"responses": responses or []}
+        return resp
+
+    @patch("blog_autopilot.publisher._create_or_get_wp_tag")
+    @patch("blog_autopilot.publisher.session.post")
+    def test_single_request_for_all_tags(self, mock_post, mock_create, wp_settings):
+        """新建与已存在的标签都在一次 batch 请求中解析"""
+        mock_post.return_value = self._batch_resp(207, [
+            {"status": 201, "body": {"id": 10}},
+            {"status": 400, "body": {"code": "term_exists", "data": {"status": 400, "term_id": 20}}},
+            {"status": 201, "body": {"id": 30}},
+        ])
+
+        ids = ensure_wp_tags(("标签1", "已有标签", "标签3"), wp_settings)
+
+        assert ids == [10, 20, 30]
+        assert mock_post.call_count == 1
+        url = mock_post.call_args[0][0]
+        payload = mock_post.call_args[1]["json"]
+        assert url == "https://test.wp/wp-json/batch/v1"
+        assert [r["body"]["name"] for r in payload["requests"]] == ["标签1", "已有标签", "标签3"]
+        assert {r["path"] for r in payload["requests"]} == {"/wp/v2/tags"}
+        mock_create.assert_not_called()
+
+    @patch("blog_autopilot.publisher._create_or_get_wp_tag")
+    @patch("blog_autopilot.publisher.session.post")
+    def test_unresolved_tags_fall_back_individually(self, mock_post, mock_create, wp_settings):
+        mock_post.return_value = self._batch_resp(207, [
+            {"status": 201, "body": {"id": 10}},
+            {"status": 500, "body": {"code": "db_error"}},
+        ])
+        mock_create.return_value = 20
+
+        ids = ensure_wp_tags(("标签1", "标签2"), wp_settings)
+
+        assert ids == [10, 20]
+        mock_create.assert_called_once()
+        assert mock_create.call_args[0][0] == "标签2"
+
+    @patch("blog_autopilot.publisher._create_or_get_wp_tag")
+    @patch("blog_autopilot.publisher.session.post")
+    def test_missing_batch_endpoint_remembered(self, mock_post, mock_create, wp_settings):
+        """旧版 WP 返回 404 时逐个创建，且之后不再尝试 batch"""
+        mock_post.return_value = self._batch_resp(404)
+        ids_by_name = {"标签1": 10, "标签2": 20, "标签3": 30}
+        mock_create.side_effect = lambda name, *_: ids_by_name[name]
+
+        assert ensure_wp_tags(("标签1", "标签2"), wp_settings) == [10, 20]
+        assert ensure_wp_tags(("标签3",), wp_settings) == [30]
+        assert mock_post.call_count == 1
+
+    @patch("blog_autopilot.publisher.WP_BATCH_MAX_REQUESTS", 2)
+    @patch("blog_autopilot.publisher.session.post")
+    def test_large_tag_list_split_into_batches(self, mock_post, wp_settings):
+        mock_post.side_effect = [
+            self._batch_resp(207, [
+                {"status": 201, "body": {"id": 1}},
+                {"status": 201, "body": {"id": 2}},
+            ]),
+            self._batch_resp(207, [{"status": 201, "body": {"id": 3}}]),
+        ]
+
+        assert ensure_wp_tags(("a", "b", "c"), wp_settings) == [1, 2, 3]
+        assert mock_post.call_count == 2
+
+
+class TestHtmlSizeLimit:
+
+    @patch("blog_autopilot.publisher.sanitize_html")
+    @patch("blog_autopilot.publisher.session.post")
+    def test_oversize_post_rejected_before_request(self, mock_post, mock_sanitize, wp_settings):
+        settings = wp_settings.model_copy(update={"max_html_bytes": 10})
+
+        with pytest.raises(WordPressError) as exc_info:
+            post_to_wordpress("Title", "<p>中文正文</p>", settings)
+
+        assert exc_info.value.retryable is False
+        mock_sanitize.assert_not_called()
+        mock_post.assert_not_called()
+
+    @patch("blog_autopilot.publisher.session.post")
+    def test_limit_counts_utf8_bytes(self, mock_post, wp_settings):
+        """字符数未超限但 UTF-8 字节数超限时同样拒绝"""
+        settings = wp_settings.model_copy(update={"max_html_bytes": 12})
+
+        assert update_wp_post_content(1, "中文中文中文", settings) is False
+        mock_post.assert_not_called()
+
+
+class TestWPCaches:
+
+    @patch("blog_autopilot.publisher._batch_create_wp_tags", return_value=None)
+    @patch("blog_autopilot.publisher._create_or_get_wp_tag")
+    def test_tag_ids_reused_across_calls(self, mock_create, _mock_batch, wp_settings):
+        ids_by_name = {"a": 1, "b": 2, "c": 3}
+        mock_create.side_effect = lambda name, *_: ids_by_name[name]
+
+        assert ensure_wp_tags(("a", "b"), wp_settings) == [1, 2]
+        assert ensure_wp_tags(("b", "c"), wp_settings) == [2, 3]
+
+        created = sorted(c[0][0] for c in mock_create.call_args_list)
+        assert created == ["a", "b", "c"]
+
+    @patch("blog_autopilot.publisher.session.get")
+    @patch("blog_autopilot.publisher.session.post")
+    def test_post_content_cached_after_publish_and_update(self, mock_post, mock_get, wp_settings):
+        """发布/更新后的文章内容直接从缓存读取，不再 GET"""
+        published = MagicMock()
+        published.json.return_value = {"id": 5, "link": "https://test.wp/p/5"}
+        mock_post.return_value = published
+
+        post_to_wordpress("Title", "<p>正文</p>", wp_settings)
+        assert get_wp_post_content(5, wp_settings) == "<p>正文</p>"
+
+        assert update_wp_post_content(5, "<p>新正文</p>", wp_settings) is True
+        assert get_wp_post_content(5, wp_settings) == "<p>新正文</p>"
+        mock_get.assert_not_called()
+
+    @patch("blog_autopilot.publisher.session.get")
+    def test_post_content_read_through(self, mock_get, wp_settings):
+        mock_get.return_value.json.return_value = {"content": {"raw": "<p>raw</p>"}}
+
+        assert get_wp_post_content(9, wp_settings) == "<p>raw</p>"
+        assert get_wp_post_content(9, wp_settings) == "<p>raw</p>"
+        assert mock_get.call_count == 1
+
+        assert get_wp_post_content(9, wp_settings, use_cache=False) == "<p>raw</p>"
+        assert mock_get.call_count == 2
+
+    @patch("blog_autopilot.publisher.session.get")
+    @patch("blog_autopilot.publisher.session.post")
+    def test_failed_update_invalidates(self, mock_post, mock_get, wp_settings):
+        import requests as req
+
+        mock_get.return_value.json.return_value = {"content": {"raw": "<p>server</p>"}}
+        get_wp_post_content(9, wp_settings)
+        mock_post.side_effect = req.exceptions.ConnectionError("reset")
+
+        assert update_wp_post_content(9, "<p>local</p>", wp_settings) is False
+        assert get_wp_post_content(9, wp_settings) == "<p>server</p>"
+        assert mock_get.call_count == 2
+
 
 class TestPostToWordpress5xx:
 
-    @patch("blog_autopilot.publisher.requests.post")
+    @pytest.fixture(autouse=True)
+    def _no_backoff_sleep(self, monkeypatch):
+        monkeypatch.setattr(post_to_wordpress.retry, "sleep", lambda _s: None)
+
+    @patch("blog_autopilot.publisher.session.post")
     def test_5xx_raises_retryable_wp_error(self, mock_post, wp_settings):
         """5xx 错误应抛出 retryable=True 的 WordPressError"""
         import requests as req
@@ -168,5 +493,51 @@ class TestPostToWordpress5xx:
 
         assert exc_info.value.retryable is True
         assert exc_info.value.status_code == 502
-        # tenacity retries once (stop_after_attempt=2), so 2 calls total
+        # tenacity 指数退避重试 (stop_after_attempt=4)，共 4 次调用
+        assert mock_post.call_count == 4
+
+    @patch("blog_autopilot.publisher.session.post")
+    def test_retry_after_capped(self, mock_post, wp_settings, monkeypatch):
+        """Retry-After 过大时按上限等待"""
+        import requests as req
+
+        sleeps = []
+        monkeypatch.setattr(post_to_wordpress.retry, "sleep", sleeps.append)
+        throttled = MagicMock(status_code=503, text="", headers={"Retry-After": "3600"})
+        throttled.raise_for_status.side_effect = req.exceptions.HTTPError(response=throttled)
+        ok_resp = MagicMock()
+        ok_resp.json.return_value = {"id": 1, "link": "https://example.com/p/1"}
+        mock_post.side_effect = [throttled, ok_resp]
+
+        post_to_wordpress("Title", "<p>Body</p>", wp_settings)
+        assert sleeps == [60]
+
+    @patch("blog_autopilot.publisher.session.post")
+    def test_connection_refused_retried(self, mock_post, wp_settings):
+        """连接被拒绝（请求未发出）可重试，恢复后正常发布"""
+        import requests as req
+        from urllib3.exceptions import NewConnectionError
+
+        refused = req.exceptions.ConnectionError(
+            MagicMock(reason=NewConnectionError(None, "Connection refused"))
+        )
+        ok_resp = MagicMock()
+        ok_resp.json.return_value = {"id": 1, "link": "https://example.com/p/1"}
+        mock_post.side_effect = [refused, ok_resp]
+
+        result = post_to_wordpress("Title", "<p>Body</p>", wp_settings)
+        assert result.post_id == 1
         assert mock_post.call_count == 2
+
+    @patch("blog_autopilot.publisher.session.post")
+    def test_connection_reset_after_send_not_retried(self, mock_post, wp_settings):
+        """请求发出后连接中断不重试，避免重复发布"""
+        import requests as req
+
+        mock_post.side_effect = req.exceptions.ConnectionError("Connection reset by peer")
+
+        with pytest.raises(WordPressError) as exc_info:
+            post_to_wordpress("Title", "<p>Body</p>", wp_settings)
+
+        assert exc_info.value.retryable is False
+        assert mock_post.call_count == 1
@@ -25,42 +25,36 @@ def mock_settings():
 
 
 @pytest.fixture
-def sample_tag_rows():
+def sample_combo_stats():
+    """fetch_tag_combo_stats 的返回：按三级标签组合聚合后的行"""
     now = datetime.now(timezone.utc)
     return [
         {
             "tag_magazine": "技术周刊",
             "tag_science": "AI应用",
             "tag_topic": "NLP",
-            "tag_content": "GPT实践",
-            "created_at": now - timedelta(days=5),
-        },
-        {
-            "tag_magazine": "技术周刊",
-            "tag_science": "AI应用",
-            "tag_topic": "NLP",
-            "tag_content": "BERT分析",
-            "created_at": now - timedelta(days=10),
+            "cnt": 2,
+            "latest": now - timedelta(days=5),
         },
         {
             "tag_magazine": "技术周刊",
             "tag_science": "数据库",
             "tag_topic": "PostgreSQL",
-            "tag_content": "性能优化",
-            "created_at": now - timedelta(days=60),
+            "cnt": 1,
+            "latest": now - timedelta(days=60),
         },
         {
             "tag_magazine": "科学前沿",
             "tag_science": "量子计算",
             "tag_topic": "量子纠错",
-            "tag_content": "最新进展",
-            "created_at": now - timedelta(days=90),
+            "cnt": 1,
+            "latest": now - timedelta(days=90),
         },
     ]
 
 
 class TestTagGapAnalysis:
-    def test_tag_gap_analysis_returns_gaps(self, mock_settings, sample_tag_rows):
+    def test_tag_gap_analysis_returns_gaps(self, mock_settings, sample_combo_stats):
         with patch.object(TopicRecommender, "__init__", lambda self, s: None):
             rec = TopicRecommender.__new__(TopicRecommender)
             rec._db = MagicMock()
@@ -68,13 +62,13 @@ class TestTagGapAnalysis:
             rec._article_count = 0
             rec._tag_combo_count = 0
 
-        gaps = rec._analyze_tag_gaps(sample_tag_rows)
+        gaps = rec._analyze_tag_gaps(sample_combo_stats)
 
         assert len(gaps) > 0
         assert all(isinstance(g, ContentGap) for g in gaps)
         assert all(g.gap_type == "tag_gap" for g in gaps)
 
-    def test_tag_gap_scores_sorted_descending(self, mock_settings, sample_tag_rows):
+    def test_tag_gap_scores_sorted_descending(self, mock_settings, sample_combo_stats):
         with patch.object(TopicRecommender, "__init__", lambda self, s: None):
             rec = TopicRecommender.__new__(TopicRecommender)
             rec._db = MagicMock()
@@ -82,11 +76,11 @@ class TestTagGapAnalysis:
             rec._article_count = 0
             rec._tag_combo_count = 0
 
-        gaps = rec._analyze_tag_gaps(sample_tag_rows)
+        gaps = rec._analyze_tag_gaps(sample_combo_stats)
         scores = [g.gap_score for g in gaps]
         assert scores == sorted(scores, reverse=True)
 
-    def test_rare_combos_score_higher(self, mock_settings, sample_tag_rows):
+    def test_rare_combos_score_higher(self, mock_settings, sample_combo_stats):
         """出现次数少 + 时间久远的组合应该得分更高"""
         with patch.object(TopicRecommender, "__init__", lambda self, s: None):
             rec = TopicRecommender.__new__(TopicRecommender)
@@ -95,7 +89,7 @@ class TestTagGapAnalysis:
             rec._article_count = 0
             rec._tag_combo_count = 0
 
-        gaps = rec._analyze_tag_gaps(sample_tag_rows)
+        gaps = rec._analyze_tag_gaps(sample_combo_stats)
 
         # 量子计算只出现1次且90天前 → 应排在前面
         # NLP出现2次且5天前 → 应排在后面
@@ -104,6 +98,46 @@ class TestTagGapAnalysis:
 
         assert quantum_gaps[0].gap_score > nlp_gaps[0].gap_score
 
+    def test_combo_count_derived_from_stats(self, mock_settings, sample_combo_stats):
+        """二级组合数由三级聚合结果推出"""
+        with patch.object(TopicRecommender, "__init__", lambda self, s: None):
+            rec = TopicRecommender.__new__(TopicRecommender)
+            rec._db = MagicMock()
+            rec._writer = MagicMock()
+            rec._article_count = 0
+            rec._tag_combo_count = 0
+
+        gaps = rec._analyze_tag_gaps(sample_combo_stats)
+
+        assert rec._tag_combo_count == 3
+        nlp = next(g for g in gaps if g.tags.tag_topic == "NLP")
+        assert "出现 2 次" in nlp.description
+        # 5 天前 → 衰减权重 max(5/30, 0.1)
+        assert nlp.gap_score == pytest.approx((1 / 3) * (5 / 30))
+
+    def test_missing_latest_and_ties_keep_input_order(self, mock_settings):
+        """无发布时间权重为 1.0，同分组合保持输入顺序，空输入返回空列表"""
+        with patch.object(TopicRecommender, "__init__", lambda self, s: None):
+            rec = TopicRecommender.__new__(TopicRecommender)
+            rec._db = MagicMock()
+            rec._writer = MagicMock()
+            rec._article_count = 0
+            rec._tag_combo_count = 0
+
+        stats = [
+            {"tag_magazine": "A", "tag_science": "X", "tag_topic": "t1",
+             "cnt": 1, "latest": None},
+            {"tag_magazine": "B", "tag_science": "Y", "tag_topic": "t2",
+             "cnt": 1, "latest": None},
+            {"tag_magazine": "C", "tag_science": "Z", "tag_topic": "t3",
+             "cnt": 0, "latest": None},
+        ]
+        gaps = rec._analyze_tag_gaps(stats)
+
+        assert [g.tags.tag_topic for g in gaps] == ["t3", "t1", "t2"]
+        assert [g.gap_score for g in gaps] == pytest.approx([1.0, 0.5, 0.5])
+        assert rec._analyze_tag_gaps([]) == []
+
 
 class TestVectorGapAnalysis:
     def test_vector_gap_filters_sparse(self, mock_settings):
@@ -86,6 +86,8 @@ class TestScanInputDirectory:
 
         result = scan_input_directory(input_dir)
         assert len(result) == 2
+        # 按路径排序返回
+        assert [t.filename for t in result] == ["test2.txt", "test1.txt"]
 
     def test_skips_hidden_files(self, tmp_dirs):
         input_dir = tmp_dirs["input"]
@@ -101,3 +103,48 @@ class TestScanInputDirectory:
     def test_empty_directory(self, tmp_dirs):
         result = scan_input_directory(tmp_dirs["input"])
         assert result == []
+
+    def test_parses_each_directory_once(self, tmp_dirs):
+        from unittest.mock import patch
+
+        from blog_autopilot import scanner
+
+        input_dir = tmp_dirs["input"]
+        path = os.path.join(input_dir, "Magazine", "Science_28")
+        os.makedirs(path, exist_ok=True)
+        for name in ("a.txt", "b.txt", "c.txt"):
+            with open(os.path.join(path, name), "w") as f:
+                f.write("content")
+
+        with patch(
+            "blog_autopilot.scanner.parse_directory_structure",
+            wraps=scanner.parse_directory_structure,
+        ) as mock_parse:
+            result = scan_input_directory(input_dir)
+
+        assert [t.filename for t in result] == ["a.txt", "b.txt", "c.txt"]
+        assert result[0].metadata is result[2].metadata
+        assert mock_parse.call_count == 1
+
+
+class TestCategoriesConfigCache:
+    """测试 categories.json 按修改时间缓存"""
+
+    def test_reparses_only_when_file_changes(self, tmp_path, monkeypatch):
+        from unittest.mock import patch
+
+        from blog_autopilot import scanner
+
+        config = tmp_path / "categories.json"
+        config.write_text('{"Magazine": []}', encoding="utf-8")
+        monkeypatch.setattr(scanner, "_CATEGORIES_FILE", str(config))
+        monkeypatch.setattr(scanner, "_categories_cache", None)
+
+        with patch("blog_autopilot.scanner.json.load", wraps=scanner.json.load) as mock_load:
+            assert scanner._load_allowed_categories() == ("Magazine",)
+            assert scanner._load_allowed_categories() == ("Magazine",)
+            assert mock_load.call_count == 1
+
+            config.write_text('{"Magazine": [], "Books": []}', encoding="utf-8")
+            assert scanner._load_allowed_categories() == ("Magazine", "Books")
+            assert mock_load.call_count == 2
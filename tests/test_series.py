@@ -7,9 +7,11 @@ import pytest
 from blog_autopilot.constants import SERIES_NAV_CSS_CLASS
 from blog_autopilot.models import ArticleRecord, SeriesInfo, TagSet
 from blog_autopilot.series import (
+    _avg_similarity,
     _cosine_similarity,
     build_backfill_navigation,
     build_series_navigation,
+    detect_series,
     has_series_title_pattern,
     inject_series_navigation,
     replace_series_navigation,
@@ -61,6 +63,25 @@ class TestCosineSimilarity:
         assert -1.0 <= sim <= 1.0
 
 
+class TestAvgSimilarity:
+    def test_matches_pairwise_mean(self):
+        import numpy as np
+
+        q = [1.0, 2.0, 3.0]
+        members = [[1.0, 2.0, 3.0], [-1.0, -2.0, -3.0], [3.0, 0.0, 1.0]]
+        expected = sum(_cosine_similarity(q, m) for m in members) / 3
+        assert abs(_avg_similarity(q, members) - expected) < 1e-12
+        # 数据库返回的 float32 数组同样适用
+        arrays = [np.asarray(m, dtype=np.float32) for m in members]
+        assert abs(_avg_similarity(q, arrays) - expected) < 1e-6
+
+    def test_zero_member_counts_as_zero(self):
+        assert _avg_similarity([1.0, 0.0], [[1.0, 0.0], [0.0, 0.0]]) == 0.5
+
+    def test_no_members(self):
+        assert _avg_similarity([1.0, 0.0], []) == 0.0
+
+
 class TestHasSeriesTitlePattern:
     @pytest.mark.parametrize("title", [
         "深度学习 Part 3",
@@ -225,3 +246,44 @@ class TestBuildBackfillNavigation:
         assert "上一篇" not in html
         assert "下一篇" in html
         assert "第二篇" in html
+
+
+class TestDetectSeries:
+    def test_matched_series_carries_backfill_context(self):
+        """命中系列时一次查询带回上一篇 post ID 和上上篇，回溯无需再查库"""
+        tags = TagSet("M", "S", "T", "C")
+        first = ArticleRecord(id="a1", title="第一篇", tags=tags, tg_promo="p")
+        second = ArticleRecord(id="a2", title="第二篇", tags=tags, tg_promo="p")
+        db = MagicMock()
+        db.detect_series_candidates.return_value = [
+            MagicMock(id="s-1", title="测试系列"),
+        ]
+        db.get_series_article_embeddings_bulk.return_value = {"s-1": [[1.0, 0.0]]}
+        db.get_series_members_with_wp.return_value = [(first, 11), (second, 22)]
+
+        info = detect_series(db, tags, [1.0, 0.0], "第三篇")
+
+        assert info.order == 3
+        assert info.prev_article is second
+        assert info.prev_prev_article is first
+        assert info.prev_wp_post_id == 22
+        db.get_series_members_with_wp.assert_called_once_with("s-1")
+
+    def test_candidate_embeddings_fetched_in_one_query(self):
+        tags = TagSet("M", "S", "T", "C")
+        db = MagicMock()
+        db.detect_series_candidates.return_value = [
+            MagicMock(id="s-1", title="系列一"),
+            MagicMock(id="s-2", title="系列二"),
+        ]
+        db.get_series_article_embeddings_bulk.return_value = {
+            "s-1": [[0.0, 1.0]],
+            "s-2": [[1.0, 0.0]],
+        }
+        db.get_series_members_with_wp.return_value = []
+
+        detect_series(db, tags, [1.0, 0.0], "普通标题")
+
+        db.get_series_article_embeddings_bulk.assert_called_once_with(["s-1", "s-2"])
+        db.get_series_article_embeddings.assert_not_called()
+        db.get_series_members_with_wp.assert_called_once_with("s-2")
@@ -18,7 +18,7 @@ def tg_settings():
 
 class TestSendToTelegram:
 
-    @patch("blog_autopilot.telegram.requests.post")
+    @patch("blog_autopilot.telegram.session.post")
     def test_send_success(self, mock_post, tg_settings):
         mock_resp = MagicMock()
         mock_resp.json.return_value = {"ok": True}
@@ -0,0 +1,70 @@
+"""测试输入目录监听"""
+
+import errno
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from blog_autopilot.watcher import InputWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    (tmp_path / "Magazine" / "Science_28").mkdir(parents=True)
+    w = InputWatcher(str(tmp_path))
+    yield w
+    w.close()
+
+
+class TestInputWatcher:
+
+    def test_wake_interrupts_wait(self, watcher):
+        watcher.wake()
+        start = time.monotonic()
+        assert watcher.wait(5) is False
+        assert time.monotonic() - start < 1
+
+    def test_timeout_without_events(self, watcher):
+        assert watcher.wait(0.01) is False
+
+    def test_new_file_in_subdirectory(self, watcher, tmp_path):
+        if not watcher.active:
+            pytest.skip("inotify 不可用")
+        (tmp_path / "Magazine" / "Science_28" / "a.txt").write_text("x")
+        assert watcher.wait(5) is True
+        # 事件已读空
+        assert watcher.wait(0.01) is False
+
+    def test_watches_new_subdirectory(self, watcher, tmp_path):
+        if not watcher.active:
+            pytest.skip("inotify 不可用")
+        new_dir = tmp_path / "News" / "World_5"
+        new_dir.mkdir(parents=True)
+        assert watcher.wait(5) is True
+        (new_dir / "b.txt").write_text("x")
+        assert watcher.wait(5) is True
+
+    def test_watch_failure_falls_back_to_polling(self, watcher, tmp_path):
+        """inotify_add_watch 失败（如 ENOSPC）时不再声称 active，改为定时轮询"""
+        if not watcher.active:
+            pytest.skip("inotify 不可用")
+        watcher._libc = MagicMock()
+        watcher._libc.inotify_add_watch.return_value = -1
+        with patch("blog_autopilot.watcher.ctypes.get_errno", return_value=errno.ENOSPC):
+            watcher._watch_tree(str(tmp_path))
+        assert watcher.active is False
+        assert watcher.wait(0.01) is False
+
+    def test_only_new_directories_are_walked(self, watcher, tmp_path):
+        """新文件事件不遍历目录树；新建目录只遍历该子树"""
+        if not watcher.active:
+            pytest.skip("inotify 不可用")
+        with patch.object(watcher, "_watch_tree") as mock_walk:
+            (tmp_path / "Magazine" / "Science_28" / "a.txt").write_text("x")
+            assert watcher.wait(5) is True
+            mock_walk.assert_not_called()
+
+            (tmp_path / "News").mkdir()
+            assert watcher.wait(5) is True
+            mock_walk.assert_called_once_with(str(tmp_path / "News"))